@@ -15,118 +15,29 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import json
 import logging
 import os
 import sys
-from shutil import copy2, copytree
 
-import coloredlogs
-import inquirer
-from inquirer.themes import load_theme_from_dict
 from termcolor import colored
 
+# Started first, so that the startup profile includes the imports below
+from modules.startup import (lazy_import, startup_background, startup_call,
+                             startup_mark, startup_report)
 from modules.app import app_banner, app_helper, app_reboot, app_translator
-from modules.installer import (clean_pacman_cache,
-                               configure_desktop_environment,
-                               configure_display_manager, configure_gdm,
-                               configure_grub, configure_lightdm,
-                               configure_lxdm, configure_sddm,
-                               configure_systemdboot, configure_xdm,
-                               create_fstab, create_user, install_aur_helper,
-                               install_base_system, install_grub_bootloader,
-                               install_network, install_optional_packages,
-                               set_hostname_file, set_locales, set_mirrorlist,
-                               set_root_passwd, set_timezone,
-                               set_user_privileges, set_virtual_console)
-from modules.partitioner import (create_dos_partitions, create_lvm_partitions,
-                                 delete_partitions, format_drive,
-                                 format_partitions, mount_partitions,
-                                 new_partition_table, set_partition_types,
-                                 umount_partitions)
-from modules.questioner.questions import question_manager
-from modules.session import (clean_session, desktop_session, display_session,
-                             drive_session, partition_session, system_session,
-                             vga_session)
-from modules.system_manager.settings import (get_drives, get_filesystem,
-                                             get_firmware, get_ipinfo,
-                                             get_mirrorlist, get_mountpoints,
-                                             get_partition_id, get_partitions,
-                                             get_partuuid, get_processor,
-                                             get_vga_controller, get_volumes)
-from modules.system_manager.unix_command import (run_command, dump_json_file,
-                                                 load_json_file)
-
-
-def session_parameters(self):
-    """Set parameters of the current session.
-
-    Submodules
-    ----------
-        session: modules/session.py
-    """
-    drive_session(self)
-    partition_session(self)
-    vga_session(self)
-    desktop_session(self)
-    display_session(self)
-    system_session(self)
-    clean_session(self)
-
-
-def run_partitioner(self):
-    """Partition the disk.
-
-    Submodules
-    ----------
-        partitioner: modules/partitioner.py
-    """
-    umount_partitions(self)
-    if self.user['drive']['name'] is not None:
-        delete_partitions(self)
-        format_drive(self)
-        new_partition_table(self)
-        create_dos_partitions(self)
-        self.user['partitions']['drive_id'] = get_partition_id(self)
-        self.user['partitions']['partuuid'] = get_partuuid(self)
-        set_partition_types(self)
-        if self.user['drive']['lvm'] is True:
-            create_lvm_partitions(self)
-            self.user['partitions']['drive_id'] = get_partition_id(self)
-            self.user['partitions']['partuuid'] = get_partuuid(self)
-        format_partitions(self)
-
-
-def run_installer(self):
-    """Install Arch Linux.
-
-    Submodules
-    ----------
-        installer: modules/installer.py
-    """
-    set_mirrorlist(self)
-    install_base_system(self)
-    create_fstab(self)
-    set_timezone(self)
-    set_locales(self)
-    set_virtual_console(self)
-    set_hostname_file(self)
-    set_root_passwd(self)
-    create_user(self)
-    install_network(self)
-    install_grub_bootloader(self)
-    install_optional_packages(self)
-    configure_systemdboot(self)
-    configure_grub(self)
-    configure_desktop_environment(self)
-    configure_display_manager(self)
-    configure_gdm(self)
-    configure_lightdm(self)
-    configure_sddm(self)
-    configure_lxdm(self)
-    configure_xdm(self)
-    set_user_privileges(self)
-    install_aur_helper(self)
-    clean_pacman_cache(self)
+from modules.phases import install_system, probe_drives, session_parameters
+from modules.system_manager.settings import (get_firmware, get_hardware,
+                                             get_ipinfo, get_memory,
+                                             get_mirrorlist, get_processor,
+                                             get_vga_controller)
+from modules.system_manager.events import result_event, setup_events
+from modules.system_manager.hardware import hardware_index
+from modules.system_manager.logger import setup_logging
+from modules.system_manager.model import json_default, session_model
+from modules.system_manager.target import TargetRoot
+from modules.system_manager.unix_command import (LOGS, CommandError,
+                                                 load_json_file, run_command)
 
 
 class PyArchboot:
@@ -138,20 +49,53 @@ class PyArchboot:
         " |---` modules/
         " |     |---- questioner/
         " |     |     |---- __init__.py
+        " |     |     |---- answers.py
+        " |     |     |---- lookup.py
         " |     |     |---- questions.py
+        " |     |     |---- state.py
         " |     |     |---- updater.py
         " |     |     |---- validator.py
         " |     |
         " |     |---- system_manager/
         " |     |     |---- __init__.py
+        " |     |     |---- cache.py
+        " |     |     |---- events.py
+        " |     |     |---- hardware.py
+        " |     |     |---- logger.py
+        " |     |     |---- model.py
+        " |     |     |---- progress.py
         " |     |     |---- settings.py
+        " |     |     |---- size.py
+        " |     |     |---- slots.py
+        " |     |     |---- target.py
         " |     |     |---- unix_command.py
         " |     |
         " |     |---- __init__.py
+        " |     |---- api.py
         " |     |---- app.py
+        " |     |---- deploy.py
+        " |     |---- fleet.py
+        " |     |---- image.py
         " |     |---- installer.py
+        " |     |---- journal.py
         " |     |---- partitioner.py
+        " |     |---- phases.py
+        " |     |---- reconfigure.py
         " |     |---- session.py
+        " |     |---- startup.py
+        " |
+        " |---` tests/
+        " |     |---- fixtures/
+        " |     |     |---- hardware.json
+        " |     |     |---- image_answers.json
+        " |     |
+        " |     |---- conftest.py
+        " |     |---- test_hardware_rules.py
+        " |     |---- test_image_mode.py
+        " |     |---- test_lookup.py
+        " |     |---- test_reconfigure.py
+        " |     |---- test_session.py
+        " |     |---- test_startup.py
         "`
     """
 
@@ -163,40 +107,120 @@ class PyArchboot:
             self.app: "Dictionary containing application settings"
             self.theme: "Dictionary containing application theme"
             self.packages: "Dictionary containing Arch Linux packages"
+            self.boot: "Dictionary containing boot performance profiles"
+            self.hardware: "Dictionary of the hardware rules (lookup index)"
             self.trad: "Function to translate strings"
             self.system: "Dictionary to store system settings"
-            self.user: "Dictionary to store user's session parameters"
+            self.user: "User's answers, then the session (UserSession)"
+            self.answers: "Dictionary of the answers file (unattended mode)"
+            self.fleet: "String of the manifest file (fleet mode)"
+            self.root: "Target root folder of the installation"
+            self.image: "Dictionary of the disk image (image mode)"
+            self.deploy: "Array of the image and the drive (deploy mode)"
+            self.journal: "Dictionary of the install journal (steps)"
+            self.reconfigure: "UserSession of the installed system"
+            self.startup_profile: "Boolean to report the startup timings"
+            self.dry_run: "Boolean to print the session without installing"
+            self.result: "String of the final event (success, failure)"
+
+        Modules and probes are timed for the startup profile, heavy
+        modules are only imported by the mode that needs them.
         """
-        self.app = load_json_file('app.json')
-        themes = load_json_file('themes.json')
+        self.app = startup_call(load_json_file, 'app.json')
+        themes = startup_call(load_json_file, 'themes.json')
         self.theme = themes['default']
-        self.packages = load_json_file('packages.json')
+        self.packages = startup_call(load_json_file, 'packages.json')
+        self.boot = startup_call(load_json_file, 'boot.json')
+        self.hardware = hardware_index(startup_call(load_json_file,
+                                                    'hardware.json'))
         self.trad = ''
         self.system = {}
         self.user = {}
-
-        # Get system settings
-        self.system['ipinfo'] = get_ipinfo()
-        options = app_helper(self)
-        language = self.system['ipinfo']['country'].lower()
+        self.result = None
+
+        # Get system settings (public IP lookup in the background,
+        # only waited for the language if not selected)
+        ipinfo = startup_background(get_ipinfo)
+        options = startup_call(app_helper, self)
+        self.startup_profile = options.startup_profile
+        self.dry_run = options.dry_run
         if options.lang:
             language = options.lang[0].strip()
-        self.trad = app_translator(language)
+        else:
+            self.system['ipinfo'] = ipinfo()
+            language = self.system['ipinfo']['country']
+        self.trad = startup_call(app_translator, language)
+        self.answers = None
+        if options.config:
+            answers = lazy_import('modules.questioner.answers')
+            self.answers = answers.load_answers(options.config[0].strip())
+        if options.events:
+            try:
+                startup_call(setup_events, options.events[0].strip())
+            except (OSError, ValueError) as events_error:
+                logging.error(self.trad('can not open event stream: {error}')
+                              .format(error=events_error))
+                sys.exit(1)
         if options.theme:
             self.theme = themes[options.theme[0].strip()]
         if options.keyboard:
             self.system['keymap'] = options.keyboard[0].strip()
-        self.system['mirrorlist'] = get_mirrorlist(self)
-        self.system['cpu'] = get_processor()
-        self.system['efi'], self.system['firmware'] = get_firmware()
-        self.system['controllers'] = get_vga_controller()
-        self.system['drives'] = get_drives(self)
-        self.system['partitions'] = get_partitions()
-        self.system['mountpoints'] = get_mountpoints()
-        self.system['volumes'] = get_volumes()
-        self.system['lvm'] = get_filesystem(self, 'lvm')
-        self.system['luks'] = get_filesystem(self, 'luks')
-        self.system['ntfs'] = get_filesystem(self, 'ntfs')
+
+        self.root = TargetRoot()
+        if options.root:
+            self.root = TargetRoot(options.root[0].strip())
+
+        # Resume mode (session of the journal)
+        self.journal = None
+        if options.resume:
+            journal = lazy_import('modules.journal')
+            self.journal = journal.load_journal(self)
+            if not options.root:
+                self.root = TargetRoot(self.journal['root'])
+
+        # Reconfigure mode (session of the installed system)
+        self.reconfigure = None
+        if options.reconfigure:
+            reconfigure = lazy_import('modules.reconfigure')
+            self.reconfigure = reconfigure.load_session(
+                self, options.reconfigure[0].strip())
+
+        # Fleet mode (targets are probed by their own installs)
+        self.fleet = None
+        if options.fleet:
+            self.fleet = options.fleet[0].strip()
+            return
+
+        # Deploy mode (the image is already installed)
+        self.deploy = None
+        if options.deploy:
+            self.deploy = [os.path.abspath(options.deploy[0].strip()),
+                           options.deploy[1].strip()]
+            return
+
+        # Image mode (attached by run, drives probed from the loop device)
+        self.image = None
+        if options.image:
+            self.image = {'file': os.path.abspath(options.image[0].strip()),
+                          'size': '8G', 'format': 'raw', 'loop': None}
+            if options.image_size:
+                self.image['size'] = options.image_size[0].strip()
+            if options.image_format:
+                self.image['format'] = options.image_format[0].strip()
+
+        self.system['aur_cache'] = 'cache/aur'
+        if options.aur_cache:
+            self.system['aur_cache'] = options.aur_cache[0].strip()
+        self.system['ipinfo'] = ipinfo()
+        self.system['mirrorlist'] = startup_call(get_mirrorlist, self)
+        self.system['cpu'] = startup_call(get_processor)
+        self.system['memory'] = startup_call(get_memory)
+        self.system['efi'], self.system['firmware'] = startup_call(
+            get_firmware)
+        self.system['controllers'] = startup_call(get_vga_controller)
+        self.system['hardware'] = startup_call(get_hardware)
+        if self.image is None:
+            probe_drives(self)
 
     def __str__(self):
         """Add extra method to the class.
@@ -213,57 +237,139 @@ class PyArchboot:
 
         Actions
         -------
-            1) Ask questions to the user.
-            2) Set parameters of the current session.
+            0) Install many targets from the manifest (fleet mode)
+               or deploy a disk image (deploy mode).
+               Attach the disk image (image mode).
+            1) Ask questions to the user (or validate the answers file),
+               or load the session of the journal (resume mode).
+               A new try asks again with the previous answers.
+            2) Set parameters of the current session and start the journal,
+               or reapply the changed settings (reconfigure mode),
+               or print them and exit (dry run).
             3) Partition the disk (optional).
             4) Mount the partitions.
             5) Install Arch Linux.
+            6) Release the disk image (image mode, on error too).
+
+        Modules of each phase are imported when the phase starts.
         """
         app_banner(self)
 
-        # Ask questions to the user
-        self.user = inquirer.prompt(
-            question_manager(self), theme=load_theme_from_dict(self.theme))
-
-        if self.user['confirm'] is False:
-            del self
-            os.execl(sys.executable, sys.executable, * sys.argv)
-
-        # Set parameters of the current session
-        session_parameters(self)
-
-        # DEBUG: uncomment those lines for running tests
-        from pprint import pprint
-        pprint(self.user)
-        sys.exit(0)
+        # Install many targets from the manifest
+        if self.fleet is not None:
+            from modules.fleet import fleet_manager
+            sys.exit(1 if fleet_manager(self, self.fleet) > 0 else 0)
+
+        # Deploy the image to the drive
+        if self.deploy is not None:
+            from modules.deploy import deploy_manager
+            hostname = None
+            if self.answers is not None:
+                hostname = self.answers.get('hostname')
+            deploy_manager(self, *self.deploy, hostname=hostname)
+            sys.exit(0)
 
-        # Partition the disk (optional)
-        run_partitioner(self)
+        # Attach the disk image (the loop device is the only drive)
+        if self.image is not None:
+            from modules.image import attach_image, release_image
+            self.image['loop'] = attach_image(self.image['file'],
+                                              self.image['size'])
+            os.environ['PYARCHBOOT_DRIVE'] = self.image['loop']
+            if self.answers is not None:
+                self.answers.setdefault('drive', self.image['loop'])
+            try:
+                probe_drives(self)
+                self.install()
+            finally:
+                release_image(self)
+            return
+
+        self.install()
+
+    def install(self):
+        """Install Arch Linux (steps 1 to 6 of `run`)."""
+        import inquirer
+        from inquirer.themes import load_theme_from_dict
+
+        from modules.journal import new_journal
+
+        # Resume the interrupted installation
+        if self.journal is not None:
+            logging.info(self.trad('resume installation started on {date}')
+                         .format(date=self.journal['started']))
+            self.user = session_model(self.journal['user'])
 
-        # Mount the partitions
-        mount_partitions(self)
+        else:
 
-        # Install Arch Linux
-        run_installer(self)
+            # Unattended install from the answers file
+            if self.answers is not None:
+                from modules.questioner.answers import answers_manager
+                self.user = answers_manager(self, self.answers)
+                if self.user['confirm'] is False:
+                    sys.exit(0)
+
+            # Ask questions to the user (again with the previous answers)
+            else:
+                from modules.questioner.questions import question_manager
+                previous = None
+                while True:
+                    self.user = inquirer.prompt(
+                        question_manager(self, previous),
+                        theme=load_theme_from_dict(self.theme))
+
+                    if self.user['confirm'] is not False:
+                        break
+
+                    previous = self.user
+                    probe_drives(self)
+
+            # Set parameters of the current session
+            session_parameters(self)
+
+            # Print the session without installing (dry run)
+            if self.dry_run is True:
+                print(json.dumps(self.user, ensure_ascii=False, indent=4,
+                                 default=json_default))
+                sys.exit(0)
+
+            # Reapply the changed settings of the installed system
+            if self.reconfigure is not None:
+                from modules.reconfigure import reconfigure_manager
+                reconfigure_manager(self, self.reconfigure)
+                sys.exit(0)
+
+            # Start the install journal
+            new_journal(self)
+
+        # Partition the disk, mount the partitions and install Arch Linux
+        install_system(self)
+
+        # Release and convert the disk image
+        if self.image is not None:
+            from modules.image import image_manager
+            image_manager(self)
+            sys.exit(0)
 
-        # Copy logs to system
-        logging.info(self.trad('installation successful'))
-        dump_json_file('{x}.json'.format(x=self.user['username']), self.user)
-        copytree('logs', '/mnt/var/log/PyArchboot', copy_function=copy2)
+        # Send the final event before the reboot
+        result_event(self)
 
         # Reboot the system
-        msg = self.trad('Do you wish to reboot your computer now')
-        question = [inquirer.Confirm('reboot', message=msg, default=True)]
-        confirm = inquirer.prompt(question,
-                                  theme=load_theme_from_dict(self.theme))
+        if self.answers is not None:
+            confirm = {'reboot': self.answers.get('reboot', False) is True}
+        else:
+            msg = self.trad('Do you wish to reboot your computer now')
+            question = [inquirer.Confirm('reboot', message=msg, default=True)]
+            confirm = inquirer.prompt(question,
+                                      theme=load_theme_from_dict(self.theme))
 
         if confirm['reboot'] is True:
-            app_reboot()
+            app_reboot(self)
         else:
             sys.exit(0)
 
 
 if __name__ == '__main__':
+    startup_mark('import PyArchboot')
 
     # Prevent non root user
     if not os.geteuid() == 0:
@@ -279,34 +385,33 @@ if __name__ == '__main__':
             'red', attrs=['bold']))
 
     # Create logs folder
-    if os.path.isdir('logs') is False:
-        run_command('mkdir logs')
-
-    # Create a StreamHandler wich write to sys.stderr
-    LVL = '%(asctime)s [%(levelname)s] %(pathname)s:%(lineno)d [%(funcName)s]'
-    MESSAGE = '{level} %(message)s'.format(level=LVL)
-    logging.basicConfig(filename='logs/PyArchboot.log',
-                        level=logging.DEBUG,
-                        filemode='w',
-                        format=MESSAGE)
-
-    # Create a logger for terminal output
-    console = logging.getLogger()
-    coloredlogs.install(level='INFO',
-                        logger=console,
-                        datefmt='%H:%M:%S',
-                        fmt='[%(asctime)s] %(levelname)s > %(message)s',
-                        level_styles={
-                            'critical': {'bold': True, 'color': 'red'},
-                            'debug': {'color': 'green'},
-                            'error': {'color': 'red'},
-                            'info': {'color': 'cyan'},
-                            'warning': {'color': 'yellow', 'bold': True}},
-                        field_styles={
-                            'levelname': {'bold': True, 'color': 'green'},
-                            'asctime': {'color': 'yellow'}})
-
-    PyArchboot().run()
+    if os.path.isdir(LOGS) is False:
+        run_command('mkdir -p {logs}'.format(logs=LOGS))
+
+    # Start the logging pipeline (log files and console)
+    startup_call(setup_logging, LOGS)
+
+    # Report the startup timings (profile mode)
+    try:
+        APPLICATION = PyArchboot()
+    except CommandError:
+        sys.exit(1)
+    if APPLICATION.startup_profile is True:
+        startup_report(LOGS)
+        sys.exit(0)
+
+    # Start the application (final event on exit)
+    try:
+        APPLICATION.run()
+    except SystemExit as exit_error:
+        result_event(APPLICATION, exit_error.code or None)
+        raise
+    except CommandError as command_error:
+        result_event(APPLICATION, command_error)
+        sys.exit(1)
+    except BaseException as run_error:
+        result_event(APPLICATION, run_error)
+        raise
 
 
 # PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
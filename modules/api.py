@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Python API of the installer (e.q., from a provisioning service):
+
+    from modules.api import Installer, Inventory, PartitionPlan, Session
+
+    inventory = Inventory(language='en')
+    plan = PartitionPlan('/dev/sda', boot_size='512M', swap='zram')
+    session = Session(inventory, plan, root='/mnt', hostname='node1',
+                      username='admin', user_passwd='...',
+                      root_passwd='...', ...)
+    Installer(session).run()
+
+Errors raise a PyArchbootError (CommandError for shell commands)
+instead of exiting the process. The API is run from the PyArchboot
+folder (json/ and locales/), and installs of a same process share the
+logs folder, so concurrent installs are run by the fleet mode (one
+process and mount namespace per target). Logging is configured by the
+caller (e.q., with `setup_logging`).
+"""
+
+import contextlib
+import copy
+import logging
+import os
+
+from .app import app_translator
+from .phases import install_system, probe_drives, session_parameters
+from .system_manager.hardware import hardware_index
+from .system_manager.settings import (get_firmware, get_hardware, get_ipinfo,
+                                      get_memory, get_mirrorlist,
+                                      get_processor, get_vga_controller)
+from .system_manager.size import ByteSize
+from .system_manager.target import TargetRoot
+from .system_manager.unix_command import (LOGS, CommandError,
+                                          PyArchbootError, load_json_file)
+
+__all__ = ['Inventory', 'PartitionPlan', 'Session', 'Installer',
+           'SessionError', 'CommandError', 'PyArchbootError']
+
+# Swap of the partition plan (swap_type answer)
+SWAP_TYPES = [None, 'partition', 'swapfile', 'zram']
+
+
+class SessionError(PyArchbootError):
+    """Invalid field of a partition plan or invalid session answers."""
+
+
+class ErrorRecords(logging.Handler):
+    """Store the error records of an API call (exception message)."""
+
+    def __init__(self):
+        """Store the errors from ERROR level."""
+        super().__init__(logging.ERROR)
+        self.errors = []
+
+    def emit(self, record):
+        """Store the message of the record."""
+        self.errors.append(record.getMessage())
+
+
+@contextlib.contextmanager
+def api_errors(error=PyArchbootError):
+    """Raise an exception instead of exiting the process.
+
+    Functions of the installer log their errors and exit, the logged
+    errors are the message of the exception.
+
+    Keyword Arguments
+    -----------------
+        `error`: "Exception class raised on exit" (default: PyArchbootError)
+
+    Modules
+    -------
+        contextlib: "Utilities for with-statement contexts"
+        logging: "Event logging system for applications and libraries"
+
+    Raises
+    ------
+        PyArchbootError: "Exit of a function of the installer"
+    """
+    records = ErrorRecords()
+    logging.getLogger().addHandler(records)
+    try:
+        yield
+
+    except SystemExit as exit_error:
+        raise error('; '.join(records.errors) or str(exit_error.code)) \
+            from exit_error
+
+    finally:
+        logging.getLogger().removeHandler(records)
+
+
+class Inventory:
+    """System settings of the host (probed once, shared by the sessions).
+
+    Keyword Arguments
+    -----------------
+        `language`: "String of the language" (default: public IP country)
+        `ipinfo`: "Dictionary of the public IP lookup" (default: lookup)
+        `aur_cache`: "String of the AUR packages folder" (default: cache/aur)
+
+    Submodules
+    ----------
+        settings: modules/system_manager/settings.py
+        `probe_drives`: "Probe the drives and partitions"
+
+    Raises
+    ------
+        PyArchbootError: "Probe failed (e.q., no drive, no network)"
+    """
+
+    def __init__(self, language=None, ipinfo=None, aur_cache='cache/aur'):
+        """Probe the system settings."""
+        self.app = load_json_file('app.json')
+        self.packages = load_json_file('packages.json')
+        self.boot = load_json_file('boot.json')
+        self.hardware = hardware_index(load_json_file('hardware.json'))
+        self.trad = app_translator(language or 'en')
+        self.system = {'aur_cache': aur_cache}
+
+        with api_errors():
+            self.system['ipinfo'] = ipinfo or get_ipinfo()
+            if language is None:
+                self.trad = app_translator(self.system['ipinfo']['country'])
+
+            self.system['mirrorlist'] = get_mirrorlist(self)
+            self.system['cpu'] = get_processor()
+            self.system['memory'] = get_memory()
+            self.system['efi'], self.system['firmware'] = get_firmware()
+            self.system['controllers'] = get_vga_controller()
+            self.system['hardware'] = get_hardware()
+            probe_drives(self)
+
+    def refresh(self):
+        """Probe the drives and partitions again (e.q., after an install).
+
+        Returns
+        -------
+            "The inventory (chained calls)"
+        """
+        with api_errors():
+            probe_drives(self)
+
+        return self
+
+    @property
+    def drives(self):
+        """Array of the available drives (device names)."""
+        return [drive.split()[0] for drive in self.system['drives']
+                if isinstance(drive, str)]
+
+
+class PartitionPlan:
+    """Partitioning of the drive (typed answers of the drive questions).
+
+    Sizes are ByteSize, integers of bytes or strings (e.q., 25.5G), a
+    missing root (or home) size uses the free space of the drive.
+    Without drive, the already formatted partitions are used.
+
+    Arguments
+    ---------
+        drive: "String of the drive (e.q., /dev/sda) or None"
+
+    Keyword Arguments
+    -----------------
+        `boot_size`, `root_size`, `home_size`, `swap_size`, `swapfile_size`:
+            "Sizes of the partitions and of the swap file" (default: None)
+        `swap`: "None, partition, swapfile or zram" (default: None)
+        `home`: "Boolean to create a home partition" (default: False)
+        `lvm`, `luks`: "Booleans of the drive options"
+        `zswap`: "Boolean of zswap" (default: None, boot profile)
+        `boot_id`, `root_id`, `swap_id`, `home_id`:
+            "Strings of the formatted partitions (without drive)"
+
+    Raises
+    ------
+        SessionError: "Invalid field"
+    """
+
+    def __init__(self, drive, boot_size='512M', root_size=None,
+                 home_size=None, swap_size=None, swapfile_size='2G',
+                 swap=None, home=False, lvm=False, luks=False, zswap=None,
+                 boot_id=None, root_id=None, swap_id=None, home_id=None):
+        """Validate and store the fields."""
+        if (drive is not None) and not isinstance(drive, str):
+            raise SessionError('drive: invalid drive {drive}'.format(
+                drive=drive))
+
+        for name, value in [('home', home), ('lvm', lvm), ('luks', luks),
+                            ('zswap', zswap)]:
+            if not isinstance(value, bool) and \
+                    not ((name == 'zswap') and (value is None)):
+                raise SessionError('{name}: must be true or false'.format(
+                    name=name))
+
+        if swap not in SWAP_TYPES:
+            raise SessionError('swap: invalid swap {swap}'.format(swap=swap))
+
+        if (luks is True) and (lvm is False):
+            raise SessionError('luks: requires lvm')
+
+        self.drive = drive
+        self.swap = swap
+        self.home = home
+        self.lvm = lvm
+        self.luks = luks
+        self.zswap = zswap
+        self.sizes = {}
+        for name, size in [('boot_size', boot_size), ('root_size', root_size),
+                           ('home_size', home_size), ('swap_size', swap_size),
+                           ('swapfile_size', swapfile_size)]:
+            try:
+                self.sizes[name] = None if size is None else \
+                    ByteSize.parse(size)
+            except ValueError as size_error:
+                raise SessionError('{name}: {error}'.format(
+                    name=name, error=size_error)) from size_error
+
+        self.ids = {'boot_id': boot_id, 'root_id': root_id,
+                    'swap_id': swap_id, 'home_id': home_id}
+        if (drive is None) and ((boot_id is None) or (root_id is None)):
+            raise SessionError('boot_id, root_id: required without drive')
+
+    def answers(self):
+        """Get the answers of the drive questions.
+
+        Returns
+        -------
+            "Dictionary containing the answers (as an answers file)"
+        """
+        answers = {'drive': self.drive, 'lvm': self.lvm, 'luks': self.luks,
+                   'optional_partitions': []}
+        if self.zswap is not None:
+            answers['zswap'] = self.zswap
+
+        if self.swap is not None:
+            answers['optional_partitions'].append('Swap')
+            answers['swap_type'] = self.swap
+        if self.home is True:
+            answers['optional_partitions'].append('Home')
+
+        answers['root_freespace'] = self.sizes['root_size'] is None
+        answers['home_freespace'] = self.sizes['home_size'] is None
+        for name, size in self.sizes.items():
+            if size is not None:
+                answers[name] = str(size)
+
+        answers.update({name: partition for name, partition
+                        in self.ids.items() if partition is not None})
+
+        return answers
+
+
+class Context:
+    """Attributes of the installer functions (as the PyArchboot object).
+
+    Arguments
+    ---------
+        inventory: "Inventory of the system"
+
+    Keyword Arguments
+    -----------------
+        `user`: "UserSession record of the session" (default: None)
+        `root`: "String of the target root folder" (default: /mnt)
+    """
+
+    def __init__(self, inventory, user=None, root=None):
+        """Copy the system settings (the inventory is not modified)."""
+        self.app = inventory.app
+        self.packages = inventory.packages
+        self.boot = inventory.boot
+        self.hardware = inventory.hardware
+        self.trad = inventory.trad
+        self.system = copy.deepcopy(inventory.system)
+        self.user = user or {}
+        self.root = TargetRoot() if root is None else TargetRoot(root)
+        self.answers = None
+        self.image = None
+        self.journal = None
+        self.reconfigure = None
+        self.result = None
+
+
+def rebase_mountpoints(partitions, source, target):
+    """Move the mountpoints of the partitions to another root.
+
+    Arguments
+    ---------
+        partitions: "Array of the Partition records"
+        source: "String of the root folder of the session"
+        target: "TargetRoot of the installation"
+
+    Modules
+    -------
+        os: "Export all functions from posix"
+
+    Returns
+    -------
+        "Tuple of the Partition records"
+    """
+    rebased = []
+    for partition in partitions:
+        mountpoint = partition['mountpoint']
+        if (mountpoint not in [None, 'swap']) and \
+                (os.path.commonpath([source, mountpoint]) == source):
+            path = os.path.relpath(mountpoint, source)
+            partition = partition.replace(
+                mountpoint=str(target) if path == '.' else target.join(path))
+        rebased.append(partition)
+
+    return tuple(rebased)
+
+
+class Session:
+    """Session of an installation (validated as an answers file).
+
+    Answers are validated by the questions of the installer (choices,
+    sizes and validators), then the session parameters are set.
+    Mountpoints of the partitions are set under the target root.
+
+    Arguments
+    ---------
+        inventory: "Inventory of the system"
+        plan: "PartitionPlan of the drive"
+        answers: "Answers of the other questions (e.q., hostname)"
+
+    Keyword Arguments
+    -----------------
+        `root`: "String of the target root folder" (default: /mnt)
+
+    Submodules
+    ----------
+        `answers_manager`: "Validate the answers file against the questions"
+        `session_parameters`: "Set parameters of the current session"
+
+    Raises
+    ------
+        SessionError: "Invalid answers (all errors in the message)"
+    """
+
+    def __init__(self, inventory, plan, root=None, **answers):
+        """Validate the answers and set the session parameters."""
+        from .questioner.answers import answers_manager
+
+        if not isinstance(plan, PartitionPlan):
+            raise SessionError('plan: PartitionPlan required')
+
+        self.inventory = inventory
+        self.answers = dict(answers, **plan.answers())
+        context = Context(inventory, root=root)
+        self.root = str(context.root)
+
+        with api_errors(SessionError):
+            context.user = answers_manager(context, self.answers)
+            session_parameters(context)
+
+        self.user = context.user
+
+    @property
+    def username(self):
+        """String of the user name."""
+        return self.user['username']
+
+    @property
+    def hostname(self):
+        """String of the host name."""
+        return self.user['hostname']
+
+
+class Installer:
+    """Installation of a session on its target root.
+
+    Arguments
+    ---------
+        session: "Session of the installation"
+
+    Keyword Arguments
+    -----------------
+        `root`: "String of the target root folder" (default: root of
+                 the session)
+
+    Submodules
+    ----------
+        journal: modules/journal.py
+        `install_system`: "Partition, mount and install"
+        `rebase_mountpoints`: "Move the mountpoints to another root"
+    """
+
+    def __init__(self, session, root=None):
+        """Prepare the installation (the session is not modified)."""
+        self.session = session
+        self.context = Context(session.inventory,
+                               user=copy.deepcopy(session.user),
+                               root=session.root if root is None else root)
+
+        if str(self.context.root) != session.root:
+            self.context.user = self.context.user.replace(
+                partitions=rebase_mountpoints(
+                    self.context.user['partitions'], session.root,
+                    self.context.root))
+
+    def run(self):
+        """Run the installation (journal, partitioner and installer).
+
+        Raises
+        ------
+            CommandError: "Error of a shell command"
+            PyArchbootError: "Error of the installation"
+
+        Returns
+        -------
+            "UserSession record of the installed system"
+        """
+        from .journal import new_journal
+
+        os.makedirs(LOGS, exist_ok=True)
+        with api_errors():
+            new_journal(self.context)
+            install_system(self.context)
+
+        return self.context.user
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
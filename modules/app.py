@@ -16,7 +16,9 @@ limitations under the License.
 """
 
 import argparse
-import gettext
+import functools
+import os
+import struct
 import time
 from shlex import quote
 
@@ -68,6 +70,19 @@ def app_helper(self):
         lang: "Installer language selection"
         keyboard: "Keyboard layout selection"
         file: "Install additional packages from file"
+        config: "Unattended install from an answers file"
+        aur_cache: "Pre-built AUR packages folder"
+        fleet: "Install many targets from a manifest file"
+        root: "Target root folder of the installation"
+        image: "Build a disk image instead of installing on a drive"
+        image_size: "Size of a new disk image"
+        image_format: "Format of the built disk image"
+        deploy: "Deploy a disk image to a drive"
+        resume: "Resume an interrupted installation"
+        reconfigure: "Reapply the changed settings of an installed system"
+        startup_profile: "Report import and init time per module and exit"
+        dry_run: "Print the session parameters and exit (no install)"
+        events: "Send the installation events as JSON lines (fd or socket)"
         theme: "Application theme selection"
 
     Returns
@@ -110,6 +125,68 @@ def app_helper(self):
                         metavar='{file,list,...}',
                         help='Install additional packages from file')
 
+    parser.add_argument('--config',
+                        nargs=1,
+                        metavar='{answers.json,answers.toml}',
+                        help='Unattended install from an answers file')
+
+    parser.add_argument('--aur-cache',
+                        nargs=1,
+                        metavar='{folder}',
+                        help='Pre-built AUR packages folder')
+
+    parser.add_argument('--fleet',
+                        nargs=1,
+                        metavar='{manifest.json,manifest.toml}',
+                        help='Install many targets from a manifest file')
+
+    parser.add_argument('--root',
+                        nargs=1,
+                        metavar='{folder}',
+                        help='Target root folder (default: /mnt)')
+
+    parser.add_argument('--image',
+                        nargs=1,
+                        metavar='{image.raw}',
+                        help='Build a disk image instead of a drive install')
+
+    parser.add_argument('--image-size',
+                        nargs=1,
+                        metavar='{size}',
+                        help='Size of a new disk image (default: 8G)')
+
+    parser.add_argument('--image-format',
+                        nargs=1,
+                        choices=['raw', 'zst', 'qcow2'],
+                        help='Format of the built disk image (default: raw)')
+
+    parser.add_argument('--deploy',
+                        nargs=2,
+                        metavar=('{image}', '{drive}'),
+                        help='Deploy a disk image to a drive')
+
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='Resume an interrupted installation')
+
+    parser.add_argument('--reconfigure',
+                        nargs=1,
+                        metavar='{username.json}',
+                        help='Reapply the changed settings of a session')
+
+    parser.add_argument('--startup-profile',
+                        action='store_true',
+                        help='Report import and init time and exit')
+
+    parser.add_argument('--dry-run',
+                        action='store_true',
+                        help='Print the session parameters and exit')
+
+    parser.add_argument('--events',
+                        nargs=1,
+                        metavar='{fd:N,unix:path}',
+                        help='Send the events as JSON lines to a fd or socket')
+
     parser.add_argument('--theme',
                         nargs=1,
                         choices=['default', 'bacon', 'matrix', 'snow'],
@@ -134,29 +211,87 @@ def app_helper(self):
     return options
 
 
+@functools.lru_cache(maxsize=None)
+def load_catalog(lang):
+    """Load a compiled translation catalog (.mo) into a dictionary.
+
+    Catalogs are read once, the translation is a dictionary lookup
+    (no gettext object and fallback chain at each call).
+
+    Arguments
+    ---------
+        lang: "String containing the catalog language (e.q., fr)"
+
+    Modules
+    -------
+        functools: "Higher-order functions (cached loading)"
+        struct: "Interpret bytes as packed binary data"
+
+    Returns
+    -------
+        "Dictionary of the translations (None without catalog)"
+    """
+    catalog = os.path.join('locales', lang, 'LC_MESSAGES', 'PyArchboot.mo')
+    try:
+        with open(catalog, 'rb') as file:
+            data = file.read()
+
+    except OSError:
+        return None
+
+    # Header: magic, revision, number of strings, tables offsets
+    for order in ['<', '>']:
+        magic, _, count, originals, translations = struct.unpack_from(
+            '{order}5I'.format(order=order), data)
+        if magic == 0x950412de:
+            break
+    else:
+        return None
+
+    messages = {}
+    for index in range(count):
+        length, offset = struct.unpack_from(
+            '{order}2I'.format(order=order), data, originals + index * 8)
+        msgid = data[offset:offset + length].decode('utf-8')
+        length, offset = struct.unpack_from(
+            '{order}2I'.format(order=order), data, translations + index * 8)
+        msgstr = data[offset:offset + length].decode('utf-8')
+
+        # Skip the metadata, keep the singular form of plurals
+        if msgid != '':
+            messages[msgid.split('\x00')[0]] = msgstr.split('\x00')[0]
+
+    return messages
+
+
 def app_translator(lang):
     """Localization of the application.
 
+    Languages without catalog (e.q., the country of a public IP outside
+    en/fr) fall back to English.
+
     Arguments
     ---------
         lang: "String containing application language"
 
-    Modules
-    -------
-        gettext: "Internationalization and localization support"
+    Submodules
+    ----------
+        `load_catalog`: "Compiled translation catalog (.mo)"
 
     Returns
     -------
         trad: "Function to translate string"
     """
-    language = gettext.translation('PyArchboot',
-                                   localedir='locales',
-                                   languages=['{lang}'.format(lang=lang)])
-    trad = language.gettext
+    messages = load_catalog(lang.lower()) or load_catalog('en') or {}
+
+    def trad(message):
+        """Translate a string (the string itself if not translated)."""
+        return messages.get(message, message)
+
     return trad
 
 
-def app_reboot():
+def app_reboot(self):
     """Umount the partitions and reboot the system.
 
     Modules
@@ -171,11 +306,11 @@ def app_reboot():
 
     Actions:
     --------
-        umount -f -R -q /mnt
+        umount -f -R -q {root}
         reboot
     """
     # Umount the partitions
-    run_command('umount -f -R -q /mnt')
+    run_command('umount -f -R -q {root}'.format(root=quote(str(self.root))))
 
     # Reboot with 5s timeout
     for second in range(5, 0, -1):
@@ -0,0 +1,553 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import errno
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from shlex import quote
+
+from .system_manager.unix_command import command_output, run_command
+
+# Copy buffer (multiple of the sector and page sizes)
+DEPLOY_BUFFER = 4 * 1024 ** 2
+
+
+def data_extents(fd, size):
+    """Get the data regions of a sparse file (holes are skipped).
+
+    Arguments
+    ---------
+        fd: "File descriptor of the image"
+        size: "Integer of the image size"
+
+    Modules
+    -------
+        os: "Export all functions from posix" (SEEK_DATA, SEEK_HOLE)
+
+    Yields
+    ------
+        offset, length: "Integers of a data region"
+    """
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as error:
+            if error.errno == errno.ENXIO:
+                return
+            # No sparse map (e.q., some network filesystems)
+            yield offset, size - offset
+            return
+
+        end = os.lseek(fd, start, os.SEEK_HOLE)
+        yield start, end - start
+        offset = end
+
+
+def copy_extent(source, target, offset, length, method):
+    """Copy a data region at the same offset of the target.
+
+    `copy_file_range` is tried first, then `sendfile`, then aligned reads
+    and writes. The method that works is returned for the next regions.
+
+    Arguments
+    ---------
+        source: "File descriptor of the image"
+        target: "File descriptor of the drive"
+        offset: "Integer of the region offset"
+        length: "Integer of the region length"
+        method: "String of the copy method"
+
+    Returns
+    -------
+        "String of the copy method"
+    """
+    end = offset + length
+    while offset < end:
+        count = min(DEPLOY_BUFFER, end - offset)
+        try:
+            if method == 'copy_file_range':
+                copied = os.copy_file_range(source, target, count,
+                                            offset, offset)
+            elif method == 'sendfile':
+                os.lseek(target, offset, os.SEEK_SET)
+                copied = os.sendfile(target, source, offset, count)
+            else:
+                copied = os.pwrite(target, os.pread(source, count, offset),
+                                   offset)
+
+        except (AttributeError, OSError) as error:
+            if method == 'buffer' or (isinstance(error, OSError) and
+                                      error.errno not in [errno.EINVAL,
+                                                          errno.EXDEV,
+                                                          errno.ENOSYS,
+                                                          errno.EOPNOTSUPP]):
+                raise
+            method = 'sendfile' if method == 'copy_file_range' else 'buffer'
+            continue
+
+        if copied == 0:
+            break
+        offset += copied
+
+    return method
+
+
+def zero_extent(target, offset, length):
+    """Write zeroes to a region of the target (hole of the image).
+
+    Arguments
+    ---------
+        target: "File descriptor of the drive"
+        offset: "Integer of the region offset"
+        length: "Integer of the region length"
+    """
+    zeroes = bytes(min(DEPLOY_BUFFER, length))
+    end = offset + length
+    while offset < end:
+        offset += os.pwrite(target, zeroes[:end - offset], offset)
+
+
+def drive_queue(drive, name):
+    """Get a queue setting of the drive (sysfs).
+
+    Arguments
+    ---------
+        drive: "String containing the target drive"
+        name: "String containing the setting (e.q., discard_max_bytes)"
+
+    Modules
+    -------
+        os: "Export all functions from posix"
+
+    Returns
+    -------
+        "Integer of the setting (0 if not reported)"
+    """
+    queue = '/sys/class/block/{device}/queue/{name}'.format(
+        device=os.path.basename(os.path.realpath(drive)), name=name)
+    try:
+        with open(queue, 'r', encoding='utf-8') as file:
+            return int(file.read().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def zero_drive(self, drive):
+    """Zero the drive before the image is written (offloaded only).
+
+    Blocks are zeroed by the device (write zeroes) or discarded when
+    the device reports that discarded blocks read back as zeroes. Else
+    the holes of the image are written by `stream_image`.
+
+    Arguments
+    ---------
+        drive: "String containing the target drive"
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+
+    Submodules
+    ----------
+        `drive_queue`: "Get a queue setting of the drive"
+        `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        blkdiscard -f -z {drive} "(write zeroes)"
+        blkdiscard -f {drive} "(discard zeroes data)"
+
+    Returns
+    -------
+        "Boolean of the zeroed drive"
+    """
+    if drive_queue(drive, 'write_zeroes_max_bytes') > 0:
+        cmd = 'blkdiscard -f -z {drive}'
+    elif (drive_queue(drive, 'discard_max_bytes') > 0) and \
+            (drive_queue(drive, 'discard_zeroes_data') == 1):
+        cmd = 'blkdiscard -f {drive}'
+    else:
+        return False
+
+    if run_command(cmd.format(drive=quote(drive))) != 0:
+        return False
+
+    logging.info(self.trad('{drive} zeroed').format(drive=drive))
+    return True
+
+
+def stream_image(self, image, drive, layout, zeroed=False):
+    """Write the image to the drive (only the used bytes of raw images).
+
+    The holes of raw images are written as zeroes when the drive is not
+    zeroed (old data would be left in the deployed filesystems).
+
+    Arguments
+    ---------
+        image: "String containing the path of the image"
+        drive: "String containing the target drive"
+        layout: "Dictionary containing the layout of the image"
+
+    Keyword Arguments
+    -----------------
+        `zeroed`: "Boolean of the zeroed drive" (default: False)
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        os: "Export all functions from posix"
+        time: "Various functions to manipulate time values"
+
+    Submodules
+    ----------
+        `data_extents`: "Get the data regions of a sparse file"
+        `copy_extent`: "Copy a data region at the same offset"
+        `zero_extent`: "Write zeroes to a region of the target"
+        `command_output`: "Subprocess `check_output` with return codes"
+
+    Actions
+    -------
+        zstd -d -c {image} > {drive} "(zst)"
+        qemu-img convert -n -O raw {image} {drive} "(qcow2)"
+    """
+    started = time.monotonic()
+
+    if layout['format'] == 'zst':
+        command_output('zstd -d -c {image} > {drive}'.format(
+            image=quote(image), drive=quote(drive)), exit_on_error=True)
+
+    elif layout['format'] == 'qcow2':
+        command_output('qemu-img convert -n -O raw {image} {drive}'.format(
+            image=quote(image), drive=quote(drive)), exit_on_error=True)
+
+    else:
+        source = os.open(image, os.O_RDONLY)
+        target = os.open(drive, os.O_WRONLY)
+        try:
+            size = os.fstat(source).st_size
+            method, written, position = 'copy_file_range', 0, 0
+            for offset, length in data_extents(source, size):
+                if zeroed is False:
+                    zero_extent(target, position, offset - position)
+                method = copy_extent(source, target, offset, length, method)
+                written += length
+                position = offset + length
+
+            if zeroed is False:
+                zero_extent(target, position, size - position)
+
+            os.fsync(target)
+        finally:
+            os.close(source)
+            os.close(target)
+
+        logging.info(self.trad('{written}M of {size}M written [{method}]')
+                     .format(written=written // 1024 ** 2,
+                             size=size // 1024 ** 2, method=method))
+
+    logging.info(self.trad('image written in {seconds}s')
+                 .format(seconds=round(time.monotonic() - started, 1)))
+
+
+def deploy_partitions(drive):
+    """Get the partitions of the deployed drive.
+
+    Arguments
+    ---------
+        drive: "String containing the target drive"
+
+    Submodules
+    ----------
+        `command_output`: "Subprocess `check_output` with return codes"
+
+    Returns
+    -------
+        "Array containing the partitions"
+    """
+    output = command_output('lsblk -p -l -n -o NAME,TYPE {drive}'.format(
+        drive=quote(drive)), exit_on_error=True)
+
+    return [line.split()[0] for line in output.split('\n')
+            if line.split()[1:2] == ['part']]
+
+
+def layout_volumes(layout):
+    """Get the LVM volume group and LUKS mapper names of an image.
+
+    Arguments
+    ---------
+        layout: "Dictionary containing the layout of the image"
+
+    Returns
+    -------
+        "Tuple of the volume group and mapper (lvm, cryptlvm if unset)"
+    """
+    return (layout.get('volume_group') or 'lvm',
+            layout.get('mapper') or 'cryptlvm')
+
+
+def grow_partitions(self, drive, layout):
+    """Grow the last partition (or LVM volume) to fill the drive.
+
+    Arguments
+    ---------
+        drive: "String containing the target drive"
+        layout: "Dictionary containing the layout of the image"
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+        `deploy_partitions`: "Get the partitions of the deployed drive"
+
+    Actions
+    -------
+        sgdisk -e {drive} "(GPT backup header at the end of the drive)"
+        blockdev "--rereadpt" {drive}
+        sfdisk -N {last} {drive} "(grow the last partition)"
+        pvresize {partition} "(LVM)"
+        lvextend -r -l +100%FREE {volume_group}/{volume} "(LVM)"
+        resize2fs {partition} "(ext4)"
+
+    Returns
+    -------
+        "Array containing the partitions"
+    """
+    logging.info(self.trad('grow the last partition of {drive}')
+                 .format(drive=drive))
+
+    if layout['table'] == 'gpt':
+        run_command('sgdisk -e {drive}'.format(drive=quote(drive)))
+    run_command('blockdev --rereadpt {drive}'.format(drive=quote(drive)))
+    run_command('udevadm settle')
+
+    partitions = deploy_partitions(drive)
+    run_command('sfdisk -f -q -N {number} {drive}'.format(
+        number=len(partitions), drive=quote(drive)),
+        args=['/usr/bin/printf', ', +'])
+    run_command('partx -u {drive}'.format(drive=quote(drive)))
+    run_command('udevadm settle')
+
+    last = layout['partitions'][-1]
+    if layout['lvm'] is True:
+        volume_group, mapper = layout_volumes(layout)
+        volume = partitions[-1]
+        if layout['luks'] is True:
+            run_command('cryptsetup open {id} {mapper}'.format(
+                id=quote(volume), mapper=mapper), exit_on_error=True)
+            run_command('cryptsetup resize {mapper}'.format(mapper=mapper))
+            volume = '/dev/mapper/{mapper}'.format(mapper=mapper)
+
+        cmd_list = ['pvresize {id}'.format(id=quote(volume)),
+                    'vgchange -a y {vg}'.format(vg=volume_group),
+                    'lvextend -r -l +100%FREE {vg}/{name}'.format(
+                        vg=volume_group, name=last['name'])]
+    else:
+        cmd_list = ['e2fsck -f -p {id}'.format(id=quote(partitions[-1])),
+                    'resize2fs {id}'.format(id=quote(partitions[-1]))]
+        if last['filesystem'] != 'ext4':
+            cmd_list = []
+
+    for cmd in cmd_list:
+        run_command(cmd)
+
+    return partitions
+
+
+def regenerate_system(self, drive, layout, partitions, hostname):
+    """Make the deployed system unique (PARTUUID, machine-id, hostname).
+
+    Arguments
+    ---------
+        drive: "String containing the target drive"
+        layout: "Dictionary containing the layout of the image"
+        partitions: "Array containing the partitions of the drive"
+        hostname: "String containing the hostname (None to keep it)"
+
+    Modules
+    -------
+        glob: "Unix style pathname pattern expansion"
+        os: "Export all functions from posix"
+
+    Submodules
+    ----------
+        `command_output`: "Subprocess `check_output` with return codes"
+        `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        sgdisk -G {drive} "(GPT: new disk and partition GUIDs)"
+        sfdisk "--disk-id" {drive} {id} "(MBR: new disk identifier)"
+        mount {root} {boot}
+        "Replace PARTUUID:" {root}/boot/loader/entries/*.conf
+        "Replace PARTUUID:" {root}/etc/default/grub {root}/boot/grub/grub.cfg
+        systemd-machine-id-setup "--root" {root}
+        "Write {hostname}:" {root}/etc/hostname
+        genfstab -U {root} > {root}/etc/fstab
+        umount -R {root}
+    """
+    logging.info(self.trad('regenerate machine specific settings'))
+
+    # New PARTUUIDs
+    if layout['table'] == 'gpt':
+        run_command('sgdisk -G {drive}'.format(drive=quote(drive)))
+    else:
+        run_command('sfdisk --disk-id {drive} 0x{id}'.format(
+            drive=quote(drive), id=os.urandom(4).hex()))
+    run_command('partx -u {drive}'.format(drive=quote(drive)))
+    run_command('udevadm settle')
+
+    partuuid = {}
+    for old, partition in zip(layout['partuuid'], partitions):
+        new = command_output('blkid -o value -s PARTUUID {id}'.format(
+            id=quote(partition)))
+        if new is not False and new.strip():
+            partuuid[old] = new.strip()
+
+    # Mount the deployed system
+    names = [partition['name'] for partition in layout['partitions']]
+    volume_group = layout_volumes(layout)[0]
+    if layout['lvm'] is True:
+        root = '/dev/{vg}/root'.format(vg=volume_group)
+    else:
+        root = partitions[names.index('root')]
+
+    os.makedirs(str(self.root), exist_ok=True)
+    run_command('mount {id} {root}'.format(id=quote(root),
+                                          root=quote(str(self.root))),
+                exit_on_error=True)
+    os.makedirs(self.root.join('boot'), exist_ok=True)
+    run_command('mount {id} {boot}'.format(id=quote(partitions[0]),
+                                          boot=quote(self.root.join('boot'))),
+                exit_on_error=True)
+
+    if 'home' in names:
+        home = '/dev/{vg}/home'.format(vg=volume_group) \
+            if layout['lvm'] is True else partitions[names.index('home')]
+        run_command('mount {id} {home}'.format(
+            id=quote(home), home=quote(self.root.join('home'))))
+
+    # Boot entries and bootloader configuration
+    for config in glob.glob(self.root.join('boot/loader/entries/*.conf')) + \
+            [self.root.join('etc/default/grub'),
+             self.root.join('boot/grub/grub.cfg')]:
+        if os.path.isfile(config):
+            with open(config, 'r') as file:
+                content = file.read()
+            for old, new in partuuid.items():
+                content = content.replace(old, new)
+            with open(config, 'w') as file:
+                file.write(content)
+
+    # Machine ID and hostname
+    machine_id = self.root.join('etc/machine-id')
+    if os.path.exists(machine_id):
+        os.remove(machine_id)
+    run_command('systemd-machine-id-setup --root={root}'.format(
+        root=quote(str(self.root))))
+
+    if hostname is not None:
+        with open(self.root.join('etc/hostname'), 'w+') as file:
+            file.write('{hostname}\n'.format(hostname=hostname))
+
+    # File system table (swap entries are not mounted, so they are kept)
+    with open(self.root.join('etc/fstab'), 'r') as fstab:
+        swap = [line for line in fstab if not line.startswith('#') and
+                (line.split()[2:3] == ['swap'])]
+    fstab = command_output('genfstab -U -p {root}'.format(
+        root=quote(str(self.root))), exit_on_error=True)
+    with open(self.root.join('etc/fstab'), 'w+') as file:
+        file.write(fstab)
+        for line in swap:
+            file.write(line)
+
+    run_command('umount -R {root}'.format(root=quote(str(self.root))))
+
+
+def deploy_manager(self, image, drive, hostname=None):
+    """Deploy a PyArchboot image to a drive.
+
+    The drive is zeroed (or the holes of raw images are written), then
+    the image is written, the last partition is grown and the machine
+    specific settings regenerated.
+
+    Arguments
+    ---------
+        image: "String containing the path of the image"
+        drive: "String containing the target drive"
+
+    Keyword Arguments
+    -----------------
+        `hostname`: "String containing the new hostname" (default: None)
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        sys: "Access to some objects used or maintained by the interpreter"
+
+    Submodules
+    ----------
+        `zero_drive`: "Zero the drive before the image is written"
+        `stream_image`: "Write the image to the drive"
+        `grow_partitions`: "Grow the last partition to fill the drive"
+        `regenerate_system`: "Make the deployed system unique"
+
+    Actions
+    -------
+        wipefs -f -a {drive}
+    """
+    try:
+        with open('{image}.json'.format(image=image), 'r',
+                  encoding='utf-8') as file:
+            layout = json.load(file)
+    except (OSError, ValueError) as layout_error:
+        logging.error(self.trad('invalid image layout: {error}')
+                      .format(error=layout_error))
+        sys.exit(1)
+
+    size = command_output('lsblk -b -d -n -o SIZE {drive}'.format(
+        drive=quote(drive)), exit_on_error=True,
+        error=self.trad('No drive detected !'))
+    if int(size.strip()) < layout['bytes']:
+        logging.error(self.trad('{drive} is smaller than the image')
+                      .format(drive=drive))
+        sys.exit(1)
+
+    logging.info(self.trad('deploy {image} on {drive}')
+                 .format(image=image, drive=drive))
+
+    run_command('wipefs -f -a {drive}'.format(drive=quote(drive)))
+    zeroed = zero_drive(self, drive)
+    stream_image(self, image, drive, layout, zeroed=zeroed)
+    partitions = grow_partitions(self, drive, layout)
+    regenerate_system(self, drive, layout, partitions, hostname)
+
+    volume_group, mapper = layout_volumes(layout)
+    if layout['lvm'] is True:
+        run_command('vgchange -a n {vg}'.format(vg=volume_group))
+    if layout['luks'] is True:
+        run_command('cryptsetup close {mapper}'.format(mapper=mapper))
+
+    logging.info(self.trad('deployment successful'))
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import STDOUT, run
+
+from .image import attach_image, detach_image
+from .journal import journal_completed
+from .questioner.answers import load_answers
+from .system_manager.unix_command import LOGS, run_command
+
+# Answers not substituted (passwords are used as given)
+FLEET_SECRETS = ['user_passwd', 'root_passwd']
+
+
+def fleet_substitutions(value, variables):
+    """Replace the target variables in the answers ({name}, {index}...).
+
+    Only the variables of the target are replaced, other braces are kept
+    as given (e.q., a brace in a password or in a shell command).
+
+    Arguments
+    ---------
+        value: "Answer of the answers file (string, list or dictionary)"
+        variables: "Dictionary containing the target variables"
+
+    Modules
+    -------
+        re: "Regular expression matching operations"
+
+    Returns
+    -------
+        "The answer with the substituted variables"
+    """
+    if isinstance(value, str):
+        return re.sub(r'\{(\w+)\}',
+                      lambda match: str(variables[match.group(1)])
+                      if match.group(1) in variables else match.group(0),
+                      value)
+
+    if isinstance(value, list):
+        return [fleet_substitutions(item, variables) for item in value]
+
+    if isinstance(value, dict):
+        return {key: fleet_substitutions(item, variables)
+                for key, item in value.items()}
+
+    return value
+
+
+def attach_target(target):
+    """Get the block device of a target (image files are attached).
+
+    Arguments
+    ---------
+        target: "Dictionary containing the target of the manifest"
+
+    Submodules
+    ----------
+        `attach_image`: "Attach an image file to a loop device"
+
+    Returns
+    -------
+        device, loop: "String of the block device, True if loop device"
+    """
+    if target['device'].startswith('/dev/'):
+        return target['device'], False
+
+    return attach_image(target['device'], target.get('size', '8G')), True
+
+
+def fleet_prefetch(self, targets):
+    """Download the packages shared by all targets once to the host cache.
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        pacman "--noconfirm" -Syw {base} {kernels} {network}
+    """
+    packages = [self.packages['base'], self.packages['firmware'],
+                self.packages['network']]
+
+    kernels = set()
+    for target in targets:
+        for kernel in target['answers'].get('kernel', [0, 2]):
+            if isinstance(kernel, int):
+                kernels.add(self.packages['kernel'][kernel])
+            elif kernel in self.packages['kernel']:
+                kernels.add(kernel)
+    packages += sorted(kernels)
+
+    logging.info(self.trad('download shared packages of the fleet'))
+    run_command('pacman --noconfirm -Syw {packages}'.format(
+        packages=' '.join(packages)))
+
+
+def fleet_install(target, options, environment):
+    """Run the unattended install of one target in its own mount namespace.
+
+    Arguments
+    ---------
+        target: "Dictionary containing the prepared target"
+        options: "Array of the command line options given to the children"
+        environment: "Dictionary containing the environment of the process"
+
+    Modules
+    -------
+        subprocess: "Connect to input/output/error pipes and obtain return"
+
+    Submodules
+    ----------
+        `journal_completed`: "Check the journal of another installation"
+
+    Returns
+    -------
+        "Integer of the exit code of the install (1 if not completed)"
+    """
+    # Journal of a previous install of the target
+    journal = os.path.join(target['logs'], 'journal.json')
+    if os.path.exists(journal):
+        os.remove(journal)
+
+    cmd = ['unshare', '--mount', '--propagation', 'private', '--',
+           sys.executable, 'PyArchboot.py', '--config', target['answers_file'],
+           '--root', target['root']]
+    cmd += options
+
+    env = dict(environment, PYARCHBOOT_LOGS=target['logs'],
+               PYARCHBOOT_DRIVE=target['answers']['drive'])
+    with open(os.path.join(target['logs'], 'console.log'), 'w') as console:
+        process = run(cmd, stdout=console, stderr=STDOUT, env=env,
+                      check=False)
+
+    # Exit code 0 without a completed journal (e.q., confirm is false)
+    if process.returncode == 0 and not journal_completed(target['logs']):
+        return 1
+
+    return process.returncode
+
+
+def fleet_manager(self, manifest):
+    """Install many targets concurrently from a manifest.
+
+    Each target is installed by its own PyArchboot process (unattended
+    mode) in a private mount namespace, under its own target root
+    ({root}/{name}). An install is successful when its journal is
+    completed (logs/fleet/{name}/journal.json). Shared packages are
+    downloaded once and the number of concurrent pacstraps is bounded.
+
+    Arguments
+    ---------
+        manifest: "String containing the path of the manifest file"
+
+    Modules
+    -------
+        concurrent.futures: "Launching parallel tasks"
+        json: "JavaScript syntax data interchange format"
+        logging: "Event logging system for applications and libraries"
+        os: "Export all functions from posix"
+
+    Submodules
+    ----------
+        `load_answers`: "Answers file parser (JSON or TOML)"
+        `fleet_substitutions`: "Replace the target variables in the answers"
+        `attach_target`: "Attach a target image file to a loop device"
+        `fleet_prefetch`: "Download the shared packages once"
+        `fleet_install`: "Run the unattended install of one target"
+
+    Returns
+    -------
+        "Integer of the number of failed installs"
+    """
+    manifest = load_answers(manifest)
+    folder = os.path.join(LOGS, 'fleet')
+    locks = os.path.join(folder, '.locks')
+    private = os.path.join(folder, '.answers')
+    os.makedirs(locks, exist_ok=True)
+    os.makedirs(private, mode=0o700, exist_ok=True)
+
+    targets, failed = [], 0
+    try:
+        for index, target in enumerate(manifest['targets']):
+            name = target.get('name', 'target-{index}'.format(index=index))
+            logs = os.path.join(folder, name)
+            os.makedirs(logs, exist_ok=True)
+
+            variables = dict(target.get('variables', {}),
+                             name=name, index=index, device=target['device'])
+            answers = dict(manifest.get('answers', {}))
+            answers.update(target.get('answers', {}))
+            answers = {key: value if key in FLEET_SECRETS else
+                       fleet_substitutions(value, variables)
+                       for key, value in answers.items()}
+            answers['drive'], loop = attach_target(target)
+            answers['reboot'] = False
+
+            answers_file = os.path.join(private,
+                                        '{name}.json'.format(name=name))
+            targets.append({'name': name, 'logs': logs, 'answers': answers,
+                            'answers_file': answers_file, 'loop': loop,
+                            'root': self.root.join(name)})
+
+            # Answers contain passwords (not copied with the target logs)
+            with open(os.open(answers_file,
+                              os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600),
+                      'w', encoding='utf-8') as file:
+                json.dump(answers, file, ensure_ascii=False, indent=4)
+
+        fleet_prefetch(self, targets)
+
+        environment = dict(
+            os.environ, PYARCHBOOT_LOCKS=locks,
+            PYARCHBOOT_PACSTRAP_SLOTS=str(manifest.get('pacstrap', 2)))
+
+        # Forward the command line options (except --fleet, --config, --root)
+        options, skip = [], False
+        for option in sys.argv[1:]:
+            if skip is True:
+                skip = False
+            elif option in ['--fleet', '--config', '--root']:
+                skip = True
+            elif not option.startswith(('--fleet=', '--config=', '--root=')):
+                options.append(option)
+
+        workers = manifest.get('concurrency', 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for target in targets:
+                logging.info(self.trad('start install of {name} [{drive}]')
+                             .format(name=target['name'],
+                                     drive=target['answers']['drive']))
+                futures[target['name']] = executor.submit(
+                    fleet_install, target, options, environment)
+
+            for name, future in futures.items():
+                code = future.result()
+                if code == 0:
+                    logging.info(self.trad('install of {name} successful')
+                                 .format(name=name))
+                else:
+                    failed += 1
+                    logging.error(self.trad(
+                        'install of {name} failed [{code}], see {logs}')
+                        .format(name=name, code=code,
+                                logs=os.path.join(folder, name,
+                                                  'console.log')))
+
+    # Detach image files and remove the answers (passwords), on error too
+    finally:
+        for target in targets:
+            if target['loop'] is True:
+                detach_image(target['answers']['drive'])
+            if os.path.exists(target['answers_file']):
+                os.remove(target['answers_file'])
+
+    return failed
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import logging
+import os
+import shutil
+from shlex import quote
+
+from .system_manager.model import Drive
+from .system_manager.unix_command import command_output, run_command
+
+
+def attach_image(image, size):
+    """Attach an image file to a loop device (sparse file created if needed).
+
+    Arguments
+    ---------
+        image: "String containing the path of the image file"
+        size: "String containing the size of a new image (e.q., 8G)"
+
+    Submodules
+    ----------
+        `command_output`: "Subprocess `check_output` with return codes"
+
+    Actions
+    -------
+        truncate -s {size} {image}
+        losetup -P --find --show {image}
+
+    Returns
+    -------
+        "String containing the loop device"
+    """
+    if not os.path.exists(image):
+        command_output('truncate -s {size} {image}'.format(
+            size=quote(size), image=quote(image)),
+            exit_on_error=True,
+            error='can not create image {image}'.format(image=image))
+
+    loop = command_output('losetup -P --find --show {image}'.format(
+        image=quote(image)), exit_on_error=True,
+        error='can not attach image {image}'.format(image=image))
+
+    return loop.strip()
+
+
+def detach_image(loop):
+    """Detach a loop device.
+
+    Arguments
+    ---------
+        loop: "String containing the loop device"
+
+    Actions
+    -------
+        losetup -d {loop}
+    """
+    run_command('losetup -d {loop}'.format(loop=quote(loop)))
+
+
+def image_layout(self):
+    """Get the layout of the image (stored next to the image).
+
+    The layout is used to deploy the image (last partition to grow,
+    partitions to update) without probing it again.
+
+    Returns
+    -------
+        "Dictionary containing the layout of the image"
+    """
+    layout = {'format': 'raw',
+              'size': self.image['size'],
+              'bytes': os.path.getsize(self.image['file']),
+              'table': self.user['drive']['table'],
+              'firmware': self.system['firmware'],
+              'bootloader': 'grub',
+              'lvm': self.user['drive']['volume_group'] is not None,
+              'luks': self.user['drive']['luks'],
+              'volume_group': self.user['drive']['volume_group'],
+              'mapper': self.user['drive']['mapper'],
+              'kernel': self.user['kernel'],
+              'hostname': self.user['hostname'],
+              'partuuid': [partition.partuuid
+                           for partition in self.user['partitions']
+                           if partition.partuuid is not None],
+              'partitions': []}
+
+    if (self.user['firmware']['type'] == 'uefi') and \
+            (self.user['firmware']['version'] == 'x64'):
+        layout['bootloader'] = 'systemd-boot'
+
+    for name, filesystem, mountpoint in [
+            (partition.name, partition.filesystem, partition.mountpoint)
+            for partition in self.user['partitions']]:
+
+        # Mountpoints of the installed system (none for the LVM volume)
+        if mountpoint not in [None, 'swap']:
+            mountpoint = os.path.normpath(os.path.join(
+                '/', os.path.relpath(mountpoint, str(self.root))))
+
+        layout['partitions'].append({'name': name,
+                                     'filesystem': filesystem,
+                                     'mountpoint': mountpoint})
+
+    return layout
+
+
+def release_image(self):
+    """Unmount and detach the image (once, also after a failed install).
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+        `detach_image`: "Detach a loop device"
+
+    Actions
+    -------
+        swapoff {swap}
+        umount -R {root}
+        vgchange -a n {volume_group} "(LVM)"
+        cryptsetup close {mapper} "(LUKS)"
+        losetup -d {loop}
+    """
+    if self.image['loop'] is None:
+        return
+
+    logging.info(self.trad('detach image {image} [{loop}]')
+                 .format(image=self.image['file'], loop=self.image['loop']))
+
+    # Session parameters are not set before the questions are answered
+    drive = (self.user or {}).get('drive')
+    if isinstance(drive, Drive):
+        for partition in self.user['partitions']:
+            if (partition.name == 'swap') and \
+                    (partition.drive_id is not None):
+                run_command('swapoff {id}'.format(
+                    id=quote(partition.drive_id)))
+
+        run_command('umount -R {root}'.format(root=quote(str(self.root))))
+        if drive['volume_group'] is not None:
+            run_command('vgchange -a n {vg}'.format(
+                vg=drive['volume_group']))
+        if drive['luks'] is True:
+            run_command('cryptsetup close {mapper}'.format(
+                mapper=drive['mapper']))
+
+    detach_image(self.image['loop'])
+    self.image['loop'] = None
+
+
+def image_manager(self):
+    """Detach the built image and convert or compress it.
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        logging: "Event logging system for applications and libraries"
+        shutil: "High-level file operations"
+
+    Submodules
+    ----------
+        `command_output`: "Subprocess `check_output` with return codes"
+        `run_command`: "Subprocess Popen with console output"
+        `image_layout`: "Get the layout of the image"
+        `release_image`: "Unmount and detach the image"
+
+    Actions
+    -------
+        zstd -T0 --rm {image} "(zst)"
+        qemu-img convert -O qcow2 {image} {image}.qcow2 "(qcow2)"
+        "Write {layout}:" {image}.json
+
+    Returns
+    -------
+        "String containing the path of the final image"
+    """
+    image = self.image['file']
+    layout = image_layout(self)
+    release_image(self)
+
+    # Compress or convert the image
+    if self.image['format'] == 'zst':
+        logging.info(self.trad('compress image {image}').format(image=image))
+        command_output('zstd -T0 -q -f --rm {image}'.format(
+            image=quote(image)), exit_on_error=True)
+        image = '{image}.zst'.format(image=image)
+        layout['format'] = 'zst'
+
+    elif self.image['format'] == 'qcow2':
+        if shutil.which('qemu-img') is None:
+            logging.warning(self.trad('qemu-img not found, raw image kept'))
+        else:
+            logging.info(self.trad('convert image {image} to qcow2')
+                         .format(image=image))
+            output = '{image}.qcow2'.format(image=os.path.splitext(image)[0])
+            command_output('qemu-img convert -O qcow2 {image} {output}'
+                           .format(image=quote(image), output=quote(output)),
+                           exit_on_error=True)
+            os.remove(image)
+            image = output
+            layout['format'] = 'qcow2'
+
+    with open('{image}.json'.format(image=image), 'w',
+              encoding='utf-8') as file:
+        json.dump(layout, file, ensure_ascii=False, indent=4)
+
+    logging.info(self.trad('image ready: {image}').format(image=image))
+    return image
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
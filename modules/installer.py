@@ -16,11 +16,20 @@ limitations under the License.
 """
 
 import logging
+import os
 import re
+from graphlib import CycleError, TopologicalSorter
 from shlex import quote
 from shutil import copy2, copyfile, copytree, move, rmtree
 
-from .system_manager.unix_command import command_output, run_command
+from .system_manager.model import find_partition
+from .system_manager.size import ByteSize
+from .system_manager.slots import pacstrap_slot
+from .system_manager.unix_command import (LOGS, CommandError, command_output,
+                                          run_command)
+
+# Minimum memory to build AUR packages in tmpfs (/tmp is half of the RAM)
+MAKEPKG_TMPFS_MEMORY = 8 * 1024 ** 3
 
 
 def set_mirrorlist(self):
@@ -52,13 +61,16 @@ def install_base_system(self):
     Submodules
     ----------
         `run_command`: "Subprocess Popen with console output"
+        `pacstrap_slot`: "Wait for a free pacstrap slot (fleet mode)"
 
     Actions:
     --------
-        pacstrap /mnt {base}
+        pacstrap {root} {base}
+        pacstrap -c {root} {base} (fleet mode, shared host package cache)
     """
     logging.info(self.trad('install Arch Linux base system'))
-    self.packages['base'] += ' {kernel}'.format(kernel=self.user['kernel'])
+    self.packages['base'] += ' {kernels}'.format(
+        kernels=' '.join(self.user['kernel']))
 
     if self.user['firmware']['driver'] is not None:
         self.packages['base'] += ' {fw}'.format(fw=self.packages['firmware'])
@@ -66,8 +78,11 @@ def install_base_system(self):
     if self.user['aur_helper'] is not None:
         self.packages['base'] += ' {dev}'.format(dev=self.packages['devel'])
 
-    cmd = 'pacstrap /mnt {packages}'.format(packages=self.packages['base'])
-    run_command(cmd)
+    with pacstrap_slot() as slot:
+        cmd = 'pacstrap {cache}{root} {packages}'.format(
+            root=self.root, cache='-c ' if slot is not None else '',
+            packages=self.packages['base'])
+        run_command(cmd)
 
 
 def create_fstab(self):
@@ -84,15 +99,133 @@ def create_fstab(self):
 
     Actions
     -------
-        genfstab -U -p /mnt >> /mnt/etc/fstab
+        genfstab -U -p {root} > {root}/etc/fstab
     """
     logging.info(self.trad('create file system table'))
-    cmd = 'genfstab -U -p /mnt >> /mnt/etc/fstab'
-    command_output(cmd)
-    cmd = 'cat /mnt/etc/fstab'
+    cmd = 'genfstab -U -p {root} > {root}/etc/fstab'.format(root=self.root)
+    command_output(cmd, exit_on_error=True)
+    cmd = 'cat {root}/etc/fstab'.format(root=self.root)
     run_command(cmd)
 
 
+def create_swapfile(self):
+    """Create the swap file (btrfs aware) and get its resume offset.
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        re: "Regular expression matching operations"
+
+    Submodules
+    ----------
+        `command_output`: "Subprocess check_output with return codes"
+        `run_command`: "Subprocess Popen with console output"
+        `ByteSize`: "Immutable size in bytes"
+
+    Actions
+    -------
+        btrfs filesystem mkswapfile "--size" {size} {root}/swapfile "(btrfs)"
+        fallocate -l {size} {root}/swapfile "(others)"
+        mkswap {root}/swapfile "(others)"
+        "Write {swapfile}:" {root}/etc/fstab
+    """
+    if self.user['swap']['type'] == 'swapfile':
+        size = ByteSize(self.user['swap']['size'])
+        logging.info(self.trad('create swap file [{size}]')
+                     .format(size=size))
+
+        size = size.align().mib
+
+        # Partial swap file of an interrupted install
+        if os.path.exists(self.root.join('swapfile')):
+            os.remove(self.root.join('swapfile'))
+
+        filesystem = command_output('findmnt -n -o FSTYPE {root}'.format(
+            root=self.root))
+        if (filesystem is not False) and (filesystem.strip() == 'btrfs'):
+
+            # No copy-on-write swap file on btrfs
+            run_command('btrfs filesystem mkswapfile --size {size}m '
+                        '{root}/swapfile'.format(root=self.root, size=size),
+                        exit_on_error=True)
+
+            offset = command_output(
+                'btrfs inspect-internal map-swapfile -r {root}/swapfile'
+                .format(root=self.root))
+
+        else:
+            cmd_list = ['fallocate -l {size}MiB {root}/swapfile'.format(
+                            root=self.root, size=size),
+                        'chmod 600 {root}/swapfile'.format(root=self.root),
+                        'mkswap {root}/swapfile'.format(root=self.root)]
+
+            for cmd in cmd_list:
+                run_command(cmd, exit_on_error=True)
+
+            # Physical offset of the first extent
+            offset = command_output('filefrag -v {root}/swapfile'.format(
+                root=self.root))
+            if offset is not False:
+                offset = re.search(r'^\s*0:\s+\d+\.\.\s*\d+:\s+(\d+)\.\.',
+                                   offset, re.MULTILINE)
+                offset = offset.group(1) if offset is not None else False
+
+        self.user = self.user.replace(swap=self.user['swap'].replace(
+            offset=offset.strip() if offset is not False else None))
+
+        with open(self.root.join('etc/fstab'), 'r') as fstab:
+            entries = fstab.readlines()
+
+        if '/swapfile none swap defaults 0 0\n' not in entries:
+            with open(self.root.join('etc/fstab'), 'a') as fstab:
+                fstab.write('/swapfile none swap defaults 0 0\n')
+
+
+def configure_zram(self):
+    """Configure compressed swap in RAM with zram-generator.
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        arch-chroot {root} pacman "--noconfirm --needed" -S {zram}
+        "Write {zram}:" {root}/etc/systemd/zram-generator.conf
+        "Write {sysctl}:" {root}/etc/sysctl.d/99-vm-zram-parameters.conf
+    """
+    if self.user['swap']['type'] == 'zram':
+        logging.info(self.trad('configure zram [{size}]')
+                     .format(size=self.user['swap']['size']))
+
+        cmd = 'arch-chroot {root} pacman --noconfirm --needed -S {zram}'
+        cmd = cmd.format(root=self.root, zram=self.user['swap']['packages'])
+        run_command(cmd)
+
+        with open(self.root.join('etc/systemd/zram-generator.conf'),
+                  'w+') as file:
+            for line in ['[zram0]',
+                         'zram-size = {size}'.format(
+                             size=self.user['swap']['size']),
+                         'compression-algorithm = zstd',
+                         'swap-priority = 100',
+                         'fs-type = swap']:
+                file.write('{line}\n'.format(line=line))
+
+        # Swap to RAM is cheap, so prefer it over dropping the page cache
+        with open(self.root.join('etc/sysctl.d/99-vm-zram-parameters.conf'),
+                  'w+') as file:
+            for line in ['vm.swappiness = 180',
+                         'vm.watermark_boost_factor = 0',
+                         'vm.watermark_scale_factor = 125',
+                         'vm.page-cluster = 0']:
+                file.write('{line}\n'.format(line=line))
+
+
 def set_timezone(self):
     """Set the user's timezone.
 
@@ -106,14 +239,15 @@ def set_timezone(self):
 
     Actions
     -------
-        ln -sfv /usr/share/zoneinfo/{timezone} /mnt/etc/localtime
+        ln -sfv /usr/share/zoneinfo/{timezone} {root}/etc/localtime
         hwclock "--systohc"
     """
     logging.info(self.trad('set timezone [{timezone}]')
                  .format(timezone=self.user['timezone']))
 
-    cmd_list = ['ln -sfv /usr/share/zoneinfo/{timezone} /mnt/etc/localtime'
-                .format(timezone=self.user['timezone']), 'hwclock --systohc']
+    cmd_list = ['ln -sfv /usr/share/zoneinfo/{timezone} {root}/etc/localtime'
+                .format(root=self.root, timezone=self.user['timezone']),
+                'hwclock --systohc']
 
     for cmd in cmd_list:
         run_command(cmd)
@@ -128,20 +262,24 @@ def set_locales(self):
 
     Actions
     -------
-        arch-chroot /mnt locale-gen
-        "Write {language}:" /mnt/etc/locale.conf
+        arch-chroot {root} locale-gen
+        "Write {language}:" {root}/etc/locale.conf
     """
     logging.info(self.trad('set locale [{locale}]')
                  .format(locale=self.user['language']))
 
-    with open('/mnt/etc/locale.gen', 'a') as locale:
-        locale.write('{language}.UTF-8 UTF-8\n'
-                     .format(language=self.user['language']))
+    entry = '{language}.UTF-8 UTF-8\n'.format(language=self.user['language'])
+    with open(self.root.join('etc/locale.gen'), 'r') as locale:
+        entries = locale.readlines()
+
+    if entry not in entries:
+        with open(self.root.join('etc/locale.gen'), 'a') as locale:
+            locale.write(entry)
 
-    cmd = 'arch-chroot /mnt locale-gen'
+    cmd = 'arch-chroot {root} locale-gen'.format(root=self.root)
     run_command(cmd)
 
-    with open('/mnt/etc/locale.conf', 'w+') as locale:
+    with open(self.root.join('etc/locale.conf'), 'w+') as locale:
         locale.write(
             'LANG={language}.UTF-8\n'.format(language=self.user['language']))
 
@@ -155,12 +293,12 @@ def set_virtual_console(self):
 
     Actions
     -------
-        "Write {keymap}:" /mnt/etc/vconsole.conf
+        "Write {keymap}:" {root}/etc/vconsole.conf
     """
     logging.info(self.trad('set virtual console [{keymap}]')
                  .format(keymap=self.user['keymap']))
 
-    with open('/mnt/etc/vconsole.conf', 'w+') as vconsole:
+    with open(self.root.join('etc/vconsole.conf'), 'w+') as vconsole:
         vconsole.write('KEYMAP={keymap}\n'.format(keymap=self.user['keymap']))
 
 
@@ -173,12 +311,12 @@ def set_hostname_file(self):
 
     Actions
     -------
-        "Write {hostname}:" /mnt/etc/locale.conf
+        "Write {hostname}:" {root}/etc/locale.conf
     """
     logging.info(self.trad('set hostname [{hostname}]')
                  .format(hostname=self.user['hostname']))
 
-    with open('/mnt/etc/hostname', 'w+') as hostname:
+    with open(self.root.join('etc/hostname'), 'w+') as hostname:
         hostname.write('{hostname}\n'.format(hostname=self.user['hostname']))
 
 
@@ -195,11 +333,11 @@ def set_root_passwd(self):
 
     Actions
     -------
-        echo root:{passwd} | arch-chroot /mnt chpasswd -e
+        echo root:{passwd} | arch-chroot {root} chpasswd -e
     """
     logging.info(self.trad('set root password'))
-    cmd = 'echo root:{passwd} | arch-chroot /mnt chpasswd -e'.format(
-        passwd=quote(self.user['passwords']['root']))
+    cmd = 'echo root:{passwd} | arch-chroot {root} chpasswd -e'.format(
+        root=self.root, passwd=quote(self.user['passwords']['root']))
 
     command_output(cmd)
 
@@ -219,22 +357,24 @@ def create_user(self):
 
     Actions
     -------
-        arch-chroot /mnt useradd -g users -m -s /bin/bash {user}
-        echo {user}:{passwd} | arch-chroot /mnt chpasswd -e
+        arch-chroot {root} useradd -g users -m -s /bin/bash {user}
+        echo {user}:{passwd} | arch-chroot {root} chpasswd -e
     """
     logging.info(self.trad('create user {user}')
                  .format(user=self.user['username']))
 
-    cmd = 'arch-chroot /mnt useradd -g users -m -s /bin/bash {user}'.format(
-        user=self.user['username'])
+    with open(self.root.join('etc/passwd'), 'r') as passwd:
+        users = [line.split(':')[0] for line in passwd]
 
-    run_command(cmd)
+    if self.user['username'] not in users:
+        cmd = 'arch-chroot {root} useradd -g users -m -s /bin/bash {user}'
+        run_command(cmd.format(root=self.root, user=self.user['username']))
 
     logging.info(self.trad('set password for user {user}')
                  .format(user=self.user['username']))
 
-    cmd = 'echo {user}:{passwd} | arch-chroot /mnt chpasswd -e'.format(
-        user=quote(self.user['username']),
+    cmd = 'echo {user}:{passwd} | arch-chroot {root} chpasswd -e'.format(
+        root=self.root, user=quote(self.user['username']),
         passwd=quote(self.user['passwords']['user']))
 
     command_output(cmd)
@@ -253,14 +393,15 @@ def install_network(self):
 
     Actions
     -------
-        arch-chroot /mnt pacman "--noconfirm --needed" -S {network}
-        arch-chroot /mnt systemctl enable NetworkManager
+        arch-chroot {root} pacman "--noconfirm --needed" -S {network}
+        arch-chroot {root} systemctl enable NetworkManager
     """
     logging.info(self.trad('install network'))
     cmd_list = [
-        'arch-chroot /mnt pacman --noconfirm --needed -S {net}'.format(
-            net=self.packages['network']),
-        'arch-chroot /mnt systemctl enable NetworkManager']
+        'arch-chroot {root} pacman --noconfirm --needed -S {net}'.format(
+            root=self.root, net=self.packages['network']),
+        'arch-chroot {root} systemctl enable NetworkManager'.format(
+            root=self.root)]
 
     for cmd in cmd_list:
         run_command(cmd)
@@ -279,7 +420,7 @@ def install_grub_bootloader(self):
 
     Actions
     -------
-        arch-chroot /mnt pacman "--noconfirm --needed" -S {grub}
+        arch-chroot {root} pacman "--noconfirm --needed" -S {grub}
     """
     if (self.user['firmware']['type'] == 'bios') or \
             ((self.user['firmware']['type'] == 'uefi') and
@@ -290,8 +431,9 @@ def install_grub_bootloader(self):
                 extras=self.packages['grub']['extras'])
 
         logging.info(self.trad('install grub bootloader'))
-        cmd = 'arch-chroot /mnt pacman --noconfirm --needed -S {grub}'.format(
-            grub=self.packages['grub']['packages'])
+        cmd = 'arch-chroot {root} pacman --noconfirm --needed -S {grub}'
+        cmd = cmd.format(root=self.root,
+                         grub=self.packages['grub']['packages'])
 
         run_command(cmd)
 
@@ -305,7 +447,7 @@ def install_optional_packages(self):
 
     Actions
     -------
-        arch-chroot /mnt pacman "--noconfirm --needed" -S {optional}
+        arch-chroot {root} pacman "--noconfirm --needed" -S {optional}
     """
     for choice, name in zip(
             [self.user['cpu']['microcode'],
@@ -330,20 +472,135 @@ def install_optional_packages(self):
         if (choice is not None) and (choice is not False):
 
             logging.info(self.trad('install {name}').format(name=name))
-            chroot = 'arch-chroot /mnt'
+            chroot = 'arch-chroot {root}'.format(root=self.root)
             cmd = 'pacman --noconfirm --needed -S {opt}'.format(opt=choice)
             cmd = '{chroot} {cmd}'.format(chroot=chroot, cmd=cmd)
             run_command(cmd)
 
 
-def configure_systemdboot(self):
-    """Configure systemd-boot bootloader.
+def resume_parameters(self):
+    """Get the kernel parameters to resume from hibernation.
+
+    Returns
+    -------
+        "Array containing the resume parameters (empty without swap)"
+    """
+    if self.user['boot']['resume'] is not True:
+        return []
+
+    # Swap file: resume from root device at the swap file offset
+    if self.user['swap']['type'] == 'swapfile':
+        if self.user['swap'].get('offset') is None:
+            return []
+
+        if self.user['drive']['volume_group'] is not None:
+            device = '/dev/{vg}/root'.format(
+                vg=self.user['drive']['volume_group'])
+        else:
+            device = 'PARTUUID={uuid}'.format(uuid=find_partition(
+                self.user['partitions'], 'root').partuuid)
+
+        return ['resume={device}'.format(device=device),
+                'resume_offset={offset}'.format(
+                    offset=self.user['swap']['offset'])]
+
+    swap = find_partition(self.user['partitions'], 'swap')
+    if swap is None:
+        return []
+
+    if self.user['drive']['volume_group'] is not None:
+        return ['resume=/dev/{vg}/swap'.format(
+            vg=self.user['drive']['volume_group'])]
+
+    return ['resume=PARTUUID={uuid}'.format(uuid=swap.partuuid)]
+
+
+def crypt_parameters(self):
+    """Get the kernel parameters to open the encrypted LVM volume.
+
+    Returns
+    -------
+        "Array containing the cryptdevice parameter (empty without LUKS)"
+    """
+    if self.user['drive']['luks'] is False:
+        return []
+
+    return ['cryptdevice=PARTUUID={uuid}:{mapper}'.format(
+        uuid=find_partition(self.user['partitions'], 'lvm').partuuid,
+        mapper=self.user['drive']['mapper'])]
+
+
+def kernel_parameters(self, root=True):
+    """Get the kernel command line of the selected boot profile.
+
+    Keyword Arguments
+    -----------------
+        `root`: "Include the root device parameters" (default: True)
+
+    Returns
+    -------
+        "Array containing the kernel parameters"
+    """
+    boot = self.user['boot']
+    parameters = []
+
+    # Root device
+    if root is True:
+        drive = self.user['drive']
+        parameters += crypt_parameters(self)
+        if drive['volume_group'] is not None:
+            parameters.append('root=/dev/{vg}/root'.format(
+                vg=drive['volume_group']))
+        else:
+            parameters.append('root=PARTUUID={uuid}'.format(
+                uuid=find_partition(self.user['partitions'],
+                                    'root').partuuid))
+
+        parameters.append('rw')
+
+    # Boot performance profile
+    if boot['quiet'] is True:
+        parameters.append('quiet')
+
+    if boot['loglevel'] is not None:
+        parameters.append('loglevel={x}'.format(x=boot['loglevel']))
+
+    if boot['udev_log_level'] is not None:
+        parameters.append('rd.udev.log_level={x}'.format(
+            x=boot['udev_log_level']))
+        parameters.append('udev.log_level={x}'.format(
+            x=boot['udev_log_level']))
+
+    if boot['nowatchdog'] is True:
+        parameters.append('nowatchdog')
+
+    if boot['mitigations'] is not None:
+        parameters.append('mitigations={x}'.format(x=boot['mitigations']))
+
+    parameters += resume_parameters(self)
+
+    if boot['zswap'] is not False:
+        parameters.append('zswap.enabled=1')
+        for key, value in sorted(boot['zswap'].items()):
+            parameters.append('zswap.{key}={value}'.format(
+                key=key, value=value))
+
+    elif self.user['swap']['type'] == 'zram':
+        parameters.append('zswap.enabled=0')
+
+    return parameters
+
+
+def build_initramfs(self):
+    """Build the initramfs images of all installed kernels concurrently.
+
+    A single chroot is used for all the kernels, so that arch-chroot does
+    not mount and umount the API filesystems under each other.
 
     Modules
     -------
         logging: "Event logging system for applications and libraries"
-        shutil: "File and manipulation libraries"
-        re: "Regular expression matching operations"
+        shlex.quote: "Return a shell-escaped version of the string"
 
     Submodules
     ----------
@@ -351,86 +608,156 @@ def configure_systemdboot(self):
 
     Actions
     -------
-        "Write {hooks}:" /mnt/etc/mkinitcpio.conf
-        arch-chroot /mnt bootctl "--path=/boot" install
-        "Write {loader}:" /mnt/boot/loader/loader.conf
-        "Write {entry}:" /mnt/boot/loader/entries/arch.conf
-        arch-chroot /mnt bootctl "--path=/boot" update
+        arch-chroot {root} mkinitcpio -p {kernel} "(in parallel)"
     """
-    if (self.user['firmware']['type'] == 'uefi') and \
-            (self.user['firmware']['version'] == 'x64'):
-        logging.info(self.trad('configure systemd-boot bootloader'))
+    logging.info(self.trad('build initramfs [{kernels}]')
+                 .format(kernels=', '.join(self.user['kernel'])))
 
-        # Update the HOOKS
-        with open('/mnt/etc/mkinitcpio.conf', 'r') as mkinitcpio:
-            mkinitcpio_list = list(mkinitcpio)
+    jobs = ' '.join('mkinitcpio -p {kernel} &'.format(kernel=quote(kernel))
+                    for kernel in self.user['kernel'])
 
-        move('/mnt/etc/mkinitcpio.conf',
-             '/mnt/etc/mkinitcpio.backup',
-             copy_function=copy2)
+    script = 'status=0; {jobs} for job in $(jobs -p); do ' \
+             'wait $job || status=1; done; exit $status'.format(jobs=jobs)
 
-        mkinitcpio = []
-        for line in mkinitcpio_list:
-            line = re.sub(' +', ' ', line)
+    cmd = 'arch-chroot {root} /bin/bash -c {script}'.format(
+        root=self.root, script=quote(script))
+    run_command(cmd)
+
+
+def configure_initramfs(self):
+    """Configure the HOOKS of the initramfs (both bootloaders).
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        shutil: "High-level file operations"
+        re: "Regular expression matching operations"
 
-            if line.startswith('HOOKS=('):
+    Submodules
+    ----------
+        `resume_parameters`: "Get the kernel parameters to resume"
+        `build_initramfs`: "Build the initramfs images of all kernels"
+
+    Actions
+    -------
+        "Write {hooks}:" {root}/etc/mkinitcpio.conf
+        arch-chroot {root} mkinitcpio -p {kernel} "(for each kernel)"
+    """
+    logging.info(self.trad('configure initramfs hooks'))
 
-                for key in [' keyboard', ' keymap', ' lvm2', ' encrypt']:
-                    line = line.replace(key, '')
+    # Update the HOOKS
+    with open(self.root.join('etc/mkinitcpio.conf'), 'r') as mkinitcpio:
+        mkinitcpio_list = list(mkinitcpio)
 
-                line = line.replace(' filesystems',
-                                    ' keyboard keymap lvm2 filesystems')
+    move(self.root.join('etc/mkinitcpio.conf'),
+         self.root.join('etc/mkinitcpio.backup'),
+         copy_function=copy2)
 
-                if self.user['drive']['luks'] is not False:
-                    line = line.replace(' filesystems',
-                                        ' encrypt filesystems')
+    mkinitcpio = []
+    for line in mkinitcpio_list:
+        line = re.sub(' +', ' ', line)
 
-            mkinitcpio.append(line)
+        if line.startswith('HOOKS=('):
 
-        with open('/mnt/etc/mkinitcpio.conf', 'w+') as file:
-            for line in mkinitcpio:
-                file.write(line)
+            for key in [' keyboard', ' keymap', ' lvm2', ' encrypt',
+                        ' resume']:
+                line = line.replace(key, '')
+
+            line = line.replace(' filesystems',
+                                ' keyboard keymap lvm2 filesystems')
 
-        # Run bootctl install
-        cmd = 'arch-chroot /mnt bootctl --path=/boot install'
+            if self.user['drive']['luks'] is not False:
+                line = line.replace(' filesystems', ' encrypt filesystems')
+
+            if resume_parameters(self):
+                line = line.replace(' filesystems', ' resume filesystems')
+
+        mkinitcpio.append(line)
+
+    with open(self.root.join('etc/mkinitcpio.conf'), 'w+') as file:
+        for line in mkinitcpio:
+            file.write(line)
+
+    # Rebuild the initramfs images with the new HOOKS
+    build_initramfs(self)
+
+
+def configure_systemdboot(self):
+    """Configure systemd-boot bootloader.
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        shutil: "File and manipulation libraries"
+        re: "Regular expression matching operations"
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        arch-chroot {root} bootctl "--path=/boot" install
+        arch-chroot {root} bootctl "--no-variables" install "(image mode)"
+        "Write {loader} with {timeout}:" {root}/boot/loader/loader.conf
+        "Write {entry}:" {root}/boot/loader/entries/arch-{kernel}.conf
+        arch-chroot {root} bootctl "--path=/boot" update
+    """
+    if (self.user['firmware']['type'] == 'uefi') and \
+            (self.user['firmware']['version'] == 'x64'):
+        logging.info(self.trad('configure systemd-boot bootloader'))
+
+        # Run bootctl install (no EFI variables of the host for images)
+        cmd = 'arch-chroot {root} bootctl --path=/boot {options}install'
+        cmd = cmd.format(root=self.root, options='--no-variables '
+                         if self.image is not None else '')
         run_command(cmd)
 
-        # Create loader.conf
-        move('/mnt/boot/loader/loader.conf',
-             '/mnt/boot/loader/loader.backup',
+        # Create loader.conf with the boot profile timeout
+        move(self.root.join('boot/loader/loader.conf'),
+             self.root.join('boot/loader/loader.backup'),
              copy_function=copy2)
 
-        copyfile('config/loader.conf', '/mnt/boot/loader/loader.conf')
+        with open('config/loader.conf', 'r') as loader:
+            loader_list = list(loader)
 
-        # Create new boot entry
-        systemdboot = ['title Arch Linux',
-                       'linux /vmlinuz-{kernel}'.format(
-                           kernel=self.user['kernel']),
-                       'initrd /initramfs-{kernel}.img'.format(
-                           kernel=self.user['kernel'])]
+        with open(self.root.join('boot/loader/loader.conf'), 'w+') as file:
+            for line in loader_list:
+                line = re.sub(r'^timeout +[0-9]+',
+                              'timeout {timeout}'.format(
+                                  timeout=self.user['boot']['timeout']),
+                              line)
+                file.write(line)
 
-        if self.user['cpu']['microcode'] is not None:
-            systemdboot.insert(2, 'initrd /{microcode}.img'.format(
-                microcode=self.user['cpu']['microcode']))
+        options = 'options {parameters}'.format(
+            parameters=' '.join(kernel_parameters(self)))
 
-        if self.user['drive']['luks'] is not False:
-            opt = 'options cryptdevice=PARTUUID={uuid}:cryptlvm'.format(
-                uuid=self.user['partitions']['partuuid'][1])
+        # Create one boot entry per kernel (first one is the default)
+        for index, kernel in enumerate(self.user['kernel']):
+            systemdboot = ['title Arch Linux ({kernel})'.format(
+                               kernel=kernel),
+                           'linux /vmlinuz-{kernel}'.format(kernel=kernel),
+                           'initrd /initramfs-{kernel}.img'.format(
+                               kernel=kernel)]
 
-            arg = 'root=/dev/lvm/root quiet rw'
-            options = '{opt} {arg}'.format(opt=opt, arg=arg)
+            if self.user['cpu']['microcode'] is not None:
+                systemdboot.insert(2, 'initrd /{microcode}.img'.format(
+                    microcode=self.user['cpu']['microcode']))
 
-        else:
-            options = 'options root=PARTUUID={uuid} quiet rw'.format(
-                uuid=self.user['partitions']['partuuid'][1])
+            systemdboot.append(options)
 
-        systemdboot.append(options)
-        with open('/mnt/boot/loader/entries/arch.conf', 'w+') as file:
-            for line in systemdboot:
-                file.write(systemdboot)
+            entry = 'arch.conf'
+            if index > 0:
+                entry = 'arch-{kernel}.conf'.format(kernel=kernel)
+
+            with open(self.root.join('boot/loader/entries', entry),
+                      'w+') as file:
+                for line in systemdboot:
+                    file.write('{line}\n'.format(line=line))
 
         # Run bootctl update
-        cmd = 'arch-chroot /mnt bootctl --path=/boot update'
+        cmd = 'arch-chroot {root} bootctl --path=/boot update'.format(
+            root=self.root)
         run_command(cmd)
 
 
@@ -449,10 +776,11 @@ def configure_grub(self):
 
     Actions
     -------
-        arch-chroot /mnt grub-install "--target=i386-pc" {boot}
-        "Copy Grub2-themes/Archlinux:" /mnt/boot/grub/themes/Archlinux
-        "Write {config}:" /mnt/etc/default/grub
-        arch-chroot /mnt grub-mkconfig -o /boot/grub/grub.cfg
+        arch-chroot {root} grub-install "--target=i386-pc" {boot}
+        "Copy Grub2-themes/Archlinux:" {root}/boot/grub/themes/Archlinux
+        "Write {config} with {timeout}, {cryptdevice} and {parameters}:"
+            {root}/etc/default/grub
+        arch-chroot {root} grub-mkconfig -o /boot/grub/grub.cfg
     """
     if (self.user['firmware']['type'] == 'bios') or \
             ((self.user['firmware']['type'] == 'uefi') and
@@ -460,42 +788,122 @@ def configure_grub(self):
         logging.info(self.trad('configure grub bootloader'))
 
         # Run grub-install
-        cmd = 'arch-chroot /mnt grub-install --target=i386-pc {boot}'.format(
-            boot=self.user['drive']['boot'])
+        cmd = 'arch-chroot {root} grub-install --target=i386-pc {boot}'.format(
+            root=self.root, boot=self.user['drive']['boot'])
 
         run_command(cmd)
 
         # Add grub theme (Archlinux)
         copytree('libraries/grub2-themes/Archlinux',
-                 '/mnt/boot/grub/themes/Archlinux',
-                 copy_function=copy2)
+                 self.root.join('boot/grub/themes/Archlinux'),
+                 copy_function=copy2, dirs_exist_ok=True)
 
-        with open('/mnt/etc/default/grub', 'r') as grub:
+        with open(self.root.join('etc/default/grub'), 'r') as grub:
             grub_list = list(grub)
 
-        move('/mnt/etc/default/grub',
-             '/mnt/etc/default/grub.backup',
+        move(self.root.join('etc/default/grub'),
+             self.root.join('etc/default/grub.backup'),
              copy_function=copy2)
 
         grub = []
         for line in grub_list:
             line = re.sub(' +', ' ', line)
             line = line.replace('GRUB_GFXMODE=auto', 'GRUB_GFXMODE=1024x768')
+            line = re.sub(r'^GRUB_TIMEOUT=.*',
+                          'GRUB_TIMEOUT={timeout}'.format(
+                              timeout=self.user['boot']['timeout']),
+                          line)
+            line = re.sub(r'^GRUB_CMDLINE_LINUX=.*',
+                          'GRUB_CMDLINE_LINUX="{parameters}"'.format(
+                              parameters=' '.join(crypt_parameters(self))),
+                          line)
+            line = re.sub(r'^GRUB_CMDLINE_LINUX_DEFAULT=.*',
+                          'GRUB_CMDLINE_LINUX_DEFAULT="{parameters}"'.format(
+                              parameters=' '.join(
+                                  kernel_parameters(self, root=False))),
+                          line)
             line = line.replace(
                 '#GRUB_THEME="/path/to/gfxtheme"',
                 'GRUB_THEME="/boot/grub/themes/Archlinux/theme.txt"')
 
+            # Show one top level menu entry per installed kernel
+            if len(self.user['kernel']) > 1:
+                line = line.replace('#GRUB_DISABLE_SUBMENU=y',
+                                    'GRUB_DISABLE_SUBMENU=y')
+
             grub.append(line)
 
-        with open('/mnt/etc/default/grub', 'w+') as file:
+        with open(self.root.join('etc/default/grub'), 'w+') as file:
             for line in grub:
                 file.write(line)
 
         # Run grub-mkconfig
-        cmd = 'arch-chroot /mnt grub-mkconfig -o /boot/grub/grub.cfg'
+        cmd = 'arch-chroot {root} grub-mkconfig -o /boot/grub/grub.cfg'.format(
+            root=self.root)
         run_command(cmd)
 
 
+def create_boot_report(self):
+    """Write the expected boot time impact of the selected boot profile.
+
+    The report uses the stages of `systemd-analyze time` (loader, kernel,
+    initrd, userspace) so that it can be compared with the real boot time
+    of the installed system.
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+
+    Actions
+    -------
+        "Write {report}:" {logs}/boot-profile.txt
+    """
+    boot = self.user['boot']
+    default = self.boot['profiles']['default']
+    logging.info(self.trad('create boot profile report [{profile}]')
+                 .format(profile=boot['profile']))
+
+    stages = {'loader': [], 'kernel': [], 'initrd': [], 'userspace': []}
+    for key, impact in self.boot['impact'].items():
+        if boot[key] == default[key]:
+            continue
+
+        if key == 'timeout':
+            seconds = (default[key] - boot[key]) * impact['seconds']
+        elif boot[key] is False or boot[key] is None:
+            seconds = -impact['seconds']
+        else:
+            seconds = impact['seconds']
+
+        stages[impact['stage']].append((seconds, key, impact['description']))
+
+    report = ['Boot profile: {name} ({profile})'.format(
+                  name=boot['name'], profile=boot['profile']),
+              'Kernel parameters: {parameters}'.format(
+                  parameters=' '.join(kernel_parameters(self, root=False))),
+              '',
+              'Expected impact compared to the default profile',
+              '(estimates, compare with `systemd-analyze time`):']
+
+    total = 0
+    for stage, impacts in stages.items():
+        saved = sum(impact[0] for impact in impacts)
+        total += saved
+        report.append('  {stage:<10} {saved:+.1f}s'.format(
+            stage=stage, saved=-saved))
+
+        for seconds, key, description in impacts:
+            report.append('      {key:<16} {seconds:+.1f}s  {desc}'.format(
+                key=key, seconds=-seconds, desc=description))
+
+    report.append('  {stage:<10} {saved:+.1f}s'.format(
+        stage='total', saved=-total))
+
+    with open(os.path.join(LOGS, 'boot-profile.txt'), 'w+') as file:
+        for line in report:
+            file.write('{line}\n'.format(line=line))
+
+
 def configure_desktop_environment(self):
     """Configure the desktop environment.
 
@@ -511,9 +919,9 @@ def configure_desktop_environment(self):
 
     Actions
     -------
-        "Write {keyboard}:" /mnt/etc/X11/xorg.conf.d/00-keyboard.conf
+        "Write {keyboard}:" {root}/etc/X11/xorg.conf.d/00-keyboard.conf
         "Write {xinitrc}:" /home/{user}/.xinitrc
-        arch-chroot /mnt chmod 770 /home/{user}/.xinitrc
+        arch-chroot {root} chmod 770 /home/{user}/.xinitrc
     """
     if self.user['desktop_environment']['name'] is not None:
         logging.info(self.trad('configure {desktop}').format(
@@ -529,27 +937,25 @@ def configure_desktop_environment(self):
             line = line.replace('keymap_code', self.user['keymap'])
             keyboard.append(line)
 
-        with open('/mnt/etc/X11/xorg.conf.d/00-keyboard.conf', 'w+') as file:
+        with open(self.root.join('etc/X11/xorg.conf.d/00-keyboard.conf'),
+                  'w+') as file:
             for line in keyboard:
                 file.write(line)
 
         # Create xinitrc file (window managers only)
         if 'xorg-xinit' in self.user['desktop_environment']['requirements']:
 
-            move('config/xinitrc.conf',
-                 '/mnt/home/{user}/.xinitrc'
-                 .format(user=self.user['username']),
-                 copy_function=copy2)
+            xinitrc = self.root.join('home', self.user['username'],
+                                     '.xinitrc')
+            copy2('config/xinitrc.conf', xinitrc)
 
-            with open('/mnt/home/{user}/.xinitrc'
-                      .format(user=self.user['username']),
-                      'a') as xinitrc:
+            with open(xinitrc, 'a') as file:
 
-                xinitrc.write('exec {w}\n'.format(
+                file.write('exec {w}\n'.format(
                     w=self.user['desktop_environment']['name'].split(' ')[0]))
 
-            cmd = 'arch-chroot /mnt chmod 770 /mnt/home/{x}/.xinitrc'.format(
-                x=self.user['username'])
+            cmd = 'arch-chroot {root} chmod 770 /home/{x}/.xinitrc'.format(
+                root=self.root, x=self.user['username'])
 
             run_command(cmd)
 
@@ -567,7 +973,7 @@ def configure_display_manager(self):
 
     Actions
     -------
-        arch-chroot /mnt systemctl enable {manager}
+        arch-chroot {root} systemctl enable {manager}
 
     """
     if self.user['display_manager']['name'] is not None:
@@ -580,7 +986,8 @@ def configure_display_manager(self):
         else:
             service = self.user['display_manager']['name'].lower().split()[0]
 
-        cmd = 'arch-chroot /mnt systemctl enable {dm}'.format(dm=service)
+        cmd = 'arch-chroot {root} systemctl enable {dm}'.format(
+            root=self.root, dm=service)
         run_command(cmd)
 
 
@@ -593,12 +1000,12 @@ def configure_gdm(self):
 
     Actions
     -------
-        "Write {xprofile}:" /mnt/etc/xprofile
+        "Write {xprofile}:" {root}/etc/xprofile
     """
     if self.user['display_manager']['name'] is not None and \
             'gdm' in self.user['display_manager']['name'].lower():
 
-        copyfile('config/xprofile.conf', '/mnt/etc/xprofile')
+        copyfile('config/xprofile.conf', self.root.join('etc/xprofile'))
 
 
 def configure_lightdm(self):
@@ -611,16 +1018,16 @@ def configure_lightdm(self):
 
     Actions
     -------
-        "Write {conf}:" /mnt/etc/lightdm/lightdm.conf
+        "Write {conf}:" {root}/etc/lightdm/lightdm.conf
     """
     if self.user['display_manager']['name'] is not None and \
             'lightdm' in self.user['display_manager']['name'].lower():
 
-        with open('/mnt/etc/lightdm/lightdm.conf', 'r') as lightdm:
+        with open(self.root.join('etc/lightdm/lightdm.conf'), 'r') as lightdm:
             lightdm_list = list(lightdm)
 
-        move('/mnt/etc/lightdm/lightdm.conf',
-             '/mnt/etc/lightdm/lightdm.backup',
+        move(self.root.join('etc/lightdm/lightdm.conf'),
+             self.root.join('etc/lightdm/lightdm.backup'),
              copy_function=copy2)
 
         lightdm = []
@@ -634,7 +1041,7 @@ def configure_lightdm(self):
                 'greeter-setup-script=/usr/bin/numlockx on')
             lightdm.append(line)
 
-        with open('/mnt/etc/lightdm/lightdm.conf', 'w+') as file:
+        with open(self.root.join('etc/lightdm/lightdm.conf'), 'w+') as file:
             for line in lightdm:
                 file.write(line)
 
@@ -652,16 +1059,17 @@ def configure_sddm(self):
 
     Actions
     -------
-        arch-chroot /mnt sddm "--example-config" > /etc/sddm.backup
-        "Write {conf}:" /mnt/etc/sddm.conf
+        arch-chroot {root} sddm "--example-config" > {root}/etc/sddm.backup
+        "Write {conf}:" {root}/etc/sddm.conf
     """
     if self.user['display_manager']['name'] is not None and \
             'sddm' in self.user['display_manager']['name'].lower():
 
-        cmd = 'arch-chroot /mnt sddm --example-config > /etc/sddm.backup'
+        cmd = 'arch-chroot {root} sddm --example-config > {root}/{backup}'
+        cmd = cmd.format(root=self.root, backup='etc/sddm.backup')
         command_output(cmd)
 
-        with open('/mnt/etc/sddm.backup', 'r') as sddm:
+        with open(self.root.join('etc/sddm.backup'), 'r') as sddm:
             sddm_list = list(sddm)
 
         sddm = []
@@ -674,7 +1082,7 @@ def configure_sddm(self):
             line = line.replace('Numlock=none', 'Numlock=on')
             sddm.append(line)
 
-        with open('/mnt/etc/sddm.conf', 'w+') as file:
+        with open(self.root.join('etc/sddm.conf'), 'w+') as file:
             for line in sddm:
                 file.write(line)
 
@@ -689,16 +1097,16 @@ def configure_lxdm(self):
 
     Actions
     -------
-        "Write {conf}:" /mnt/etc/lxdm/lxdm.conf
+        "Write {conf}:" {root}/etc/lxdm/lxdm.conf
     """
     if self.user['display_manager']['name'] is not None and \
             'lxdm' in self.user['display_manager']['name'].lower():
 
-        with open('/mnt/etc/lxdm/lxdm.conf', 'r') as lxdm:
+        with open(self.root.join('etc/lxdm/lxdm.conf'), 'r') as lxdm:
             lxdm_list = list(lxdm)
 
-        move('/mnt/etc/lxdm/lxdm.conf',
-             '/mnt/etc/lxdm/lxdm.backup',
+        move(self.root.join('etc/lxdm/lxdm.conf'),
+             self.root.join('etc/lxdm/lxdm.backup'),
              copy_function=copy2)
 
         lxdm = []
@@ -714,7 +1122,7 @@ def configure_lxdm(self):
                                     user=self.user['username']))
             lxdm.append(line)
 
-        with open('/mnt/etc/lxdm/lxdm.conf', 'w+') as file:
+        with open(self.root.join('etc/lxdm/lxdm.conf'), 'w+') as file:
             for line in lxdm:
                 file.write(line)
 
@@ -729,19 +1137,18 @@ def configure_xdm(self):
     Actions
     -------
         "Write {conf}:" /home/{user}/.session
-        arch-chroot /mnt chmod 770 /home/{user}/.session
+        arch-chroot {root} chmod 770 /home/{user}/.session
     """
     if self.user['display_manager']['name'] is not None and \
             'xdm' in self.user['display_manager']['name'].lower():
 
-        with open('/mnt/home/{user}/.session'
-                  .format(user=self.user['username']),
-                  'a') as xdm:
+        with open(self.root.join('home', self.user['username'], '.session'),
+                  'w+') as xdm:
             xdm.write('{session}'.format(
                 session=self.user['display_manager']['session']))
 
-        cmd = 'arch-chroot /mnt chmod 770 /mnt/home/{x}/.session'.format(
-            x=self.user['username'])
+        cmd = 'arch-chroot {root} chmod 770 /home/{x}/.session'.format(
+            root=self.root, x=self.user['username'])
 
         run_command(cmd)
 
@@ -760,10 +1167,10 @@ def set_user_privileges(self):
 
     Actions
     -------
-        "Write {privileges}:" /mnt/etc/sudoers
-        arch-chroot /mnt pwck
-        arch-chroot /mnt grpck
-        arch-chroot /mnt gpasswd -a {user} {group}
+        "Write {privileges}:" {root}/etc/sudoers
+        arch-chroot {root} pwck
+        arch-chroot {root} grpck
+        arch-chroot {root} gpasswd -a {user} {group}
     """
     if self.user['power'] is not False:
 
@@ -771,10 +1178,14 @@ def set_user_privileges(self):
         logging.info(self.trad('give root privilege to the user {user}')
                      .format(user=self.user['username']))
 
-        with open('/mnt/etc/sudoers', 'a') as sudo:
-            sudo.write(
-                '\n## {user} privilege specification\n{user} ALL=(ALL) ALL'
-                .format(user=self.user['username']))
+        privilege = '{user} ALL=(ALL) ALL'.format(user=self.user['username'])
+        with open(self.root.join('etc/sudoers'), 'r') as sudo:
+            privileges = sudo.read().split('\n')
+
+        if privilege not in privileges:
+            with open(self.root.join('etc/sudoers'), 'a') as sudo:
+                sudo.write('\n## {user} privilege specification\n{x}'
+                           .format(user=self.user['username'], x=privilege))
 
         # Add the user to all groups
         logging.info(self.trad('add user {user} to all groups')
@@ -782,24 +1193,25 @@ def set_user_privileges(self):
 
         cmd_list = ['pwck', 'grpck']
         for cmd in cmd_list:
-            cmd = 'arch-chroot /mnt {cmd}'.format(cmd=cmd)
-            run_command(cmd)
+            cmd = 'arch-chroot {root} {cmd}'.format(root=self.root, cmd=cmd)
+            run_command(cmd, check=False)
 
-        cmd = 'cut -d: -f1 /mnt/etc/group'
+        cmd = 'cut -d: -f1 {root}/etc/group'.format(root=self.root)
         group_list = command_output(cmd).split('\n')
         group_list = list(filter(None, group_list))
 
         for group in group_list:
-            cmd = 'arch-chroot /mnt gpasswd -a {user} {group}'.format(
-                user=self.user['username'], group=group)
-            run_command(cmd)
+            cmd = 'arch-chroot {root} gpasswd -a {user} {group}'.format(
+                root=self.root, user=self.user['username'], group=group)
+            run_command(cmd, check=False)
 
 
-def install_aur_helper(self):
-    """Install AUR Helper.
+def configure_makepkg(self):
+    """Tune makepkg for fast parallel builds of AUR packages.
 
     Modules
     -------
+        os: "Export all functions from posix"
         logging: "Event logging system for applications and libraries"
         shutil: "High-level file operations"
         re: "Regular expression matching operations"
@@ -810,81 +1222,275 @@ def install_aur_helper(self):
 
     Actions
     -------
-        Temporarily grants user to run command without password
-        Clones AUR Helper repository
-        Creates and executes bash script to perform install
-        Removes AUR Helper repository folder
+        arch-chroot {root} pacman "--noconfirm --needed" -S {ccache}
+        "Write {makeflags} {compression} {builddir}:" {root}/etc/makepkg.conf
     """
     if self.user['aur_helper'] is not None:
-        logging.info(self.trad('install {aur} AUR Helper')
-                     .format(aur=self.user['aur_helper']))
+        cores = os.cpu_count() or 1
+        logging.info(self.trad('configure makepkg [{cores} cores]')
+                     .format(cores=cores))
+
+        # Install ccache
+        if self.user['ccache'] is True:
+            cmd = 'arch-chroot {root} pacman --noconfirm --needed -S {x}'
+            cmd = cmd.format(root=self.root, x=self.packages['ccache'])
+            run_command(cmd)
 
-        # Set root privilege without password
-        with open('/mnt/etc/sudoers', 'r') as sudo:
-            sudo_list = list(sudo)
+        with open(self.root.join('etc/makepkg.conf'), 'r') as makepkg:
+            makepkg_list = list(makepkg)
 
-        sudo = []
-        for line in sudo_list:
-            line = re.sub(' +', ' ', line)
-            line = line.replace(
-                '{user} ALL=(ALL) ALL'.format(user=self.user['username']),
-                '{user} ALL=(ALL) NOPASSWD: ALL'.format(
-                    user=self.user['username']))
-            sudo.append(line)
+        move(self.root.join('etc/makepkg.conf'),
+             self.root.join('etc/makepkg.backup'),
+             copy_function=copy2)
 
-        with open('/mnt/etc/sudoers', 'w+') as file:
-            for line in sudo:
+        makepkg = []
+        for line in makepkg_list:
+            line = re.sub(r'^#?MAKEFLAGS=.*',
+                          'MAKEFLAGS="-j{cores}"'.format(cores=cores), line)
+            line = re.sub(r'^COMPRESSZST=.*',
+                          'COMPRESSZST=(zstd -c -z -q -T0 -)', line)
+            line = re.sub(r"^PKGEXT=.*", "PKGEXT='.pkg.tar.zst'", line)
+
+            # Build in tmpfs (/tmp) when there is enough memory
+            if self.system['memory'] >= MAKEPKG_TMPFS_MEMORY:
+                line = re.sub(r'^#BUILDDIR=.*', 'BUILDDIR=/tmp/makepkg', line)
+
+            if (self.user['ccache'] is True) and \
+                    line.startswith('BUILDENV='):
+                line = line.replace('!ccache', 'ccache')
+
+            makepkg.append(line)
+
+        parallel = '# Parallel builds for cargo and go (PyArchboot)\n'
+        if parallel not in makepkg:
+            makepkg += ['\n{parallel}'.format(parallel=parallel),
+                        'export CARGO_BUILD_JOBS={cores}\n'.format(
+                            cores=cores),
+                        'export GOFLAGS="-p={cores}"\n'.format(cores=cores)]
+
+        with open(self.root.join('etc/makepkg.conf'), 'w+') as file:
+            for line in makepkg:
                 file.write(line)
 
-        # Clone the AUR Helper repository
-        chroot = 'arch-chroot /mnt'
-        url = 'https://aur.archlinux.org/{aur}.git'.format(
-            aur=self.user['aur_helper'].lower())
-        cmd = '{x} sudo -u {user} git clone {url} /home/{user}/{aur}'.format(
-            x=chroot,
-            user=self.user['username'],
-            url=url,
-            aur=self.user['aur_helper'].lower())
-        run_command(cmd)
 
-        # Create bash script to perform install
-        with open('aur.sh', 'w+') as file:
-            for line in ['#!/bin/bash\n',
-                         'arch-chroot /mnt /bin/bash <<EOF\n',
-                         'cd /home/{user}/{aur}\n'.format(
-                             user=self.user['username'],
-                             aur=self.user['aur_helper'].lower()),
-                         'sudo -u {user} makepkg --noconfirm --needed -sic\n'
-                         .format(user=self.user['username']),
-                         'EOF\n']:
-                file.write(line)
+def get_aur_package(self, name):
+    """Get the newest pre-built package of an AUR package from the cache.
 
-        # Install the AUR Helper
-        cmd_list = ['chmod +x aur.sh', 'sh aur.sh', 'rm aur.sh']
-        for cmd in cmd_list:
-            run_command(cmd)
+    Arguments
+    ---------
+        name: "String containing the AUR package name"
 
-        # Restore root privilege access
-        with open('/mnt/etc/sudoers', 'r') as sudo:
-            sudo_list = list(sudo)
+    Modules
+    -------
+        os: "Export all functions from posix"
+        re: "Regular expression matching operations"
 
-        sudo = []
-        for line in sudo_list:
-            line = re.sub(' +', ' ', line)
-            line = line.replace(
-                '{user} ALL=(ALL) NOPASSWD: ALL'.format(
-                    user=self.user['username']),
-                '{user} ALL=(ALL) ALL'.format(user=self.user['username']))
-            sudo.append(line)
+    Returns
+    -------
+        "String containing the package path (None if not cached)"
+    """
+    cache = self.system['aur_cache']
+    if not os.path.isdir(cache):
+        return None
 
-        with open('/mnt/etc/sudoers', 'w+') as file:
-            for line in sudo:
-                file.write(line)
+    pattern = re.compile(r'^{name}-[^-]+-[^-]+-[^-]+\.pkg\.tar\.\w+$'
+                         .format(name=re.escape(name)))
+
+    packages = [os.path.join(cache, package) for package in os.listdir(cache)
+                if pattern.match(package)]
+
+    if not packages:
+        return None
+
+    return max(packages, key=os.path.getmtime)
+
+
+def get_aur_dependencies(srcinfo):
+    """Get the names and the dependencies of a package from its .SRCINFO.
+
+    Arguments
+    ---------
+        srcinfo: "String containing the .SRCINFO file content"
+
+    Modules
+    -------
+        re: "Regular expression matching operations"
+
+    Returns
+    -------
+        names, dependencies: "Sets of provided names and dependencies"
+    """
+    names = set()
+    dependencies = set()
+    for line in srcinfo.split('\n'):
+        if ' = ' not in line:
+            continue
+
+        key, value = [x.strip() for x in line.split(' = ', 1)]
+        value = re.split(r'[<>=:]', value)[0]
+
+        if key in ['pkgbase', 'pkgname', 'provides']:
+            names.add(value)
+
+        elif key.split('_')[0] in ['depends', 'makedepends', 'checkdepends']:
+            dependencies.add(value)
+
+    return names, dependencies
+
+
+def aur_build_order(self, packages):
+    """Sort AUR packages so that dependencies are built first.
+
+    Arguments
+    ---------
+        packages: "Array containing the cloned AUR packages"
+
+    Modules
+    -------
+        graphlib: "Functionality to operate with graph-like structures"
+        logging: "Event logging system for applications and libraries"
+
+    Returns
+    -------
+        "Array containing the AUR packages in build order"
+    """
+    provided = {}
+    dependencies = {}
+    for package in packages:
+        srcinfo = '{root}/home/{user}/aur/{pkg}/.SRCINFO'.format(
+            root=self.root, user=self.user['username'], pkg=package)
 
-        # Remove AUR Helper repository folder
-        rmtree('/mnt/home/{user}/{aur}'
-               .format(user=self.user['username'],
-                       aur=self.user['aur_helper'].lower()))
+        with open(srcinfo, 'r', encoding='utf-8') as file:
+            names, dependencies[package] = get_aur_dependencies(file.read())
+
+        for name in names:
+            provided[name] = package
+
+    graph = TopologicalSorter()
+    for package in packages:
+        graph.add(package, *[provided[dep] for dep in dependencies[package]
+                             if (dep in provided) and
+                             (provided[dep] != package)])
+
+    try:
+        return list(graph.static_order())
+
+    except CycleError as cycle:
+        logging.warning(self.trad('circular AUR dependencies {cycle}')
+                        .format(cycle=cycle.args[1]))
+        return packages
+
+
+def install_aur_helper(self):
+    """Install AUR Helper and additional AUR packages.
+
+    Packages are built by the user directly inside the chroot, with a
+    temporary sudoers drop-in granting pacman (only) without password.
+
+    Modules
+    -------
+        os: "Export all functions from posix"
+        logging: "Event logging system for applications and libraries"
+        shutil: "High-level file operations"
+        shlex.quote: "Return a shell-escaped version of the string"
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+
+    Raises
+    ------
+        CommandError: "A package cannot be cloned or built"
+
+    Actions
+    -------
+        arch-chroot {root} pacman "--noconfirm --needed" -U {cached packages}
+        "Write {user} NOPASSWD: pacman" {root}/etc/sudoers.d/10-pyarchboot-aur
+        arch-chroot {root} sudo -u {user} git clone {url} ~/aur/{package}
+        arch-chroot {root} sudo -u {user} env -C ~/aur/{package} makepkg -sic
+        "Store the built packages in the cache"
+        "Remove the sudoers drop-in and the build folders"
+    """
+    if self.user['aur_helper'] is not None:
+        logging.info(self.trad('install {aur} AUR Helper')
+                     .format(aur=self.user['aur_helper']))
+
+        # Install the pre-built packages from the cache
+        packages = []
+        for package in self.user['aur_packages']:
+            cached = get_aur_package(self, package)
+            if cached is None:
+                packages.append(package)
+                continue
+
+            logging.info(self.trad('use cached package {package}')
+                         .format(package=os.path.basename(cached)))
+
+            copy2(cached, self.root.join('var/cache/pacman/pkg/'))
+            cmd = 'arch-chroot {root} pacman --noconfirm --needed -U {x}'
+            cmd = cmd.format(root=self.root, x=quote(
+                '/var/cache/pacman/pkg/{package}'.format(
+                    package=os.path.basename(cached))))
+            run_command(cmd)
+
+        if not packages:
+            return
+
+        user = self.user['username']
+        sudoers = self.root.join('etc/sudoers.d/10-pyarchboot-aur')
+        chroot = 'arch-chroot {root} sudo -u {user}'.format(
+            root=self.root, user=quote(user))
+        try:
+
+            # Temporarily grant the user to run pacman without password
+            with open(sudoers, 'w+') as file:
+                file.write('{user} ALL=(root) NOPASSWD: /usr/bin/pacman\n'
+                           .format(user=user))
+            os.chmod(sudoers, 0o440)
+
+            # Clone the AUR repositories
+            for package in packages:
+                cmd = '{x} git clone {url} /home/{user}/aur/{pkg}'.format(
+                    x=chroot,
+                    url='https://aur.archlinux.org/{pkg}.git'.format(
+                        pkg=package),
+                    user=user,
+                    pkg=package)
+                code = run_command(cmd, exit_on_error=True, check=False)
+                if code != 0:
+                    raise CommandError(cmd, self.trad('exit code {code}')
+                                       .format(code=code))
+
+            # Build and install the packages (dependencies first)
+            os.makedirs(self.system['aur_cache'], exist_ok=True)
+            for package in aur_build_order(self, packages):
+                logging.info(self.trad('build {package} AUR package')
+                             .format(package=package))
+
+                cmd = '{x} env -C /home/{user}/aur/{pkg} makepkg ' \
+                      '--noconfirm --needed -sic'.format(
+                          x=chroot, user=user, pkg=package)
+                code = run_command(cmd, check=False)
+                if code != 0:
+                    logging.error(self.trad('cannot build {package}')
+                                  .format(package=package))
+                    raise CommandError(cmd, self.trad('exit code {code}')
+                                       .format(code=code))
+
+                # Store the built package in the cache
+                folder = '{root}/home/{user}/aur/{pkg}'.format(
+                    root=self.root, user=user, pkg=package)
+
+                for built in os.listdir(folder):
+                    if '.pkg.tar.' in built:
+                        copy2(os.path.join(folder, built),
+                              self.system['aur_cache'])
+
+        finally:
+            if os.path.exists(sudoers):
+                os.remove(sudoers)
+            rmtree('{root}/home/{user}/aur'.format(root=self.root, user=user),
+                   ignore_errors=True)
 
 
 def clean_pacman_cache(self):
@@ -903,25 +1509,26 @@ def clean_pacman_cache(self):
 
     Actions
     -------
-        arch-chroot /mnt pacman -Qdtd
-        arch-chroot /mnt pacman "--noconfirm" -Rcsn {dependency}
-        arch-chroot /mnt pacman "--noconfirm" -Sc
+        arch-chroot {root} pacman -Qdtd
+        arch-chroot {root} pacman "--noconfirm" -Rcsn {dependency}
+        arch-chroot {root} pacman "--noconfirm" -Sc
     """
     logging.info(
         self.trad('clean pacman cache and delete unused dependencies'))
 
-    cmd = 'arch-chroot /mnt pacman -Qdtd'
+    cmd = 'arch-chroot {root} pacman -Qdtd'.format(root=self.root)
     output = command_output(cmd)
 
-    if (output is not False) or (output is not None) or (output != ''):
+    # No unused dependency (pacman exit code 1)
+    if output:
         output = list(filter(None, output.split('\n')))
 
         for dependency in output:
-            cmd = 'arch-chroot /mnt pacman --noconfirm -Rcsn {dep}'.format(
-                dep=dependency)
-            run_command(cmd)
+            cmd = 'arch-chroot {root} pacman --noconfirm -Rcsn {dep}'.format(
+                root=self.root, dep=dependency)
+            run_command(cmd, check=False)
 
-    cmd = 'arch-chroot /mnt pacman --noconfirm -Sc'
+    cmd = 'arch-chroot {root} pacman --noconfirm -Sc'.format(root=self.root)
     run_command(cmd)
 
 
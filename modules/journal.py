@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+from .system_manager.logger import LOG_CONTEXT
+from .system_manager.model import json_default
+from .system_manager.progress import record_phase
+from .system_manager.unix_command import LOGS
+
+# Install journal (session and completed steps)
+JOURNAL = os.path.join(LOGS, 'journal.json')
+
+
+def new_journal(self):
+    """Start the journal of a new installation.
+
+    The session only contains crypted passwords (build_session does not
+    store the plain text ones), and the journal is only readable by root.
+
+    Submodules
+    ----------
+        `save_journal`: "Store the journal"
+    """
+    self.journal = {'version': 1,
+                    'root': str(self.root),
+                    'started': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'completed': False,
+                    'user': self.user,
+                    'steps': {'partitioner': [], 'installer': []}}
+    save_journal(self)
+
+
+def load_journal(self):
+    """Load the journal of an interrupted installation.
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        logging: "Event logging system for applications and libraries"
+        sys: "Access to some objects used or maintained by the interpreter"
+
+    Returns
+    -------
+        "Dictionary containing the journal"
+    """
+    try:
+        with open(JOURNAL, 'r', encoding='utf-8') as file:
+            journal = json.load(file)
+
+    except (OSError, ValueError) as journal_error:
+        logging.error(self.trad('no journal to resume: {error}')
+                      .format(error=journal_error))
+        sys.exit(1)
+
+    if journal['completed'] is True:
+        logging.error(self.trad('installation already completed'))
+        sys.exit(1)
+
+    return journal
+
+
+def save_journal(self):
+    """Store the journal (atomic replace, root only).
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        os: "Export all functions from posix"
+    """
+    temporary = '{journal}.tmp'.format(journal=JOURNAL)
+    with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                      0o600), 'w', encoding='utf-8') as file:
+        json.dump(self.journal, file, ensure_ascii=False, indent=4,
+                  default=json_default)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary, JOURNAL)
+
+
+def run_steps(self, group, steps, atomic=False):
+    """Run the steps of a group that are not completed yet.
+
+    The journal is stored after each step with the current session,
+    the step name is added to the log records of the step and its
+    duration is stored for the ETA of the next installations.
+    An atomic group (partitioner) is run again from its first step when
+    it has not been completed, since its state can not be validated in
+    the middle.
+
+    Arguments
+    ---------
+        group: "String containing the group name (partitioner, installer)"
+        steps: "Array containing the functions of the steps"
+
+    Keyword Arguments
+    -----------------
+        `atomic`: "Run the whole group again if incomplete" (default: False)
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        time: "Various functions to manipulate time values"
+
+    Submodules
+    ----------
+        `save_journal`: "Store the journal"
+        `record_phase`: "Store the duration of a phase"
+    """
+    names = [step.__name__ for step in steps]
+    completed = [step['name'] for step in self.journal['steps'][group]]
+
+    if atomic is True and completed != names:
+        self.journal['steps'][group] = []
+        completed = []
+
+    logging.debug('{group} started'.format(group=group),
+                  extra={'event': 'phase_start', 'group': group})
+    started, status = time.monotonic(), 'failure'
+    try:
+        for step in steps:
+            if step.__name__ in completed:
+                logging.info(self.trad('skip completed step {step}')
+                             .format(step=step.__name__))
+                continue
+
+            run_step(self, group, step)
+
+        status = 'success'
+
+    finally:
+        logging.debug('{group} {status}'.format(group=group, status=status),
+                      extra={'event': 'phase_end', 'group': group,
+                             'status': status, 'duration': round(
+                                 time.monotonic() - started, 1)})
+
+
+def run_step(self, group, step):
+    """Run a step and store it in the journal (only when it succeeded).
+
+    A failed command of the step raises CommandError (run_command in a
+    step), so a failed or interrupted step is run again on resume.
+
+    Arguments
+    ---------
+        group: "String containing the group name (partitioner, installer)"
+        step: "Function of the step"
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        time: "Various functions to manipulate time values"
+
+    Submodules
+    ----------
+        `save_journal`: "Store the journal"
+        `record_phase`: "Store the duration of a phase"
+    """
+    started = time.monotonic()
+    LOG_CONTEXT.update({'step': step.__name__, 'started': started})
+    try:
+        step(self)
+    finally:
+        LOG_CONTEXT.update({'step': None, 'started': None})
+
+    seconds = round(time.monotonic() - started, 1)
+    logging.debug('step {step} done in {seconds}s'.format(
+        step=step.__name__, seconds=seconds),
+        extra={'event': 'step', 'group': group, 'step': step.__name__,
+               'duration': seconds})
+    record_phase(step.__name__, seconds)
+
+    self.journal['steps'][group].append({'name': step.__name__,
+                                         'seconds': seconds})
+    self.journal['user'] = self.user
+    save_journal(self)
+
+
+def journal_completed(logs):
+    """Check the journal of another installation (e.q., a fleet target).
+
+    Arguments
+    ---------
+        logs: "String containing the logs folder of the installation"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        os: "Export all functions from posix"
+
+    Returns
+    -------
+        "Boolean of a completed installation"
+    """
+    try:
+        with open(os.path.join(logs, 'journal.json'), 'r',
+                  encoding='utf-8') as file:
+            return json.load(file).get('completed') is True
+
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def close_journal(self):
+    """Mark the installation as completed.
+
+    Submodules
+    ----------
+        `save_journal`: "Store the journal"
+    """
+    self.journal['completed'] = True
+    save_journal(self)
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -20,17 +20,26 @@ import os
 import time
 from shlex import quote
 
-from humanfriendly import parse_size, round_number
-
-from .system_manager.settings import get_partition_id, get_swap
+from .system_manager.model import find_partition
+from .system_manager.settings import get_partition_id, get_partuuid, get_swap
+from .system_manager.size import ByteSize
 from .system_manager.unix_command import command_output, run_command
 
+# Partition types of the partition tables (EFI system, Linux LVM)
+PARTITION_TYPES = {
+    'gpt': {'efi': 'C12A7328-F81F-11D2-BA4B-00A0C93EC93B',
+            'lvm': 'E6D6D379-F507-44C2-A23C-238F2A3DF928'},
+    'mbr': {'efi': 'ef', 'lvm': '8e'}}
+
 
 def umount_partitions(self):
     """Umount user's existing partitions.
 
+    Failed umounts are not fatal (e.q., already umounted).
+
     Modules
     -------
+        os: "Export all functions from posix"
         logging: "Event logging system for applications and libraries"
         time: "Various functions to manipulate time values"
 
@@ -38,7 +47,14 @@ def umount_partitions(self):
     ----------
         `run_command`: "Subprocess Popen with console output"
     """
-    for partition in self.system['mountpoints']:
+    mountpoints = self.system['mountpoints']
+
+    # Dedicated target drive (fleet or image): only umount the target root
+    if os.environ.get('PYARCHBOOT_DRIVE'):
+        mountpoints = [mountpoint for mountpoint in mountpoints or []
+                       if mountpoint.startswith(str(self.root))]
+
+    for partition in mountpoints:
 
         # Deactivate swap
         if 'swap' in partition.lower():
@@ -48,20 +64,24 @@ def umount_partitions(self):
                              .format(id=mountpoint[0].split()[0]))
 
                 run_command('swapoff -a {swap}'
-                            .format(swap=mountpoint[0].split()[0]))
+                            .format(swap=mountpoint[0].split()[0]),
+                            check=False)
 
         # Umount the partitions
         if ('archiso' not in partition.lower()) and \
                 ('swap' not in partition.lower()):
 
             logging.info(self.trad('umount {id}').format(id=partition))
-            run_command('umount -f -R -q {id}'.format(id=partition))
+            run_command('umount -f -R -q {id}'.format(id=partition),
+                        check=False)
             time.sleep(1)
 
 
 def delete_partitions(self):
     """Delete existing partitions of the user's selected drive.
 
+    Failed removals are not fatal, the drive is wiped by format_drive.
+
     Modules
     -------
         logging: "Event logging system for applications and libraries"
@@ -76,7 +96,8 @@ def delete_partitions(self):
         if self.user['drive']['name'] in partition:
             partition = partition.split('//')[0].strip()
             logging.info(self.trad('delete {lv}').format(lv=partition))
-            run_command('lvremove -q -f -y {lv}'.format(lv=partition))
+            run_command('lvremove -q -f -y {lv}'.format(lv=partition),
+                        check=False)
             time.sleep(1)
 
     # Delete volume groups
@@ -84,7 +105,8 @@ def delete_partitions(self):
         if self.user['drive']['name'] in volume:
             volume = volume.split('/')[0].strip()
             logging.info(self.trad('delete {vg}').format(vg=volume))
-            run_command('vgremove -q -f -y {vg}'.format(vg=volume))
+            run_command('vgremove -q -f -y {vg}'.format(vg=volume),
+                        check=False)
             time.sleep(1)
 
     # Delete physical volumes
@@ -92,7 +114,8 @@ def delete_partitions(self):
         if self.user['drive']['name'] in volume:
             volume = volume.strip()
             logging.info(self.trad('delete {pv}').format(pv=volume))
-            run_command('pvremove -q -f -y {pv}'.format(pv=volume))
+            run_command('pvremove -q -f -y {pv}'.format(pv=volume),
+                        check=False)
             time.sleep(1)
 
     # Delete DOS partitions
@@ -102,7 +125,7 @@ def delete_partitions(self):
         pipe = ['/usr/bin/printf', 'd\n\nw']
         cmd = 'fdisk --wipe=always {drive}'.format(
             drive=self.user['drive']['name'])
-        run_command(cmd, args=pipe)
+        run_command(cmd, args=pipe, check=False)
         time.sleep(1)
 
 
@@ -122,7 +145,7 @@ def format_drive(self):
     """
     logging.info(self.trad('format {drive} [{size}]')
                  .format(drive=self.user['drive']['name'],
-                         size=self.user['drive']['size']))
+                         size=ByteSize(self.user['drive']['size'])))
 
     run_command('wipefs -f -a {drive}'
                 .format(drive=self.user['drive']['name']))
@@ -160,37 +183,57 @@ def new_partition_table(self):
     time.sleep(1)
 
 
+def drive_partitions(self):
+    """Get the partitions created on the drive (partitioning order).
+
+    With LVM, only the boot partition and the physical volume (lvm) are
+    created on the drive, the other partitions are logical volumes.
+
+    Returns
+    -------
+        "Array of the Partition records"
+    """
+    if self.user['drive']['volume_group'] is None:
+        return list(self.user['partitions'])
+
+    return [partition for partition in self.user['partitions']
+            if partition.name in ['boot', 'lvm']]
+
+
 def create_dos_partitions(self):
     """Create dos partition on user's selected drive.
 
+    Sizes are aligned to MiB (exact binary sizes), the last partition
+    (free space) or the LVM physical volume uses the remaining space.
+
     Modules
     -------
-        humanfriendly: "Human readable data libraries"
         logging: "Event logging system for applications and libraries"
         time: "Various functions to manipulate time values"
 
     Submodules
     ----------
+        `drive_partitions`: "Get the partitions created on the drive"
         `run_command`: "Subprocess Popen with console output"
+        `ByteSize`: "Immutable size in bytes"
     """
-    for partition, size in zip(self.user['partitions']['name'],
-                               self.user['partitions']['size']):
+    for partition in drive_partitions(self):
+        size = partition.size
+        if size != 'freespace':
+            size = ByteSize(size)
 
         logging.info(self.trad(
             'create {partition} partition [{size}] on {drive}').format(
-                partition=partition,
+                partition=partition.name,
                 size=size,
                 drive=self.user['drive']['name']))
 
-        if size == 'freespace' or \
-                ((self.user['drive']['lvm'] is True) and
-                 (partition == 'root')):
-            size = '16T'
-
-        size = parse_size(size.replace(',', '.'))
-        size = round_number(size / 1000)
+        if size == 'freespace':
+            size = '+'
+        else:
+            size = '{mib}MiB'.format(mib=size.align().mib)
 
-        pipe = ['/usr/bin/printf', 'size={size}K'.format(size=size)]
+        pipe = ['/usr/bin/printf', 'size={size}'.format(size=size)]
         cmd = 'sfdisk -f -q --no-reread -W always --append {drive}'.format(
             drive=self.user['drive']['name'])
 
@@ -198,42 +241,49 @@ def create_dos_partitions(self):
         time.sleep(1)
 
 
-def set_partition_types(self):
-    """Set type of user's dos partitions.
-
-    Modules
-    -------
-        logging: "Event logging system for applications and libraries"
-        time: "Various functions to manipulate time values"
+def update_partition_table(self):
+    """Inform the kernel of the new partitions (loop devices included).
 
     Submodules
     ----------
         `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        partx -u {drive}
+        udevadm settle
     """
-    for partition, drive_id in zip(self.user['partitions']['name'],
-                                   self.user['partitions']['drive_id']):
+    run_command('partx -u {drive}'.format(
+        drive=quote(self.user['drive']['name'])))
+    run_command('udevadm settle')
 
-        if (self.system['firmware'] == 'uefi') and (partition == 'boot'):
-            gdisk_pipe = 't\nef00\nw'
 
-        elif (self.user['drive']['lvm'] is True) and (partition == 'root'):
-            gdisk_pipe = 't\n1\n8e00\nw'
+def update_partition_ids(self):
+    """Get the drive id and the PARTUUID of the created partitions.
 
-        if 'gdisk_pipe' in locals():
-            logging.info(self.trad(
-                'set LVM partition type for {name} partition [{id}]').format(
-                    name=partition, id=drive_id))
+    Ids are set in partitioning order to the partitions created on the
+    drive (logical volumes get theirs from create_lvm_partitions).
 
-            pipe = ['/usr/bin/printf', gdisk_pipe]
-            cmd = 'gdisk {drive}'.format(drive=self.user['drive']['name'])
-            run_command(cmd, args=pipe, exit_on_error=True)
+    Submodules
+    ----------
+        `drive_partitions`: "Get the partitions created on the drive"
+        `get_partition_id`: "Get the partition drive id of the drive"
+        `get_partuuid`: "Get partitions PARTUUID"
+    """
+    drive_ids = dict(zip([partition.name
+                          for partition in drive_partitions(self)],
+                         get_partition_id(self) or []))
+    partuuid = dict(zip(drive_ids, get_partuuid(drive_ids.values())))
 
-            del gdisk_pipe
-            time.sleep(1)
+    self.user = self.user.replace(partitions=tuple(
+        partition.replace(drive_id=drive_ids[partition.name],
+                          partuuid=partuuid[partition.name])
+        if partition.name in drive_ids else partition
+        for partition in self.user['partitions']))
 
 
-def create_lvm_partitions(self):
-    """Create LVM partitions on user's selected drive.
+def set_partition_types(self):
+    """Set type of user's dos partitions (EFI system, Linux LVM).
 
     Modules
     -------
@@ -242,60 +292,125 @@ def create_lvm_partitions(self):
 
     Submodules
     ----------
+        `drive_partitions`: "Get the partitions created on the drive"
         `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        sfdisk "--part-type" {drive} {number} {type}
     """
-    for partition, drive_id, size in zip(self.user['partitions']['name'],
-                                         self.user['partitions']['drive_id'],
-                                         self.user['partitions']['size']):
+    for number, partition in enumerate(drive_partitions(self), start=1):
+        types = PARTITION_TYPES[self.user['drive']['table']]
+        if (partition.name == 'boot') and \
+                (self.system['firmware'] == 'uefi'):
+            partition_type = types['efi']
+
+        elif partition.name == 'lvm':
+            partition_type = types['lvm']
 
-        # Create LVM Volumes on root partition (dos)
-        if partition == 'root':
+        else:
+            continue
 
-            # LVM on LUKS
-            if self.user['drive']['luks'] is True:
+        logging.info(self.trad(
+            'set LVM partition type for {name} partition [{id}]').format(
+                name=partition.name, id=partition.drive_id))
 
-                logging.info(self.trad('create LVM on LUKS [{id}]')
-                             .format(id=drive_id))
+        run_command('sfdisk -f -q --part-type {drive} {number} {type}'
+                    .format(drive=quote(self.user['drive']['name']),
+                            number=number, type=partition_type),
+                    exit_on_error=True)
+        time.sleep(1)
 
-                cmd_list = [
-                    'cryptsetup luksFormat {id}'.format(id=drive_id),
-                    'cryptsetup open {id} cryptlvm'.format(id=drive_id),
-                    'pvcreate -y /dev/mapper/cryptlvm',
-                    'vgcreate -y lvm /dev/mapper/cryptlvm']
 
-            # LVM without LUKS
-            else:
-                logging.info(self.trad('create LVM Volume [{id}]')
-                             .format(id=drive_id))
+def create_lvm_partitions(self):
+    """Create LVM partitions on user's selected drive.
 
-                cmd_list = ['pvcreate -y {id}'.format(id=drive_id),
-                            'vgcreate -y lvm {id}'.format(id=drive_id)]
+    The logical volumes are created in the volume group of the session
+    and their drive id is set to /dev/{volume_group}/{name}.
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        time: "Various functions to manipulate time values"
 
-            # Create Volumes
-            for cmd in cmd_list:
-                run_command(cmd, exit_on_error=True)
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+        `find_partition`: "Get a partition of the session by name"
 
-        # Create LVM partitions
-        elif partition != 'boot':
+    Actions
+    -------
+        cryptsetup luksFormat {id} "(LUKS)"
+        cryptsetup open {id} {mapper} "(LUKS)"
+        pvcreate -y {id}
+        vgcreate -y {volume_group} {id}
+        lvcreate -y {size} -n {name} {volume_group}
+    """
+    drive = self.user['drive']
+    volume = find_partition(self.user['partitions'], 'lvm').drive_id
+
+    # LVM on LUKS
+    if drive['luks'] is True:
+        logging.info(self.trad('create LVM on LUKS [{id}]')
+                     .format(id=volume))
+
+        mapper = '/dev/mapper/{mapper}'.format(mapper=drive['mapper'])
+        cmd_list = ['cryptsetup luksFormat {id}'.format(id=quote(volume)),
+                    'cryptsetup open {id} {mapper}'.format(
+                        id=quote(volume), mapper=drive['mapper'])]
+        volume = mapper
+
+    # LVM without LUKS
+    else:
+        logging.info(self.trad('create LVM Volume [{id}]')
+                     .format(id=volume))
+        cmd_list = []
+
+    # Create Volumes
+    cmd_list += ['pvcreate -y {id}'.format(id=quote(volume)),
+                 'vgcreate -y {vg} {id}'.format(vg=drive['volume_group'],
+                                                id=quote(volume))]
+    for cmd in cmd_list:
+        run_command(cmd, exit_on_error=True)
+    time.sleep(1)
 
-            logging.info(self.trad(
-                'create {partition} LVM partition [{size}]').format(
-                    partition=partition, size=size))
+    # Create LVM partitions
+    partitions = []
+    for partition in self.user['partitions']:
+        if partition.name in ['boot', 'lvm']:
+            partitions.append(partition)
+            continue
 
-            if size == 'freespace':
-                size = '-l 100%FREE'
-            else:
-                size = '-L {size}'.format(size=size)
+        size = partition.size
+        if size != 'freespace':
+            size = ByteSize(size)
 
-            run_command('lvcreate -y {size} -n {name} lvm'
-                        .format(size=size, name=partition),
-                        exit_on_error=True)
+        logging.info(self.trad(
+            'create {partition} LVM partition [{size}]').format(
+                partition=partition.name, size=size))
+
+        if size == 'freespace':
+            size = '-l 100%FREE'
+        else:
+            size = '-L {mib}m'.format(mib=size.align().mib)
+
+        run_command('lvcreate -y {size} -n {name} {vg}'
+                    .format(size=size, name=partition.name,
+                            vg=drive['volume_group']),
+                    exit_on_error=True)
+        partitions.append(partition.replace(
+            drive_id='/dev/{vg}/{name}'.format(vg=drive['volume_group'],
+                                               name=partition.name)))
         time.sleep(1)
 
+    self.user = self.user.replace(partitions=tuple(partitions))
+
 
 def format_partitions(self):
     """Format created partitions of user's selected drive.
 
+    The LVM physical volume (no filesystem) is not formatted.
+
     Modules
     -------
         logging: "Event logging system for applications and libraries"
@@ -304,11 +419,15 @@ def format_partitions(self):
     ----------
         `command_output`: "Subprocess `check_output` with return codes"
     """
-    for partition, drive_id, size, filesystem in zip(
-            self.user['partitions']['name'],
-            self.user['partitions']['drive_id'],
-            self.user['partitions']['size'],
-            self.user['partitions']['filesystem']):
+    for partition, drive_id, size, filesystem in [
+            (partition.name, partition.drive_id, partition.size,
+             partition.filesystem)
+            for partition in self.user['partitions']
+            if (partition.drive_id is not None) and
+            (partition.filesystem is not None)]:
+
+        if size != 'freespace':
+            size = ByteSize(size)
 
         logging.info(self.trad(
             'format {partition} partition [{filesystem} - {size}]').format(
@@ -318,16 +437,49 @@ def format_partitions(self):
             filesystem = 'fat -F32'
 
         if partition == 'swap':
-            cmd = 'yes | mkswap {id}'.format(id=drive_id)
+            cmd = 'yes | mkswap {id}'.format(id=quote(drive_id))
         else:
             cmd = 'yes | mkfs.{filesystem} {id}'.format(filesystem=filesystem,
-                                                        id=drive_id)
+                                                        id=quote(drive_id))
         command_output(cmd, exit_on_error=True)
 
 
+def activate_volumes(self):
+    """Open the LUKS container and activate the LVM volumes (resume).
+
+    Submodules
+    ----------
+        `run_command`: "Subprocess Popen with console output"
+
+    Actions
+    -------
+        cryptsetup open /dev/disk/by-partuuid/{partuuid} {mapper} "(LUKS)"
+        vgchange -a y {volume_group}
+    """
+    drive = self.user['drive']
+    if (drive['volume_group'] is not None) and \
+            (not os.path.exists('/dev/{vg}'.format(vg=drive['volume_group']))):
+
+        if (drive['luks'] is not False) and (not os.path.exists(
+                '/dev/mapper/{mapper}'.format(mapper=drive['mapper']))):
+            logging.info(self.trad('open LUKS container'))
+            run_command('cryptsetup open /dev/disk/by-partuuid/{uuid} '
+                        '{mapper}'.format(
+                            uuid=find_partition(self.user['partitions'],
+                                                'lvm').partuuid,
+                            mapper=drive['mapper']),
+                        exit_on_error=True)
+
+        logging.info(self.trad('activate LVM volumes'))
+        run_command('vgchange -a y {vg}'.format(vg=drive['volume_group']),
+                    exit_on_error=True)
+
+
 def mount_partitions(self):
     """Mount the partitions and activate SWAP.
 
+    Already mounted partitions and active swap are skipped (resume).
+
     Modules
     -------
         os: "Export all functions from posix"
@@ -338,11 +490,21 @@ def mount_partitions(self):
     ----------
         `run_command`: "Subprocess Popen with console output"
     """
-    for mountorder, partition, drive_id, mountpoint in sorted(
-            zip(self.user['partitions']['mountorder'],
-                self.user['partitions']['name'],
-                self.user['partitions']['drive_id'],
-                self.user['partitions']['mountpoint'])):
+    with open('/proc/swaps', 'r') as swaps:
+        active = [os.path.realpath(line.split()[0])
+                  for line in swaps.readlines()[1:]]
+
+    for partition, drive_id, mountpoint in [
+            (partition.name, partition.drive_id, partition.mountpoint)
+            for partition in sorted(
+                [partition for partition in self.user['partitions']
+                 if partition.mountpoint is not None],
+                key=lambda partition: partition.mountorder)
+            if partition.drive_id is not None]:
+
+        if (os.path.realpath(drive_id) in active) or \
+                ((partition != 'swap') and os.path.ismount(mountpoint)):
+            continue
 
         logging.info(self.trad(
             'mount {partition} partition [{id}] on {mountpoint}').format(
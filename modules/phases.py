@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+from shutil import copy2, copytree
+
+from .startup import startup_call
+from .system_manager.settings import (get_drives, get_filesystem,
+                                      get_mountpoints, get_partitions,
+                                      get_volumes)
+from .system_manager.unix_command import LOGS, dump_json_file
+
+
+def session_parameters(self):
+    """Set parameters of the current session.
+
+    The answers are replaced by the session (immutable record), it is
+    only changed afterwards with replace (e.q., partition drive ids).
+
+    Submodules
+    ----------
+        session: modules/session.py
+    """
+    from .session import build_session
+
+    self.user = build_session(self, self.user)
+
+
+def probe_drives(self):
+    """Probe the drives and partitions (again before a new try).
+
+    Other system settings (network, hardware) are kept for a new try.
+
+    Submodules
+    ----------
+        settings: modules/system_manager/settings.py
+    """
+    self.system['drives'] = startup_call(get_drives, self)
+    self.system['partitions'] = startup_call(get_partitions)
+    self.system['mountpoints'] = startup_call(get_mountpoints)
+    self.system['volumes'] = startup_call(get_volumes)
+    for filesystem in ['lvm', 'luks', 'ntfs']:
+        self.system[filesystem] = startup_call(get_filesystem, self,
+                                               filesystem)
+
+
+def run_partitioner(self):
+    """Partition the disk.
+
+    Submodules
+    ----------
+        partitioner: modules/partitioner.py
+        journal: modules/journal.py
+    """
+    from .journal import run_steps
+    from .partitioner import (create_dos_partitions, create_lvm_partitions,
+                              delete_partitions, format_drive,
+                              format_partitions, new_partition_table,
+                              set_partition_types, umount_partitions,
+                              update_partition_ids, update_partition_table)
+
+    steps = [umount_partitions]
+    if self.user['drive']['name'] is not None:
+        steps += [delete_partitions, format_drive, new_partition_table,
+                  create_dos_partitions, update_partition_table,
+                  update_partition_ids, set_partition_types]
+        if self.user['drive']['volume_group'] is not None:
+            steps += [create_lvm_partitions]
+        steps += [format_partitions]
+
+    run_steps(self, 'partitioner', steps, atomic=True)
+
+
+def run_installer(self):
+    """Install Arch Linux.
+
+    Submodules
+    ----------
+        installer: modules/installer.py
+        journal: modules/journal.py
+    """
+    from .installer import (clean_pacman_cache, configure_desktop_environment,
+                            configure_display_manager, configure_gdm,
+                            configure_grub, configure_initramfs,
+                            configure_lightdm, configure_lxdm,
+                            configure_makepkg, configure_sddm,
+                            configure_systemdboot, configure_xdm,
+                            configure_zram, create_boot_report, create_fstab,
+                            create_swapfile, create_user, install_aur_helper,
+                            install_base_system, install_grub_bootloader,
+                            install_network, install_optional_packages,
+                            set_hostname_file, set_locales, set_mirrorlist,
+                            set_root_passwd, set_timezone, set_user_privileges,
+                            set_virtual_console)
+    from .journal import run_steps
+
+    run_steps(self, 'installer', [
+        set_mirrorlist,
+        install_base_system,
+        create_fstab,
+        create_swapfile,
+        configure_zram,
+        set_timezone,
+        set_locales,
+        set_virtual_console,
+        set_hostname_file,
+        set_root_passwd,
+        create_user,
+        install_network,
+        install_grub_bootloader,
+        install_optional_packages,
+        configure_initramfs,
+        configure_systemdboot,
+        configure_grub,
+        create_boot_report,
+        configure_desktop_environment,
+        configure_display_manager,
+        configure_gdm,
+        configure_lightdm,
+        configure_sddm,
+        configure_lxdm,
+        configure_xdm,
+        set_user_privileges,
+        configure_makepkg,
+        install_aur_helper,
+        clean_pacman_cache])
+
+
+def install_system(self):
+    """Partition the disk, mount the partitions and install Arch Linux.
+
+    The session and the logs are copied to the installed system when
+    the journal is completed.
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        shutil: "High-level file operations"
+
+    Submodules
+    ----------
+        journal: modules/journal.py
+        partitioner: modules/partitioner.py
+        `run_partitioner`: "Partition the disk"
+        `run_installer`: "Install Arch Linux"
+    """
+    from .journal import close_journal
+    from .partitioner import activate_volumes, mount_partitions
+
+    # Partition the disk (optional)
+    run_partitioner(self)
+
+    # Mount the partitions
+    activate_volumes(self)
+    mount_partitions(self)
+
+    # Install Arch Linux
+    run_installer(self)
+    close_journal(self)
+
+    # Copy logs to system
+    logging.info(self.trad('installation successful'))
+    dump_json_file(self.user, '{x}.json'.format(x=self.user['username']))
+    copytree(LOGS, self.root.join('var/log/PyArchboot'),
+             copy_function=copy2, dirs_exist_ok=True)
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import logging
+import sys
+
+from inquirer.errors import ValidationError
+
+from .questions import question_manager
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+
+def load_answers(file):
+    """Answers file parser (JSON or TOML).
+
+    Arguments
+    ---------
+        file: "String containing the path of the answers file"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        tomllib: "Parse TOML files" (Python 3.11+)
+        logging: "Event logging system for applications and libraries"
+        sys: "Access to some objects used or maintained by the interpreter"
+
+    Returns
+    -------
+        "Dictionary containing the answers"
+    """
+    try:
+        if file.endswith('.toml'):
+            if tomllib is None:
+                logging.error('TOML answers file requires Python 3.11+ !')
+                sys.exit(1)
+
+            with open(file, 'rb') as answers:
+                return tomllib.load(answers)
+
+        with open(file, 'r', encoding='utf-8') as answers:
+            return json.load(answers)
+
+    except (OSError, ValueError) as file_error:
+        logging.error('invalid answers file {file}: {error}'
+                      .format(file=file, error=file_error))
+        sys.exit(1)
+
+
+def choice_resolver(choices, value):
+    """Get the value of a choice from its value or its label.
+
+    Drives and partitions can be given by their device name only
+    (e.q., /dev/sda matches "/dev/sda 931,5G Samsung SSD").
+
+    Arguments
+    ---------
+        choices: "Array containing the choices of the question"
+        value: "Answer given in the answers file"
+
+    Returns
+    -------
+        found, value: "Boolean (choice exists) and the value of the choice"
+    """
+    for choice in choices or []:
+        label, choice_value = choice, choice
+        if isinstance(choice, tuple):
+            label, choice_value = choice
+
+        if (value == choice_value) or \
+                (isinstance(value, str) and isinstance(label, str) and
+                 ((value.lower() == label.lower()) or
+                  (label.split() and value == label.split()[0]))):
+            return True, choice_value
+
+    return False, value
+
+
+def answers_manager(self, answers):
+    """Validate the answers file against the questions.
+
+    Questions are evaluated in order with the same `ignore`, `choices` and
+    `validate` functions as the interactive prompt, and every error is
+    reported at once.
+
+    Arguments
+    ---------
+        answers: "Dictionary containing the answers of the answers file"
+
+    Modules
+    -------
+        inquirer.errors: "Common base class for all non-exit exceptions"
+        logging: "Event logging system for applications and libraries"
+        sys: "Access to some objects used or maintained by the interpreter"
+
+    Submodules
+    ----------
+        `question_manager`: "Ask questions to the user and store the answers"
+        `choice_resolver`: "Get the value of a choice from value or label"
+
+    Returns
+    -------
+        user: "Dictionary containing user's answers"
+    """
+    answers = dict(answers)
+    answers.setdefault('confirm', True)
+    questions = question_manager(self)
+    names = [question.name for question in questions]
+
+    user = {}
+    errors = ['{name}: {reason}'.format(name=name,
+                                        reason=self.trad('unknown question'))
+              for name in answers if name not in names + ['reboot']]
+
+    for index, question in enumerate(questions):
+        question.answers = user
+        if question.ignore:
+            if question.name not in user:
+                user[question.name] = question.default
+            continue
+
+        if question.name in answers:
+            value = answers[question.name]
+        elif question.default is not None:
+            value = question.default
+        else:
+            errors.append('{name}: {reason}'.format(
+                name=question.name, reason=self.trad('missing answer')))
+            user[question.name] = None
+            continue
+
+        # Choices (List and Checkbox)
+        if question.kind in ['list', 'checkbox']:
+            choices = question._solve(question._choices)
+            values = value if question.kind == 'checkbox' else [value]
+            if not isinstance(values, list):
+                values = [values]
+
+            resolved = []
+            for item in values:
+                found, item = choice_resolver(choices, item)
+
+                # Custom answer asked by the next question of the same name
+                if (found is False) and (question.kind == 'list') and \
+                        choice_resolver(choices, None)[0] and \
+                        (question.name in names[index + 1:]):
+                    found, item = True, None
+
+                if found is False:
+                    errors.append('{name}: {reason} {value}'.format(
+                        name=question.name,
+                        reason=self.trad('invalid choice'),
+                        value=item))
+                resolved.append(item)
+
+            value = resolved if question.kind == 'checkbox' else resolved[0]
+
+        # Yes or no
+        elif question.kind == 'confirm':
+            if not isinstance(value, bool):
+                errors.append('{name}: {reason}'.format(
+                    name=question.name,
+                    reason=self.trad('answer must be true or false')))
+
+        # Text and password
+        else:
+            value = str(value)
+
+        try:
+            question.validate(value)
+        except ValidationError as error:
+            errors.append('{name}: {reason}'.format(
+                name=question.name,
+                reason=error.reason or self.trad('invalid answer')))
+
+        user[question.name] = value
+
+    if errors:
+        for error in errors:
+            logging.error(error)
+        sys.exit(1)
+
+    return user
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from bisect import bisect_left
+from difflib import get_close_matches
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_library(name):
+    """Load a library file from libraries folder (once).
+
+    Arguments
+    ---------
+        name: "String containing the library name (timezone, locale)"
+
+    Modules
+    -------
+        functools.lru_cache: "Memoize the loaded libraries"
+
+    Returns
+    -------
+        entries, ordered: "Frozenset and sorted tuple of the library entries"
+    """
+    with open('libraries/{name}'.format(name=name), 'r',
+              encoding='utf-8') as library:
+        ordered = tuple(sorted(set(filter(None, library.read().split('\n')))))
+
+    return frozenset(ordered), ordered
+
+
+def library_contains(name, value):
+    """Check if an entry exists in a library.
+
+    Arguments
+    ---------
+        name: "String containing the library name (timezone, locale)"
+        value: "String containing the entry to check"
+
+    Returns
+    -------
+        Boolean: True or False
+    """
+    return value in load_library(name)[0]
+
+
+def library_complete(name, prefix, limit=10):
+    """Get the library entries starting with a prefix.
+
+    Arguments
+    ---------
+        name: "String containing the library name (timezone, locale)"
+        prefix: "String containing the beginning of the entry"
+
+    Keyword Arguments
+    -----------------
+        `limit`: "Integer of the maximum number of entries, None for all"
+                 (default: 10)
+
+    Modules
+    -------
+        bisect: "Array bisection algorithm"
+
+    Returns
+    -------
+        "Array containing the matching entries"
+    """
+    ordered = load_library(name)[1]
+    index = bisect_left(ordered, prefix)
+    entries = []
+    while (index < len(ordered)) and \
+            (limit is None or len(entries) < limit) and \
+            ordered[index].startswith(prefix):
+        entries.append(ordered[index])
+        index += 1
+
+    return entries
+
+
+def library_autocomplete(name, text, state):
+    """Complete a library entry with the TAB key (inquirer autocomplete).
+
+    Each TAB press gives the next entry starting with the typed text
+    (back to the first one after the last entry).
+
+    Arguments
+    ---------
+        name: "String containing the library name (timezone, locale)"
+        text: "String containing the typed text"
+        state: "Integer of the TAB presses since the text was typed"
+
+    Submodules
+    ----------
+        `library_complete`: "Get the library entries starting with a prefix"
+
+    Returns
+    -------
+        "String containing the completed entry (None if no entry)"
+    """
+    entries = library_complete(name, text, limit=None)
+    if not entries:
+        return None
+
+    return entries[state % len(entries)]
+
+
+def library_suggest(name, value, limit=3):
+    """Get the closest library entries of a wrong value (did you mean).
+
+    Arguments
+    ---------
+        name: "String containing the library name (timezone, locale)"
+        value: "String containing the wrong entry"
+
+    Keyword Arguments
+    -----------------
+        `limit`: "Integer of the maximum number of entries" (default: 3)
+
+    Modules
+    -------
+        difflib: "Helpers for computing deltas"
+
+    Returns
+    -------
+        "Array containing the suggested entries"
+    """
+    if value == '':
+        return []
+
+    ordered = load_library(name)[1]
+    suggestions = [entry for entry in ordered
+                   if entry.lower() == value.lower()]
+
+    for entry in library_complete(name, value, limit=limit) + \
+            get_close_matches(value, ordered, n=limit, cutoff=0.6):
+        if entry not in suggestions:
+            suggestions.append(entry)
+
+    return suggestions[:limit]
+
+
+@lru_cache(maxsize=None)
+def country_locale(country):
+    """Get the default locale of a country.
+
+    Arguments
+    ---------
+        country: "String containing the country code (e.q., FR)"
+
+    Returns
+    -------
+        "String containing the locale (e.q., fr_FR) or None"
+    """
+    if not country:
+        return None
+
+    country = country.upper()
+    locales = [entry for entry in load_library('locale')[1]
+               if entry.endswith('_{country}'.format(country=country))]
+
+    for language in [country.lower(), 'en']:
+        for locale in locales:
+            if locale.split('_')[0] == language:
+                return locale
+
+    return locales[0] if locales else None
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
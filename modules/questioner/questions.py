@@ -19,15 +19,24 @@ import logging
 
 import inquirer
 
-from .updater import desktop_extra_assigner, partitions_updater
-from .validator import (hostname_validator, language_validator,
-                        passwd_validator, size_validator, timezone_validator,
+from ..system_manager.hardware import gpu_devices, gpu_rules
+from .lookup import country_locale, library_autocomplete
+from .state import AnswerState
+from .updater import (desktop_extra_assigner, partitions_updater,
+                      previous_defaults)
+from .validator import (aur_validator, hostname_validator, kernel_validator,
+                        language_validator, passwd_validator, size_validator,
+                        swapfile_validator, timezone_validator,
                         username_validator)
 
 
-def question_manager(self):
+def question_manager(self, previous=None):
     """Ask questions to the user and store the answers.
 
+    Keyword Arguments
+    -----------------
+        `previous`: "Dictionary of the previous answers" (default: None)
+
     Modules
     -------
         inquirer: "Common interactive command line user interfaces"
@@ -35,12 +44,19 @@ def question_manager(self):
 
     Submodules
     ----------
+        `country_locale`: "Get the default locale of a country"
+        `library_autocomplete`: "Complete a library entry with the TAB key"
+        `AnswerState`: "Derived values of the answers (memoized)"
         `desktop_extra_assigner`: "Assign the extra packages name of desktop"
-        `partitions_updater`: "Delete partition to get updated array"
+        `partitions_updater`: "Get the partitions not selected yet"
+        `previous_defaults`: "Use the previous answers as defaults"
+        `aur_validator`: "Match AUR package names regex"
         `hostname_validator`: "Match UNIX hostname regex"
+        `kernel_validator`: "Check that at least one kernel is selected"
         `language_validator`: "Match language code in libraries/locale"
         `passwd_validator`: "Match UNIX password regex"
         `size_validator`: "Match regex, partition min/max and remaining size"
+        `swapfile_validator`: "Match regex and swap file min/max size"
         `timezone_validator`: "Match timezone code in libraries/timezone"
         `username_validator`: "Match UNIX username regex"
 
@@ -50,6 +66,7 @@ def question_manager(self):
     """
     logging.info(self.trad('use arrow keys to select an option'))
     logging.warning(self.trad('all data will be lost !'))
+    state = AnswerState(self.system['partitions'])
 
     questions = [
 
@@ -82,12 +99,22 @@ def question_manager(self):
             choices=['Swap', 'Home'],
             default=None),
 
+        # Swap type
+        inquirer.List(
+            'swap_type',
+            message=self.trad('Select swap type'),
+            choices=[(self.trad('Swap partition'), 'partition'),
+                     (self.trad('Swap file'), 'swapfile'),
+                     (self.trad('zram (compressed RAM)'), 'zram')],
+            carousel=True,
+            ignore=lambda user: 'Swap' not in user['optional_partitions']),
+
         # Boot size
         inquirer.Text(
             'boot_size',
             message=self.trad('Enter desired size for boot partition'),
             validate=lambda user, response:
-            size_validator(self, user, response),
+            size_validator(self, state.update(user), response),
             ignore=lambda user: user['drive'] is None),
 
         # Root freespace
@@ -105,7 +132,7 @@ def question_manager(self):
             message=self.trad('Enter desired size for root partition'),
             default=None,
             validate=lambda user, response:
-            size_validator(self, user, response),
+            size_validator(self, state.update(user), response),
             ignore=lambda user:
             user['drive'] is None or user['root_freespace'] is True),
 
@@ -115,10 +142,22 @@ def question_manager(self):
             message=self.trad('Enter desired size for swap partition'),
             default=None,
             validate=lambda user, response:
-            size_validator(self, user, response),
+            size_validator(self, state.update(user), response),
             ignore=lambda user:
             user['drive'] is None or
-            'Swap' not in user['optional_partitions']),
+            'Swap' not in user['optional_partitions'] or
+            user['swap_type'] != 'partition'),
+
+        # Swapfile size
+        inquirer.Text(
+            'swapfile_size',
+            message=self.trad('Enter desired size for swap file'),
+            default='2G',
+            validate=lambda _, response:
+            swapfile_validator(self, response),
+            ignore=lambda user:
+            'Swap' not in user['optional_partitions'] or
+            user['swap_type'] != 'swapfile'),
 
         # Home freespace
         inquirer.Confirm(
@@ -134,7 +173,7 @@ def question_manager(self):
             'home_size',
             message=self.trad('Enter desired size for home partition'),
             validate=lambda user, response:
-            size_validator(self, user, response),
+            size_validator(self, state.update(user), response),
             ignore=lambda user:
             user['drive'] is None or
             'Home' not in user['optional_partitions'] or
@@ -144,7 +183,7 @@ def question_manager(self):
         inquirer.List(
             'boot_id',
             message=self.trad('Select boot partition'),
-            choices=self.system['partitions'],
+            choices=lambda user: partitions_updater(state, user, 'boot_id'),
             carousel=True,
             ignore=lambda user:
             user['drive'] is not None or self.system['partitions'] is None),
@@ -153,7 +192,7 @@ def question_manager(self):
         inquirer.List(
             'root_id',
             message=self.trad('Select root partition'),
-            choices=lambda user: partitions_updater(self, user),
+            choices=lambda user: partitions_updater(state, user, 'root_id'),
             carousel=True,
             ignore=lambda user:
             user['drive'] is not None or self.system['partitions'] is None),
@@ -162,17 +201,18 @@ def question_manager(self):
         inquirer.List(
             'swap_id',
             message=self.trad('Select swap partition'),
-            choices=lambda user: partitions_updater(self, user),
+            choices=lambda user: partitions_updater(state, user, 'swap_id'),
             carousel=True,
             ignore=lambda user:
             user['drive'] is not None or
-            'Swap' not in user['optional_partitions']),
+            'Swap' not in user['optional_partitions'] or
+            user['swap_type'] != 'partition'),
 
         # Home drive ID
         inquirer.List(
             'home_id',
             message=self.trad('Select home partition'),
-            choices=lambda user: partitions_updater(self, user),
+            choices=lambda user: partitions_updater(state, user, 'home_id'),
             carousel=True,
             ignore=lambda user:
             user['drive'] is not None or
@@ -192,6 +232,8 @@ def question_manager(self):
         inquirer.Text(
             'timezone',
             message=self.trad('Enter desired timezone'),
+            autocomplete=lambda text, state:
+            library_autocomplete('timezone', text, state),
             validate=lambda _, response:
             timezone_validator(self, response),
             ignore=lambda user: user['timezone'] is not None),
@@ -200,6 +242,9 @@ def question_manager(self):
         inquirer.Text(
             'language',
             message=self.trad('Enter language code'),
+            default=country_locale(self.system['ipinfo'].get('country')),
+            autocomplete=lambda text, state:
+            library_autocomplete('locale', text, state),
             validate=lambda _, response:
             language_validator(self, response)),
 
@@ -231,16 +276,38 @@ def question_manager(self):
             validate=lambda _, response:
             passwd_validator(self, response)),
 
-        # Kernel
-        inquirer.List(
+        # Kernels
+        inquirer.Checkbox(
             'kernel',
-            message=self.trad('Select Linux Kernel'),
+            message=self.trad('Select Linux Kernels'),
             choices=[('Linux Stable', 0),
                      ('Linux Hardened', 1),
                      ('Linux LTS', 2),
                      ('Linux ZEN', 3)],
+            default=[0, 2],
+            validate=lambda _, response:
+            kernel_validator(self, response)),
+
+        # Boot profile
+        inquirer.List(
+            'boot_profile',
+            message=self.trad('Select boot profile'),
+            choices=[(profile['name'], key) for key, profile
+                     in self.boot['profiles'].items()],
+            default='default',
             carousel=True),
 
+        # Zswap (default of the boot profile, needs a swap device)
+        inquirer.Confirm(
+            'zswap',
+            message=self.trad(
+                'Do you wish to enable zswap (compressed swap cache)'),
+            default=lambda user:
+            self.boot['profiles'][user['boot_profile']]['zswap'] is True,
+            ignore=lambda user:
+            'Swap' not in user['optional_partitions'] or
+            user['swap_type'] == 'zram'),
+
         # Firmware drivers
         inquirer.Confirm(
             'firmware',
@@ -330,7 +397,9 @@ def question_manager(self):
             message=self.trad('Do you wish to install proprietary drivers'),
             ignore=lambda user:
             user['gpu_driver'] is False or
-            'nvidia' not in user['vga_controller'].lower()),
+            not any('proprietary' in rule for rule in gpu_rules(
+                self.hardware, gpu_devices(user['vga_controller'],
+                                           self.system['hardware']['gpu'])))),
 
         # AUR Helper
         inquirer.List(
@@ -345,6 +414,24 @@ def question_manager(self):
                      'Pikaur'],
             carousel=True),
 
+        # AUR packages
+        inquirer.Text(
+            'aur_packages',
+            message=self.trad(
+                'Enter additional AUR packages (space separated)'),
+            default='',
+            validate=lambda _, response:
+            aur_validator(self, response),
+            ignore=lambda user: user['aur_helper'] is None),
+
+        # Ccache
+        inquirer.Confirm(
+            'ccache',
+            message=self.trad(
+                'Do you wish to use ccache for AUR packages builds'),
+            default=False,
+            ignore=lambda user: user['aur_helper'] is None),
+
         # User groups
         inquirer.Confirm(
             'power',
@@ -361,6 +448,10 @@ def question_manager(self):
             default='Install Arch Linux')
     ]
 
+    # New try (previous answers as defaults)
+    if previous is not None:
+        previous_defaults(questions, previous)
+
     return questions
 
 
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from ..system_manager.size import ByteSize
+
+# Answers the derived values are computed from (in question order)
+STATE_SIZES = ('boot_size', 'root_size', 'swap_size', 'home_size')
+STATE_PARTITIONS = ('boot_id', 'root_id', 'swap_id', 'home_id')
+
+
+class AnswerState:
+    """Derived values of the user's answers (disk space, partitions).
+
+    Values are computed once per change of the answers they depend on
+    and the system settings are never modified, so that every prompt
+    (or a new try) gets the same values from the same answers.
+
+    Arguments
+    ---------
+        partitions: "Array containing the available partitions of the system"
+
+    Submodules
+    ----------
+        `ByteSize`: "Immutable size in bytes"
+    """
+
+    def __init__(self, partitions):
+        """Store the available partitions of the system."""
+        self.partitions = tuple(partitions or ())
+        self.key = None
+        self.values = {}
+
+    def update(self, user):
+        """Reset the derived values when the related answers change.
+
+        Arguments
+        ---------
+            user: "Dictionary containing user's answers"
+
+        Returns
+        -------
+            "The answer state (chained calls)"
+        """
+        key = tuple((name, user[name])
+                    for name in ('drive',) + STATE_SIZES + STATE_PARTITIONS
+                    if name in user)
+
+        if key != self.key:
+            self.key = key
+            self.values = {'answers': dict(key)}
+
+        return self
+
+    def memoize(self, name, function):
+        """Get a derived value (computed on first use).
+
+        Arguments
+        ---------
+            name: "String containing the name of the derived value"
+            function: "Function computing the value from the answers"
+
+        Returns
+        -------
+            "The derived value"
+        """
+        if name not in self.values:
+            self.values[name] = function(self.values['answers'])
+
+        return self.values[name]
+
+    @property
+    def drive_size(self):
+        """ByteSize of the selected drive."""
+        return self.memoize('drive_size', lambda answers: ByteSize.parse(
+            answers['drive'].split()[1]))
+
+    @property
+    def used_size(self):
+        """ByteSize of the disk space used by the partitions."""
+        return self.memoize('used_size', lambda answers: sum(
+            (ByteSize.parse(answers[size])
+             for size in STATE_SIZES if answers.get(size) is not None),
+            ByteSize(0)))
+
+    @property
+    def free_size(self):
+        """ByteSize of the remaining available disk space."""
+        return self.drive_size - self.used_size
+
+    @property
+    def index(self):
+        """Integer of the current partition index (boot, root, swap, home)."""
+        return self.memoize('index', lambda answers: max(
+            [STATE_SIZES.index(size) + 1
+             for size in STATE_SIZES[:3] if size in answers] or [0]))
+
+    def available_partitions(self, name):
+        """Get the partitions not selected by the previous questions.
+
+        Arguments
+        ---------
+            name: "String containing the question name (e.q., root_id)"
+
+        Returns
+        -------
+            "Array containing the remaining available partitions"
+        """
+        def available(answers):
+            selected = [answers.get(partition) for partition
+                        in STATE_PARTITIONS[:STATE_PARTITIONS.index(name)]]
+
+            return [partition for partition in self.partitions
+                    if partition not in selected]
+
+        return self.memoize(name, available)
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -16,23 +16,20 @@ limitations under the License.
 """
 
 
-def partitions_updater(self, user):
-    """Delete previous partition to display an updated array after selection.
+def partitions_updater(state, user, name):
+    """Get the partitions that are not selected yet (system is unchanged).
 
     Arguments
     ---------
+        state: "Answer state of the user's answers"
         user: "Dictionary containing user's answers"
+        name: "String containing the question name (e.q., root_id)"
 
     Returns
     -------
         "Array containing the remaining available partitions"
     """
-    for partition in ['boot_id', 'root_id', 'swap_id']:
-        if (partition in user) and \
-                (user[partition] in self.system['partitions']):
-            self.system['partitions'].remove(user[partition])
-
-    return self.system['partitions']
+    return state.update(user).available_partitions(name)
 
 
 def desktop_extra_assigner(self, user):
@@ -58,5 +55,60 @@ def desktop_extra_assigner(self, user):
     return question
 
 
+def choice_values(question):
+    """Get the values of the current choices of a question.
+
+    Arguments
+    ---------
+        question: "Inquirer question (List or Checkbox)"
+
+    Returns
+    -------
+        "Array containing the values of the choices"
+    """
+    return [choice[1] if isinstance(choice, tuple) else choice
+            for choice in question._solve(question._choices) or []]
+
+
+def previous_defaults(questions, previous):
+    """Use the previous answers as defaults of the questions (new try).
+
+    Choices are checked when the question is asked, since they can
+    depend on the other answers (e.q., remaining partitions).
+    Passwords and the confirmation are never filled in.
+
+    Arguments
+    ---------
+        questions: "Array containing the questions"
+        previous: "Dictionary containing the previous answers"
+
+    Returns
+    -------
+        "Array containing the questions"
+    """
+    for question in questions:
+        value = previous.get(question.name)
+        if (value is None) or (question.kind == 'password') or \
+                (question.name == 'confirm'):
+            continue
+
+        default = question._default
+        if question.kind == 'list':
+            question._default = (
+                lambda _, question=question, value=value, default=default:
+                value if value in choice_values(question) else default)
+
+        elif question.kind == 'checkbox':
+            question._default = (
+                lambda _, question=question, value=value, default=default:
+                value if all(item in choice_values(question)
+                             for item in value) else default)
+
+        else:
+            question._default = value
+
+    return questions
+
+
 # PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
 ##############################################################################
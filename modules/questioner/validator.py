@@ -17,75 +17,28 @@ limitations under the License.
 
 import re
 
-from humanfriendly import format_size, parse_size
 from inquirer.errors import ValidationError
 
+from ..system_manager.size import ByteSize
+from .lookup import library_contains, library_suggest
 
-def size_counter(user):
-    """Calculate remaining available disk space.
 
-    Arguments
-    ---------
-        user: "Dictionary containing user's answers"
-
-    Modules
-    -------
-        humanfriendly: "Parse a human readable data libraries"
-
-    Returns
-    -------
-        "Integer of the current disk space usage"
-    """
-    counter = 0
-    size_list = ['boot_size', 'root_size', 'swap_size', 'home_size']
-
-    for size in size_list:
-        if (size in user) and (user[size] is not None):
-            counter += parse_size(user[size].replace(',', '.'))
-
-    return counter
-
-
-def size_index(user):
-    """Set the index of the current partition.
-
-    Arguments
-    ---------
-        user: "Dictionary containing user's answers"
-
-    Returns
-    -------
-        "Integer of the current partition index"
-    """
-    index = 0
-    if 'swap_size' in user:
-        index = 3
-    elif 'root_size' in user:
-        index = 2
-    elif 'boot_size' in user:
-        index = 1
-
-    return index
-
-
-def size_validator(self, user, response):
+def size_validator(self, state, response):
     """Match regex, current partition min/max size and remaining disk space.
 
     Arguments
     ---------
-        user: "Dictionary containing user's answers"
+        state: "Answer state of the user's answers (disk space)"
         response: "String containing current answer"
 
     Modules
     -------
         re: "Regular expression matching operations"
-        humanfriendly: "Parse human readable data libraries"
         inquirer.errors: "Common base class for all non-exit exceptions"
 
-    Functions
-    ---------
-        `size_counter`: "Returns integer of the current disk space usage"
-        `size_index`: "Returns integer of the current partition index"
+    Submodules
+    ----------
+        `ByteSize`: "Immutable size in bytes"
 
     Raises
     ------
@@ -104,30 +57,32 @@ def size_validator(self, user, response):
     msg_status = self.trad(
         'Minimum [{min}] Maximum [{max}] Remaining [{free}]')
     error = '{msg} {status}'.format(msg=msg_error, status=msg_status)
+    index = state.index
+
+    size = None
+    if re.match(valid_size, response):
+        size = ByteSize.parse(response)
 
-    if (not re.match(valid_size, response)) or \
-            ((size_counter(user) + parse_size(response.replace(',', '.'))) >
-             parse_size(user['drive'].split()[1].replace(',', '.'))) or \
-            (parse_size(response.replace(',', '.')) <
-             parse_size(min_size[size_index(user)])) or \
-            (parse_size(response.replace(',', '.')) >
-             parse_size(max_size[size_index(user)])):
+    if (size is None) or (size > state.free_size) or \
+            (size < ByteSize.parse(min_size[index])) or \
+            (size > ByteSize.parse(max_size[index])):
 
         raise ValidationError('', reason=error.format(
-            name=name[size_index(user)],
+            name=name[index],
             response=response,
-            eq=eq_size[size_index(user)],
-            min=min_size[size_index(user)],
-            max=max_size[size_index(user)],
-            free=format_size(
-                parse_size(user['drive'].split()[1].replace(',', '.')) -
-                size_counter(user))))
+            eq=eq_size[index],
+            min=min_size[index],
+            max=max_size[index],
+            free=state.free_size))
 
     return True
 
 
-def timezone_validator(self, response):
-    """Match timezone code in libraries/timezone.
+def swapfile_validator(self, response):
+    """Match regex and swap file min/max size.
+
+    The swap file is created on the root partition, so it does not count
+    in the remaining disk space.
 
     Arguments
     ---------
@@ -141,13 +96,53 @@ def timezone_validator(self, response):
     -------
         boolean: True
     """
-    timezone_list = open('libraries/timezone').read()
-    if ('{response}\n'.format(response=response) not in timezone_list) or \
-            (response == ''):
+    valid_size = r'^[1-9]{1}[0-9]{0,2}((,|\.)[0-9]{1,2}){0,1}(M|G){1}$'
+    size = None
+    if re.match(valid_size, response):
+        size = ByteSize.parse(response)
+
+    if (size is None) or (size < ByteSize.parse('256M')) or \
+            (size > ByteSize.parse('32G')):
 
         raise ValidationError('', reason=self.trad(
+            'Invalid size for swap file: {response} (e.q., 2G) '
+            'Minimum [256M] Maximum [32G]').format(response=response))
+
+    return True
+
+
+def timezone_validator(self, response):
+    """Match timezone code in libraries/timezone.
+
+    Arguments
+    ---------
+        response: "String containing current answer"
+
+    Submodules
+    ----------
+        `library_contains`: "Check if an entry exists in a library"
+        `library_suggest`: "Get the closest library entries (did you mean)"
+
+    Raises
+    ------
+        ValidationError: "Display a short description with available formats"
+
+    Returns
+    -------
+        boolean: True
+    """
+    if not library_contains('timezone', response):
+        reason = self.trad(
             'Invalid timezone: {response} (e.q., Europe/Paris)').format(
-                response=response))
+                response=response)
+
+        suggestions = library_suggest('timezone', response)
+        if suggestions:
+            reason = '{reason} {suggest}'.format(
+                reason=reason, suggest=self.trad('Did you mean {x} ?').format(
+                    x=', '.join(suggestions)))
+
+        raise ValidationError('', reason=reason)
 
     return True
 
@@ -159,6 +154,11 @@ def language_validator(self, response):
     ---------
         response: "String containing current answer"
 
+    Submodules
+    ----------
+        `library_contains`: "Check if an entry exists in a library"
+        `library_suggest`: "Get the closest library entries (did you mean)"
+
     Raises
     ------
         ValidationError: Display a short description with available formats"
@@ -167,13 +167,40 @@ def language_validator(self, response):
     -------
         boolean: True
     """
-    language_list = open('libraries/locale').read()
-    if ('{response}\n'.format(response=response) not in language_list) or \
-            (response == ''):
+    if not library_contains('locale', response):
+        reason = self.trad(
+            'Invalid language code: {response} (e.q., fr_FR)').format(
+                response=response)
+
+        suggestions = library_suggest('locale', response)
+        if suggestions:
+            reason = '{reason} {suggest}'.format(
+                reason=reason, suggest=self.trad('Did you mean {x} ?').format(
+                    x=', '.join(suggestions)))
+
+        raise ValidationError('', reason=reason)
+
+    return True
 
+
+def kernel_validator(self, response):
+    """Check that at least one kernel is selected.
+
+    Arguments
+    ---------
+        response: "Array containing the selected kernel indexes"
+
+    Raises
+    ------
+        ValidationError: "Display a short description with available formats"
+
+    Returns
+    -------
+        boolean: True
+    """
+    if not response:
         raise ValidationError('', reason=self.trad(
-            'Invalid language code: {response} (e.q., fr_FR)').format(
-                response=response))
+            'Select at least one kernel (e.q., Linux Stable, Linux LTS)'))
 
     return True
 
@@ -226,6 +253,31 @@ def passwd_validator(self, response):
     return True
 
 
+def aur_validator(self, response):
+    """Match AUR package names regex.
+
+    Arguments
+    ---------
+        response: "String containing current answer"
+
+    Raises
+    ------
+        ValidationError: "Display a short description with available formats"
+
+    Returns
+    -------
+        boolean: True
+    """
+    for package in response.split():
+        if not re.match(r'^[a-z0-9@_+][a-z0-9@._+-]*$', package):
+
+            raise ValidationError('', reason=self.trad(
+                'Invalid AUR package: {response} (e.q., google-chrome)')
+                .format(response=package))
+
+    return True
+
+
 def username_validator(self, response):
     """Match UNIX username regex.
 
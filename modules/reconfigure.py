@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import logging
+import os
+import sys
+from shutil import copy2
+
+from .installer import (clean_pacman_cache, configure_desktop_environment,
+                        configure_display_manager, configure_gdm,
+                        configure_grub, configure_lightdm, configure_lxdm,
+                        configure_makepkg, configure_sddm,
+                        configure_systemdboot, configure_xdm,
+                        create_boot_report, install_aur_helper,
+                        set_hostname_file, set_locales, set_timezone,
+                        set_user_privileges, set_virtual_console)
+from .partitioner import activate_volumes, mount_partitions
+from .system_manager.model import json_default, session_model
+from .system_manager.unix_command import (LOGS, command_output, dump_json_file,
+                                          run_command)
+
+# Settings of the installed storage and accounts (kept from the session)
+RECONFIGURE_KEEP = ['drive', 'partitions', 'swap', 'firmware', 'passwords',
+                    'username']
+
+# Installer steps and the settings they are written from (install order)
+RECONFIGURE_STEPS = [
+    (set_timezone, ['timezone']),
+    (set_locales, ['language']),
+    (set_virtual_console, ['keymap']),
+    (set_hostname_file, ['hostname']),
+    (configure_systemdboot, ['boot', 'cpu', 'kernel']),
+    (configure_grub, ['boot', 'kernel']),
+    (create_boot_report, ['boot']),
+    (configure_desktop_environment, ['desktop_environment', 'keymap']),
+    (configure_display_manager, ['display_manager']),
+    (configure_gdm, ['display_manager']),
+    (configure_lightdm, ['display_manager']),
+    (configure_sddm, ['display_manager']),
+    (configure_lxdm, ['display_manager']),
+    (configure_xdm, ['display_manager']),
+    (set_user_privileges, ['power']),
+    (configure_makepkg, ['aur_helper', 'ccache']),
+    (install_aur_helper, ['aur_helper', 'aur_packages'])]
+
+
+def load_session(self, session):
+    """Load the session of an installed system ({username}.json).
+
+    Arguments
+    ---------
+        session: "String containing the path of the session file"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        logging: "Event logging system for applications and libraries"
+        sys: "Access to some objects used or maintained by the interpreter"
+
+    Returns
+    -------
+        "UserSession record of the installed system"
+    """
+    try:
+        with open(session, 'r', encoding='utf-8') as file:
+            return session_model(json.load(file))
+
+    except (OSError, ValueError) as session_error:
+        logging.error(self.trad('invalid session {session}: {error}')
+                      .format(session=session, error=session_error))
+        sys.exit(1)
+
+
+def session_changes(previous, current):
+    """Get the settings that differ between two sessions.
+
+    Values are compared as stored in JSON (records are objects and
+    tuples are lists).
+
+    Arguments
+    ---------
+        previous: "Dictionary containing the stored session"
+        current: "Dictionary containing the new session"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+
+    Returns
+    -------
+        "Set containing the changed settings"
+    """
+    previous, current = [
+        json.loads(json.dumps(session, ensure_ascii=False,
+                              default=json_default))
+        for session in (previous, current)]
+    return {key for key in set(previous) | set(current)
+            if key not in RECONFIGURE_KEEP and
+            previous.get(key) != current.get(key)}
+
+
+def session_packages(self, session):
+    """Get the optional packages of a session.
+
+    Arguments
+    ---------
+        session: "Dictionary containing the session"
+
+    Returns
+    -------
+        "Set containing the package (or group) names"
+    """
+    packages = [session['cpu']['microcode'],
+                session['ntfs'],
+                session['gpu']['driver'],
+                session['gpu']['hardvideo'],
+                session['desktop_environment']['requirements'],
+                session['desktop_environment']['packages'],
+                session['display_manager']['packages']]
+
+    packages += session['kernel']
+    if (session['aur_helper'] is not None) and \
+            (session.get('ccache') is True):
+        packages.append(self.packages['ccache'])
+
+    return set(' '.join(package for package in packages
+                        if package not in (None, False)).split())
+
+
+def installed_packages(self):
+    """Get the installed packages and groups of the target.
+
+    Submodules
+    ----------
+        `command_output`: "Subprocess `check_output` with return codes"
+
+    Actions
+    -------
+        arch-chroot {root} pacman -Qq
+        arch-chroot {root} pacman -Qg
+
+    Returns
+    -------
+        "Set containing the installed package and group names"
+    """
+    packages = command_output('arch-chroot {root} pacman -Qq'
+                              .format(root=self.root)).split()
+    groups = command_output('arch-chroot {root} pacman -Qg'
+                            .format(root=self.root)).split('\n')
+
+    return set(packages) | {line.split()[0] for line in groups
+                            if line.strip()}
+
+
+def reconfigure_manager(self, previous):
+    """Reapply the settings that changed since the installation.
+
+    The storage and the accounts are kept from the stored session, the
+    package delta is applied with pacman and only the writers of the
+    changed settings are run again.
+
+    Arguments
+    ---------
+        previous: "Dictionary containing the stored session"
+
+    Modules
+    -------
+        os: "Export all functions from posix"
+        logging: "Event logging system for applications and libraries"
+        shutil: "High-level file operations"
+
+    Submodules
+    ----------
+        `session_changes`: "Get the settings that differ between sessions"
+        `session_packages`: "Get the optional packages of a session"
+        `installed_packages`: "Get the installed packages and groups"
+        `run_command`: "Subprocess Popen with console output"
+        installer: modules/installer.py
+        partitioner: modules/partitioner.py
+
+    Actions
+    -------
+        arch-chroot {root} pacman "--noconfirm --needed" -S {added}
+        "Run the installer steps of the changed settings"
+        arch-chroot {root} pacman "--noconfirm" -Rsu {removed}
+        "Write {session}:" {root}/var/log/PyArchboot/{username}.json
+
+    Returns
+    -------
+        "Set containing the changed settings"
+    """
+    self.user = self.user.replace(**{key: previous[key]
+                                     for key in RECONFIGURE_KEEP
+                                     if key in previous})
+
+    changes = session_changes(previous, self.user)
+    if not changes:
+        logging.info(self.trad('nothing to reconfigure'))
+        return changes
+
+    logging.info(self.trad('reconfigure [{changes}]')
+                 .format(changes=', '.join(sorted(changes))))
+
+    # Mount the installed system
+    activate_volumes(self)
+    mount_partitions(self)
+
+    # Package delta
+    old_packages = session_packages(self, previous)
+    new_packages = session_packages(self, self.user)
+    added = sorted(new_packages - old_packages)
+    removed = sorted((old_packages - new_packages) & installed_packages(self))
+
+    if added:
+        logging.info(self.trad('install {name}')
+                     .format(name=' '.join(added)))
+        run_command('arch-chroot {root} pacman --noconfirm --needed -S {x}'
+                    .format(root=self.root, x=' '.join(added)))
+
+    # Writers of the changed settings
+    for step, keys in RECONFIGURE_STEPS:
+        if changes.intersection(keys):
+            step(self)
+
+    # Packages removed last (new bootloader entries are already written)
+    if removed:
+        logging.info(self.trad('remove {name}')
+                     .format(name=' '.join(removed)))
+        run_command('arch-chroot {root} pacman --noconfirm -Rsu {x}'
+                    .format(root=self.root, x=' '.join(removed)))
+
+    if added or removed:
+        clean_pacman_cache(self)
+
+    # Store the new session
+    session = '{x}.json'.format(x=self.user['username'])
+    dump_json_file(self.user, session)
+    logs = self.root.join('var/log/PyArchboot')
+    os.makedirs(logs, exist_ok=True)
+    copy2(os.path.join(LOGS, session), os.path.join(logs, session))
+
+    return changes
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
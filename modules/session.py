@@ -13,275 +13,328 @@ distributed under the License is distributed on an "AS IS" BASIS,
 WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
+
+The session is built once from the answers and the probes (one
+function per entry, build_session), then it is an immutable record.
 """
 
+import os
 from crypt import METHOD_SHA512, crypt, mksalt
 
+from .system_manager.hardware import (cpu_microcode, gpu_devices,
+                                      gpu_packages, gpu_rules)
+from .system_manager.model import (Cpu, Desktop, Display, Drive, Firmware,
+                                   Gpu, Partition, Swap, UserSession)
+from .system_manager.size import ByteSize
+
 
-def drive_session(self):
-    """Set drive parameters of the current session."""
-    if self.user['drive'] is not None:
+def drive_session(self, answers):
+    """Get the drive of the current session (Drive record)."""
+    if answers['drive'] is not None:
 
         # Set drive parameters
-        self.user['drive'] = {'name': self.user['drive'].split()[0],
-                              'size': self.user['drive'].split()[1],
-                              'model': self.user['drive'].split()[2],
-                              'boot': self.user['drive'].split()[0],
-                              'lvm': self.user['lvm'],
-                              'luks': self.user['luks']}
+        name, size, model = answers['drive'].split()[:3]
+        drive = {'name': name, 'size': ByteSize.parse(size), 'model': model,
+                 'boot': name, 'lvm': answers['lvm'],
+                 'luks': answers['luks']}
     # Custom partitions
     else:
 
         # Get boot drive
         boot = str(self.system['drives'][0]).split()[0]
-        for drive in self.system['drives']:
-            if str(drive).split()[0] in self.user['boot_id'].split()[0]:
-                boot = str(drive).split()[0]
+        for device in self.system['drives']:
+            if str(device).split()[0] in answers['boot_id'].split()[0]:
+                boot = str(device).split()[0]
                 break
 
         # Set drive parameters
-        self.user['drive'] = {'name': None,
-                              'boot': boot,
-                              'lvm': self.system['lvm'],
-                              'luks': self.system['luks']}
+        drive = {'name': None, 'boot': boot, 'lvm': self.system['lvm'],
+                 'luks': self.system['luks']}
 
     # Append LVM packages
-    if (self.user['lvm'] is True) or (self.system['lvm'] is True):
-        self.user['drive']['lvm'] = self.packages['lvm']
+    if (answers['lvm'] is True) or (self.system['lvm'] is True):
+        drive['lvm'] = self.packages['lvm']
+
+    # Set LVM volume group and LUKS mapper names (unique per install)
+    if (drive['name'] is not None) and (answers['lvm'] is True):
+        suffix = os.urandom(4).hex()
+        drive['volume_group'] = 'pyarchboot_{x}'.format(x=suffix)
+        if answers['luks'] is True:
+            drive['mapper'] = 'crypt_{x}'.format(x=suffix)
 
     # Set partition table
     if self.system['firmware'] == 'uefi':
-        self.user['drive']['table'] = 'gpt'
+        drive['table'] = 'gpt'
     else:
-        self.user['drive']['table'] = 'mbr'
-
-
-def partition_session(self):
-    """Set partition parameters of the current session."""
-    if self.user['drive']['name'] is not None:
-
-        # Set root size
-        if self.user['root_freespace'] is True:
-            self.user['root_size'] = 'freespace'
-
-        # Set partition parameters
-        self.user['partitions'] = {'name': ['boot', 'root'],
-                                   'size': [self.user['boot_size'],
-                                            self.user['root_size']],
-                                   'filesystem': ['fat32', 'ext4'],
-                                   'mountpoint': ['/mnt/boot', '/mnt'],
-                                   'mountorder': [1, 0]}
-
-        # Set swap size and filesystem
-        if 'Swap' in self.user['optional_partitions']:
-            self.user['partitions']['size'].insert(1, self.user['swap_size'])
-            self.user['partitions']['filesystem'].insert(1, 'swap')
-
-        # Set home size and filesystem
-        if 'Home' in self.user['optional_partitions']:
-            if self.user['home_freespace'] is True:
-                self.user['home_size'] = 'freespace'
-            self.user['partitions']['size'].append(self.user['home_size'])
-            self.user['partitions']['filesystem'].append('ext4')
-
-    # Custom partitions
+        drive['table'] = 'mbr'
+
+    return Drive(**drive)
+
+
+def partition_session(self, answers, drive):
+    """Get the partitions of the current session (Partition records).
+
+    Partitions are stored in partitioning order (boot, swap, root, home),
+    their drive id is set by the partitioner (or from the answers). With
+    LVM, the drive only gets the boot partition and the physical volume
+    (lvm), the other partitions are logical volumes.
+    """
+    swap = (('Swap' in answers['optional_partitions']) and
+            (answers['swap_type'] == 'partition')) or \
+        (answers['swap_id'] is not None)
+    home = ('Home' in answers['optional_partitions']) or \
+        (answers['home_id'] is not None)
+
+    partitions = [
+        {'name': 'boot', 'mountpoint': self.root.join('boot'),
+         'mountorder': 1},
+        {'name': 'root', 'mountpoint': str(self.root), 'mountorder': 0}]
+    if swap is True:
+        partitions.insert(1, {'name': 'swap', 'mountpoint': 'swap',
+                              'mountorder': 2})
+    if home is True:
+        partitions.append({'name': 'home',
+                           'mountpoint': self.root.join('home'),
+                           'mountorder': 3})
+
+    if drive['name'] is not None:
+
+        # Set sizes (root and home can use the free space)
+        sizes = {'boot': ByteSize.parse(answers['boot_size'])}
+        for name in ['root', 'home']:
+            if (name == 'home') and (home is not True):
+                continue
+            if answers['{x}_freespace'.format(x=name)] is True:
+                sizes[name] = 'freespace'
+            else:
+                sizes[name] = ByteSize.parse(
+                    answers['{x}_size'.format(x=name)])
+        if swap is True:
+            sizes['swap'] = ByteSize.parse(answers['swap_size'])
+
+        # Set sizes and filesystems
+        for partition in partitions:
+            partition['size'] = sizes[partition['name']]
+            partition['filesystem'] = {'boot': 'fat32', 'swap': 'swap'}.get(
+                partition['name'], 'ext4')
+
+        # LVM physical volume (remaining space, not formatted)
+        if drive['volume_group'] is not None:
+            partitions.insert(1, {'name': 'lvm', 'size': 'freespace'})
+
+    # Custom partitions (drive IDs of the answers)
     else:
+        for partition in partitions:
+            partition['drive_id'] = answers['{x}_id'.format(
+                x=partition['name'])].split()[0]
 
-        # Set partition parameters
-        self.user['partitions'] = {
-            'name': ['boot', 'root'],
-            'drive_id': [self.user['boot_id'].split()[0],
-                         self.user['root_id'].split()[0]],
-            'mountpoint': ['/mnt/boot', '/mnt'],
-            'mountorder': [1, 0]}
-
-        # Set swap drive ID
-        if self.user['swap_id'] is not None:
-            self.user['partitions']['drive_id'].insert(
-                1, self.user['swap_id'].split()[0])
-
-        # Set home drive ID
-        if self.user['home_id'] is not None:
-            self.user['partitions']['drive_id'].append(
-                self.user['home_id'].split()[0])
-
-    # Set swap parameters
-    if ('Swap' in self.user['optional_partitions']) or \
-            (self.user['swap_id'] is not None):
-        self.user['partitions']['name'].insert(1, 'swap')
-        self.user['partitions']['mountpoint'].insert(1, 'swap')
-        self.user['partitions']['mountorder'].insert(1, 2)
-
-    # Set home parameters
-    if 'Home' in self.user['optional_partitions'] or \
-            (self.user['home_id'] is not None):
-        self.user['partitions']['name'].append('home')
-        self.user['partitions']['mountpoint'].append('/mnt/home')
-        self.user['partitions']['mountorder'].append(3)
-
-
-def vga_session(self):
-    """Set VGA controller parameters of the current session."""
-    gpu_driver = None
-    if self.user['gpu_driver'] is True:
+    return tuple(Partition(**partition) for partition in partitions)
 
-        # NVIDIA controller - append packages
-        if 'nvidia' in self.user['vga_controller'].lower():
 
-            if self.user['gpu_proprietary'] is True:
-                hardvideo = self.packages['hardvideo'][3]
+def swap_session(self, answers):
+    """Get the swap of the current session (Swap record)."""
+    if 'Swap' not in answers['optional_partitions']:
+        return Swap(zswap=False)
 
-                if self.user['kernel'] == 'linux':
-                    gpu_driver = self.packages['gpu_driver'][3]
+    swap = {'type': answers['swap_type'],
+            'zswap': (answers['zswap'] is True) and
+                     (answers['swap_type'] != 'zram')}
 
-                elif self.user['kernel'] == 'linux-lts':
-                    gpu_driver = self.packages['gpu_driver'][4]
+    # Set swap file size
+    if answers['swap_type'] == 'swapfile':
+        swap['size'] = ByteSize.parse(answers['swapfile_size'])
 
-                else:
-                    gpu_driver = self.packages['gpu_driver'][5]
+    # Set zram size from the memory of the installed machine (MiB)
+    elif answers['swap_type'] == 'zram':
+        swap['size'] = 'min(ram / 2, 8192)'
+        swap['packages'] = self.packages['zram']
 
-            else:
-                gpu_driver = self.packages['gpu_driver'][2]
-                hardvideo = self.packages['hardvideo'][2]
+    return Swap(**swap)
 
-        # AMD Controller - append packages
-        elif ('ATI' in self.user['vga_controller']) or \
-                ('AMD' in self.user['vga_controller']):
 
-            gpu_driver = self.packages['gpu_driver'][1]
-            hardvideo = self.packages['hardvideo'][1]
+def kernel_session(self, answers):
+    """Get the kernel packages of the current session."""
+    return tuple(self.packages['kernel'][kernel]
+                 for kernel in sorted(answers['kernel']))
 
-        # Intel controller - append packages
-        elif 'intel' in self.user['vga_controller'].lower():
-            gpu_driver = self.packages['gpu_driver'][0]
-            hardvideo = self.packages['hardvideo'][0]
 
-        # Unreconized controller - append packages
-        else:
-            gpu_driver = self.packages['gpu_driver'][6]
-            hardvideo = self.packages['hardvideo'][4]
+def vga_session(self, answers, kernels):
+    """Get the VGA controller of the current session (Gpu record).
 
-    # Set model with corresponding driver
-    self.user['gpu'] = {'model': self.user['vga_controller'],
-                        'driver': gpu_driver,
-                        'hardvideo': self.user['hardvideo']}
+    Drivers of every detected GPU are installed (e.q., hybrid Intel and
+    NVIDIA graphics), proprietary ones per installed kernel.
+    """
+    gpu_driver = None
+    hardvideo = None
+    if answers['gpu_driver'] is True:
+        rules = gpu_rules(self.hardware, gpu_devices(
+            answers['vga_controller'], self.system['hardware']['gpu']))
+        gpu_driver, hardvideo = gpu_packages(
+            rules, kernels, proprietary=answers['gpu_proprietary'] is True)
 
     # Set hardware video acceleration
-    if self.user['hardvideo'] is True:
-        self.user['gpu']['hardvideo'] = hardvideo
-
+    if answers['hardvideo'] is not True:
+        hardvideo = answers['hardvideo']
 
-def desktop_session(self):
-    """Set desktop environment parameters of the current session."""
-    self.user['desktop_environment'] = {'name': self.user['desktop']}
-    if self.user['desktop'] is not None:
+    # Set model with corresponding driver
+    return Gpu(model=answers['vga_controller'], driver=gpu_driver,
+               hardvideo=hardvideo)
 
-        # Append required packages
-        if self.user['desktop'] in [10, 11, 12]:
-            self.user['desktop_environment']['requirements'] = \
-                '{xorg} {xinit} {numlock}'.format(
-                    xorg=self.packages['xorg'],
-                    xinit=self.packages['xinit'],
-                    numlock=self.packages['numlock'])
-        else:
-            self.user['desktop_environment']['requirements'] = \
-                '{xorg} {numlock}'.format(xorg=self.packages['xorg'],
-                                          numlock=self.packages['numlock'])
 
-        # Set desktop environment name
-        self.user['desktop_environment']['name'] = \
-            self.packages['desktop']['name'][self.user['desktop']]
+def desktop_session(self, answers):
+    """Get the desktop environment of the current session (Desktop)."""
+    desktop = answers['desktop']
+    if desktop is None:
+        return Desktop()
 
-        # Append desktop environment packages
-        self.user['desktop_environment']['packages'] = \
-            self.packages['desktop']['packages'][self.user['desktop']]
+    # Append required packages
+    if desktop in [10, 11, 12]:
+        requirements = '{xorg} {xinit} {numlock}'.format(
+            xorg=self.packages['xorg'], xinit=self.packages['xinit'],
+            numlock=self.packages['numlock'])
+    else:
+        requirements = '{xorg} {numlock}'.format(
+            xorg=self.packages['xorg'], numlock=self.packages['numlock'])
 
-        # Append desktop environment extra packages
-        if self.user['desktop_extra'] is True:
-            self.user['desktop_environment']['packages'] += ' {x}'.format(
-                x=self.packages['desktop']['extras'][self.user['desktop']])
+    # Append desktop environment (and extra) packages
+    packages = self.packages['desktop']['packages'][desktop]
+    if answers['desktop_extra'] is True:
+        packages += ' {x}'.format(
+            x=self.packages['desktop']['extras'][desktop])
 
-        # Set start command
-        self.user['desktop_environment']['startcmd'] = \
-            self.packages['desktop']['startcmd'][self.user['desktop']]
+    # Set name and start command
+    return Desktop(name=self.packages['desktop']['name'][desktop],
+                   requirements=requirements, packages=packages,
+                   startcmd=self.packages['desktop']['startcmd'][desktop])
 
 
-def display_session(self):
-    """Set display manager parameters of the current session."""
-    self.user['display_manager'] = {'name': self.user['display']}
-    if self.user['display'] is not None:
+def display_session(self, answers):
+    """Get the display manager of the current session (Display record)."""
+    display = answers['display']
+    if display is None:
+        return Display()
 
-        # Set display manager name
-        self.user['display_manager']['name'] = \
-            self.packages['display_manager']['name'][self.user['display']]
+    # Append display manager packages
+    packages = self.packages['display_manager']['packages'][display]
+    session = None
 
-        # Append display manager packages
-        self.user['display_manager']['packages'] = \
-            self.packages['display_manager']['packages'][self.user['display']]
+    # Append display manager greeter
+    if answers['greeter'] is not None:
+        packages += ' {x}'.format(
+            x=self.packages['greeter']['packages'][answers['greeter']])
+        session = self.packages['greeter']['session'][answers['greeter']]
 
-        # Append display manager greeter
-        if self.user['greeter'] is not None:
-            self.user['display_manager']['packages'] += ' {x}'.format(
-                x=self.packages['greeter']['packages'][self.user['greeter']])
+    # Set display manager name
+    return Display(name=self.packages['display_manager']['name'][display],
+                   packages=packages, session=session)
 
-            self.user['display_manager']['session'] = \
-                self.packages['greeter']['session'][self.user['greeter']]
 
+def system_session(self, answers):
+    """Get the system entries of the current session (cpu, passwords...).
 
-def system_session(self):
-    """Set system parameters of the current session."""
-    self.user['kernel'] = self.packages['kernel'][self.user['kernel']]
+    Returns
+    -------
+        "Dictionary containing the system entries"
+    """
+    system = {}
 
     # Set cpu parameters
-    if 'intel' in self.system['cpu'].lower():
-        self.user['cpu'] = {'name': self.system['cpu'],
-                            'microcode': self.packages['microcode'][0]}
-    elif 'AMD' in self.system['cpu']:
-        self.user['cpu'] = {'name': self.system['cpu'],
-                            'microcode': self.packages['microcode'][1]}
-    else:
-        self.user['cpu'] = {'name': self.system['cpu'], 'microcode': None}
+    system['cpu'] = Cpu(name=self.system['cpu'], microcode=cpu_microcode(
+        self.hardware, {'name': self.system['cpu'],
+                        'vendor': self.system['hardware']['cpu']}))
 
-    # Crypt and append passwords
-    rootpasswd = crypt(self.user['root_passwd'], mksalt(METHOD_SHA512))
-    userpasswd = crypt(self.user['user_passwd'], mksalt(METHOD_SHA512))
-    self.user['passwords'] = {'root': rootpasswd, 'user': userpasswd}
+    # Crypt the passwords (plain text ones are not stored)
+    system['passwords'] = {
+        'root': crypt(answers['root_passwd'], mksalt(METHOD_SHA512)),
+        'user': crypt(answers['user_passwd'], mksalt(METHOD_SHA512))}
 
     # Set keymap
     if 'keymap' not in self.system:
-        self.user['keymap'] = self.user['language'].split('_')[0]
+        system['keymap'] = answers['language'].split('_')[0]
     else:
-        self.user['keymap'] = self.system['keymap']
+        system['keymap'] = self.system['keymap']
 
     # Append NTFS packages
-    self.user['ntfs'] = self.system['ntfs']
+    system['ntfs'] = self.system['ntfs']
     if self.system['ntfs'] is True:
-        self.user['ntfs'] = self.packages['ntfs']
-
-    # Set system firmware
-    self.user['firmware'] = {'type': self.system['firmware'],
-                             'version': self.system['efi'],
-                             'driver': self.user['firmware']}
+        system['ntfs'] = self.packages['ntfs']
 
-    # Append firmware packages
-    if self.user['firmware']['driver'] is True:
-        self.user['firmware']['driver'] = self.packages['firmware']
+    # Set system firmware (and its packages)
+    driver = answers['firmware']
+    if driver is True:
+        driver = self.packages['firmware']
+    system['firmware'] = Firmware(type=self.system['firmware'],
+                                  version=self.system['efi'], driver=driver)
 
     # Set mirrorlist
-    self.user['mirrorlist'] = self.system['mirrorlist']
-
-
-def clean_session(self):
-    """Delete unused parameters of the current session."""
-    unused_entries = ['root_freespace', 'home_freespace', 'hardvideo',
-                      'optional_partitions', 'boot_id', 'greeter', 'display',
-                      'boot_size', 'root_size', 'swap_size', 'home_size',
-                      'root_id', 'lvm', 'swap_id', 'home_id', 'luks',
-                      'user_passwd', 'root_passwd', 'desktop', 'gpu_driver',
-                      'vga_controller', 'gpu_proprietary', 'desktop_extra']
-
-    for unused in unused_entries:
-        del self.user[unused]
+    system['mirrorlist'] = self.system['mirrorlist']
+
+    # Set AUR packages (AUR Helper first)
+    packages = []
+    if answers['aur_helper'] is not None:
+        for package in [answers['aur_helper'].lower()] + \
+                (answers['aur_packages'] or '').split():
+            if package not in packages:
+                packages.append(package)
+    system['aur_packages'] = tuple(packages)
+
+    return system
+
+
+def boot_session(self, answers, swap):
+    """Get the boot profile of the current session."""
+    boot = dict(self.boot['profiles'][answers['boot_profile']])
+    boot['profile'] = answers['boot_profile']
+
+    # Set zswap parameters (answer of the user, profile is its default),
+    # only with a swap device and never on top of zram
+    boot['zswap'] = False
+    if (swap['type'] in ['partition', 'swapfile']) and \
+            (swap['zswap'] is True):
+        boot['zswap'] = dict(self.boot['zswap'])
+
+    return boot
+
+
+def build_session(self, answers):
+    """Build the session of the installation from the answers.
+
+    Arguments
+    ---------
+        answers: "Dictionary containing user's answers"
+
+    Submodules
+    ----------
+        `drive_session`: "Get the drive of the current session"
+        `partition_session`: "Get the partitions of the current session"
+        `swap_session`: "Get the swap of the current session"
+        `kernel_session`: "Get the kernel packages of the current session"
+        `vga_session`: "Get the VGA controller of the current session"
+        `desktop_session`: "Get the desktop environment of the session"
+        `display_session`: "Get the display manager of the session"
+        `system_session`: "Get the system entries of the current session"
+        `boot_session`: "Get the boot profile of the current session"
+
+    Returns
+    -------
+        "UserSession record"
+    """
+    drive = drive_session(self, answers)
+    swap = swap_session(self, answers)
+    kernels = kernel_session(self, answers)
+
+    return UserSession(
+        hostname=answers['hostname'], timezone=answers['timezone'],
+        language=answers['language'], username=answers['username'],
+        power=answers['power'], aur_helper=answers['aur_helper'],
+        ccache=answers['ccache'], confirm=answers['confirm'],
+        kernel=kernels, drive=drive,
+        partitions=partition_session(self, answers, drive), swap=swap,
+        gpu=vga_session(self, answers, kernels),
+        desktop_environment=desktop_session(self, answers),
+        display_manager=display_session(self, answers),
+        boot=boot_session(self, answers, swap),
+        **system_session(self, answers))
 
 
 # PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Startup timings (import and init time per module and probe)
+STARTUP = {'started': time.perf_counter(), 'timings': []}
+STARTUP['mark'] = STARTUP['started']
+
+
+def startup_record(name, started):
+    """Store the time of a startup step.
+
+    Arguments
+    ---------
+        name: "String containing the name of the step"
+        started: "Float of `time.perf_counter` when the step started"
+
+    Returns
+    -------
+        "Float of `time.perf_counter` when the step ended"
+    """
+    ended = time.perf_counter()
+    STARTUP['timings'].append({'name': name,
+                               'seconds': round(ended - started, 4)})
+    return ended
+
+
+def startup_mark(name):
+    """Store the time since the previous mark (e.q., top-level imports).
+
+    Arguments
+    ---------
+        name: "String containing the name of the step"
+    """
+    STARTUP['mark'] = startup_record(name, STARTUP['mark'])
+
+
+def lazy_import(name):
+    """Import a module when the phase that needs it starts.
+
+    Arguments
+    ---------
+        name: "String containing the module name (e.q., coloredlogs)"
+
+    Modules
+    -------
+        importlib: "The implementation of import"
+
+    Returns
+    -------
+        "The imported module"
+    """
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    startup_record('import {name}'.format(name=name), started)
+    return module
+
+
+def startup_call(function, *args, **kwargs):
+    """Run an init function and store its time (e.q., get_ipinfo).
+
+    Arguments
+    ---------
+        function: "Function to run"
+        args, kwargs: "Arguments of the function"
+
+    Returns
+    -------
+        "The return value of the function"
+    """
+    started = time.perf_counter()
+    output = function(*args, **kwargs)
+    startup_record(function.__name__, started)
+    return output
+
+
+def startup_background(function, *args, **kwargs):
+    """Run an init function in a background thread (e.q., get_ipinfo).
+
+    Arguments
+    ---------
+        function: "Function to run"
+        args, kwargs: "Arguments of the function"
+
+    Modules
+    -------
+        threading: "Thread-based parallelism"
+
+    Returns
+    -------
+        "Function waiting for the return value (exception raised again)"
+    """
+    output = {}
+
+    def background():
+        try:
+            output['value'] = startup_call(function, *args, **kwargs)
+        except BaseException as background_error:
+            output['error'] = background_error
+
+    thread = threading.Thread(target=background, daemon=True)
+    thread.start()
+
+    def result():
+        thread.join()
+        if 'error' in output:
+            raise output['error']
+
+        return output['value']
+
+    return result
+
+
+def startup_report(logs):
+    """Report the startup timings (console and {logs}/startup-profile.json).
+
+    Lazy imports done by a probe are also included in the time of
+    the probe.
+
+    Arguments
+    ---------
+        logs: "String containing the logs folder"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        logging: "Event logging system for applications and libraries"
+
+    Returns
+    -------
+        "Dictionary containing the timings and the total time"
+    """
+    report = {'timings': STARTUP['timings'],
+              'total': round(time.perf_counter() - STARTUP['started'], 4)}
+
+    for timing in report['timings']:
+        logging.info('{seconds:>8.3f}s  {name}'.format(**timing))
+    logging.info('{total:>8.3f}s  total'.format(total=report['total']))
+
+    with open(os.path.join(logs, 'startup-profile.json'), 'w',
+              encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+
+    return report
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Network lookups cache folder
+CACHE = os.environ.get('PYARCHBOOT_CACHE', 'cache/network')
+
+# Seconds a lookup is fresh, then served stale while it is refreshed
+CACHE_TTL = {'ipinfo': (3600, 86400),
+             'mirrorlist': (21600, 604800)}
+
+
+def network_key():
+    """Get the MAC addresses of the network interfaces (cache key).
+
+    Modules
+    -------
+        glob: "Unix style pathname pattern expansion"
+
+    Returns
+    -------
+        "String containing the sorted MAC addresses"
+    """
+    addresses = []
+    for address in glob.glob('/sys/class/net/*/address'):
+        if address.split('/')[-2] == 'lo':
+            continue
+
+        with open(address, 'r') as file:
+            mac = file.read().strip()
+
+        if mac and (mac != '00:00:00:00:00:00'):
+            addresses.append(mac)
+
+    return ' '.join(sorted(addresses))
+
+
+def cache_file(name, key):
+    """Get the cache file of a lookup.
+
+    Arguments
+    ---------
+        name: "String containing the lookup name (ipinfo, mirrorlist)"
+        key: "String containing the cache key (MAC, public IP...)"
+
+    Modules
+    -------
+        hashlib: "Secure hashes and message digests"
+
+    Returns
+    -------
+        "String containing the path of the cache file"
+    """
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE, '{name}-{digest}.json'.format(
+        name=name, digest=digest))
+
+
+def cache_read(file):
+    """Read a cached lookup.
+
+    Arguments
+    ---------
+        file: "String containing the path of the cache file"
+
+    Returns
+    -------
+        "Dictionary containing the time and the value (or None)"
+    """
+    try:
+        with open(file, 'r', encoding='utf-8') as cache:
+            return json.load(cache)
+
+    except (OSError, ValueError):
+        return None
+
+
+def cache_write(file, value):
+    """Store a lookup (atomic replace).
+
+    Arguments
+    ---------
+        file: "String containing the path of the cache file"
+        value: "Value of the lookup (JSON)"
+    """
+    try:
+        os.makedirs(CACHE, exist_ok=True)
+        temporary = '{file}.{pid}.{thread}.tmp'.format(
+            file=file, pid=os.getpid(), thread=threading.get_ident())
+        with open(temporary, 'w', encoding='utf-8') as cache:
+            json.dump({'time': time.time(), 'value': value}, cache,
+                      ensure_ascii=False)
+
+        os.replace(temporary, file)
+
+    except OSError as cache_error:
+        logging.debug('can not store cache {file}: {error}'
+                      .format(file=file, error=cache_error))
+
+
+def cache_refresh(file, fetch):
+    """Run a lookup and store its value (background revalidation).
+
+    Arguments
+    ---------
+        file: "String containing the path of the cache file"
+        fetch: "Function of the lookup (None or False on failure)"
+
+    Returns
+    -------
+        "Value of the lookup"
+    """
+    value = fetch()
+    if value not in (None, False):
+        cache_write(file, value)
+
+    return value
+
+
+def cached_lookup(name, key, fetch):
+    """Get a network lookup from the cache (stale-while-revalidate).
+
+    A fresh value is returned as is. A stale one is returned at once
+    and refreshed in the background. An expired (or missing) one is
+    fetched again, and the last known value is used when the network
+    is not available.
+
+    Arguments
+    ---------
+        name: "String containing the lookup name (see CACHE_TTL)"
+        key: "String containing the cache key (MAC, public IP...)"
+        fetch: "Function of the lookup (None or False on failure)"
+
+    Modules
+    -------
+        threading: "Thread-based parallelism"
+        logging: "Event logging system for applications and libraries"
+
+    Returns
+    -------
+        "Value of the lookup (None or False on failure)"
+    """
+    fresh, stale = CACHE_TTL[name]
+    file = cache_file(name, key)
+    cache = cache_read(file)
+    age = None
+    if cache is not None:
+        age = time.time() - cache['time']
+
+    if (age is not None) and (0 <= age < fresh):
+        return cache['value']
+
+    if (age is not None) and (0 <= age < fresh + stale):
+        threading.Thread(target=cache_refresh, args=(file, fetch),
+                         daemon=True).start()
+        return cache['value']
+
+    value = cache_refresh(file, fetch)
+    if (value in (None, False)) and (cache is not None):
+        logging.warning('{name} lookup failed, using cache from {date}'
+                        .format(name=name, date=time.strftime(
+                            '%Y-%m-%d %H:%M', time.localtime(cache['time']))))
+        return cache['value']
+
+    return value
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import socket
+from logging.handlers import QueueHandler, QueueListener
+
+from .logger import LOG_FIELDS, StepFilter
+from .model import Record
+from .unix_command import LOGS
+
+# Session entries of the final event (no passwords)
+EVENT_SUMMARY = ['hostname', 'username', 'timezone', 'language', 'kernel',
+                 'firmware', 'boot', 'desktop_environment', 'display_manager',
+                 'drive', 'partitions']
+
+
+def event_default(value):
+    """Get the JSON value of an event field (records as objects).
+
+    Arguments
+    ---------
+        value: "Object not serializable by json"
+
+    Returns
+    -------
+        "Dictionary of a record or string of the object"
+    """
+    if isinstance(value, Record):
+        return value.as_dict()
+
+    return str(value)
+
+
+def open_events(target):
+    """Open the event stream (file descriptor or local UNIX socket).
+
+    Arguments
+    ---------
+        target: "String containing fd:{number} or unix:{path}"
+
+    Modules
+    -------
+        socket: "Low-level networking interface"
+
+    Raises
+    ------
+        ValueError: "Invalid event stream"
+        OSError: "File descriptor or socket not available"
+
+    Returns
+    -------
+        "Text stream of the events (line buffered)"
+    """
+    kind, _, address = target.partition(':')
+    if (kind == 'fd') and address.isdigit():
+        return os.fdopen(int(address), 'w', buffering=1, encoding='utf-8',
+                         closefd=False)
+
+    if (kind == 'unix') and address:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(address)
+        return client.makefile('w', buffering=1, encoding='utf-8')
+
+    raise ValueError('invalid event stream: {target}'.format(target=target))
+
+
+class EventHandler(logging.Handler):
+    """Write the events as JSON lines (one object per line).
+
+    Events are the records with an `event` field (phase start and end,
+    step, result), the progress records (progress) and the exit records of
+    the commands (command). Other records are ignored.
+
+    Arguments
+    ---------
+        stream: "Text stream of the events"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+    """
+
+    def __init__(self, stream):
+        """Set the stream and the source of the events."""
+        super().__init__(logging.DEBUG)
+        self.stream = stream
+        self.source = {'pid': os.getpid(), 'logs': os.path.abspath(LOGS)}
+
+    def emit(self, record):
+        """Write the event of the record (if any)."""
+        event = getattr(record, 'event', None)
+        if event is None:
+            if getattr(record, 'progress', None) is not None:
+                event = 'progress'
+            elif getattr(record, 'exit_code', None) is not None:
+                event = 'command'
+            else:
+                return
+
+        entry = dict({'event': event, 'time': record.created}, **self.source)
+        for field in LOG_FIELDS:
+            if (field != 'event') and \
+                    (getattr(record, field, None) is not None):
+                entry[field] = getattr(record, field)
+
+        # The install goes on without the collector
+        if self.stream is not None:
+            try:
+                self.stream.write('{event}\n'.format(event=json.dumps(
+                    entry, ensure_ascii=False, default=event_default)))
+                self.stream.flush()
+
+            except (OSError, ValueError):
+                self.stream = None
+
+
+def setup_events(target):
+    """Start the event stream (queue and background writer).
+
+    Records are put in a queue by the application threads and the
+    events are written by a listener thread, as for the log files.
+
+    Arguments
+    ---------
+        target: "String containing fd:{number} or unix:{path}"
+
+    Modules
+    -------
+        logging.handlers: "Queue handler and listener"
+        atexit: "Stop the listener (flush the queue) at exit"
+
+    Submodules
+    ----------
+        `open_events`: "Open the event stream"
+        `EventHandler`: "Write the events as JSON lines"
+
+    Returns
+    -------
+        "QueueListener of the event stream"
+    """
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(StepFilter())
+    logging.getLogger().addHandler(queue_handler)
+
+    listener = QueueListener(records, EventHandler(open_events(target)))
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
+
+
+def session_summary(user):
+    """Get the summary of the session (final event).
+
+    Arguments
+    ---------
+        user: "Dictionary containing user's answers (or None)"
+
+    Returns
+    -------
+        "Dictionary containing the session entries (see EVENT_SUMMARY)"
+    """
+    if not user:
+        return None
+
+    summary = {entry: user[entry] for entry in EVENT_SUMMARY
+               if entry in user}
+    if 'username' in user:
+        summary['file'] = os.path.abspath(os.path.join(
+            LOGS, '{x}.json'.format(x=user['username'])))
+
+    return summary
+
+
+def result_event(self, error=None):
+    """Send the final event (success or failure) once.
+
+    Keyword Arguments
+    -----------------
+        `error`: "Exit code or exception of a failure" (default: None)
+
+    Submodules
+    ----------
+        `session_summary`: "Summary of the session"
+    """
+    if getattr(self, 'result', None) is not None:
+        return
+
+    self.result = 'success' if error is None else 'failure'
+    logging.debug('installation {result}'.format(result=self.result),
+                  extra={'event': 'result', 'status': self.result,
+                         'error': None if error is None else str(error),
+                         'session': session_summary(
+                             getattr(self, 'user', None))})
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Hardware rules (json/hardware.json) match a device by its vendor id
+(PCI vendor or CPU vendor_id), optionally with its device ids, then
+by a pattern of its name (answers of another host, unknown ids). A GPU
+rule without vendor and pattern is used when no other rule matches.
+
+Devices are dictionaries with a name and, when probed, a vendor and a
+device id (e.q., {'name': 'GP107M', 'vendor': '10de', 'device': '1c8d'}),
+so the rules can be checked against stored hardware probes.
+"""
+
+import re
+from shlex import split
+
+
+def hardware_index(rules):
+    """Compile the hardware rules into a lookup index (once at startup).
+
+    Arguments
+    ---------
+        rules: "Dictionary containing the hardware rules (hardware.json)"
+
+    Modules
+    -------
+        re: "Regular expression matching operations"
+
+    Returns
+    -------
+        "Dictionary containing the index of the GPU and CPU rules"
+    """
+    index = {}
+    for kind in ['gpu', 'cpu']:
+        index[kind] = {'ids': {}, 'patterns': [], 'default': None}
+        for rule in rules.get(kind, []):
+
+            if rule.get('vendor') is not None:
+                vendor = rule['vendor'].lower()
+                for device in rule.get('devices', [None]):
+                    index[kind]['ids'].setdefault(
+                        (vendor, device and device.lower()), rule)
+
+            if rule.get('pattern') is not None:
+                index[kind]['patterns'].append(
+                    (re.compile(rule['pattern']), rule))
+
+            if (rule.get('vendor') is None) and \
+                    (rule.get('pattern') is None):
+                index[kind]['default'] = rule
+
+    return index
+
+
+def cpuinfo_vendor(cpuinfo):
+    """Get the vendor id of the processor (/proc/cpuinfo).
+
+    Arguments
+    ---------
+        cpuinfo: "String containing the content of /proc/cpuinfo"
+
+    Returns
+    -------
+        "String containing the vendor id (None if not reported)"
+    """
+    for line in cpuinfo.split('\n'):
+        if line.startswith('vendor_id'):
+            return line.split(':')[-1].strip()
+
+    return None
+
+
+def lspci_devices(output):
+    """Get the display controllers (VGA, 3D and other display classes).
+
+    Arguments
+    ---------
+        output: "String containing the output of lspci -mm -nn"
+
+    Modules
+    -------
+        re: "Regular expression matching operations"
+        shlex: "Simple lexical analysis (lspci fields)"
+
+    Returns
+    -------
+        "Array of the GPU devices"
+    """
+    devices = []
+    for line in output.split('\n'):
+        fields = split(line)
+        if (len(fields) < 4) or \
+                not re.search(r'\[03(00|02|80)\]$', fields[1]):
+            continue
+
+        vendor = re.match(r'^(.*?)\s*\[([0-9a-f]{4})\]$', fields[2])
+        device = re.match(r'^(.*?)\s*\[([0-9a-f]{4})\]$', fields[3])
+        if (vendor is not None) and (device is not None):
+            devices.append({
+                'name': '{vendor} {device}'.format(vendor=vendor.group(1),
+                                                   device=device.group(1)),
+                'vendor': vendor.group(2),
+                'device': device.group(2)})
+
+    return devices
+
+
+def match_rule(index, kind, device):
+    """Get the rule of a device (ids first, then name).
+
+    Arguments
+    ---------
+        index: "Dictionary containing the hardware index"
+        kind: "String containing the device kind (gpu, cpu)"
+        device: "Dictionary containing the name, vendor and device ids"
+
+    Returns
+    -------
+        "Dictionary containing the rule (None if no rule matches)"
+    """
+    rules = index[kind]
+    vendor = (device.get('vendor') or '').lower()
+    for key in [(vendor, (device.get('device') or '').lower()),
+                (vendor, None)]:
+        if key in rules['ids']:
+            return rules['ids'][key]
+
+    for pattern, rule in rules['patterns']:
+        if pattern.search(device.get('name') or ''):
+            return rule
+
+    return None
+
+
+def gpu_devices(controller, detected):
+    """Get the GPU devices of the session (selected controller first).
+
+    Arguments
+    ---------
+        controller: "String containing the selected VGA controller"
+        detected: "Array of the probed GPU devices"
+
+    Returns
+    -------
+        "Array of the GPU devices"
+    """
+    return [{'name': controller}] + list(detected or [])
+
+
+def gpu_rules(index, devices):
+    """Get the rules of the GPUs (all of them, e.q., hybrid graphics).
+
+    Arguments
+    ---------
+        index: "Dictionary containing the hardware index"
+        devices: "Array of the GPU devices (selected one first)"
+
+    Submodules
+    ----------
+        `match_rule`: "Get the rule of a device"
+
+    Returns
+    -------
+        "Array of the matched rules (default rule if none)"
+    """
+    rules = []
+    for device in devices:
+        rule = match_rule(index, 'gpu', device)
+        if (rule is not None) and (rule not in rules):
+            rules.append(rule)
+
+    if not rules and (index['gpu']['default'] is not None):
+        rules.append(index['gpu']['default'])
+
+    return rules
+
+
+def gpu_packages(rules, kernels, proprietary=False):
+    """Get the driver and video acceleration packages of the GPUs.
+
+    Proprietary drivers are prebuilt for some kernels (packages of the
+    kernel), the default ones ({kernel} is the kernel name) are built
+    by dkms. When a kernel has no prebuilt driver, the default packages
+    are used for every kernel (e.q., nvidia-dkms and the headers of all
+    the kernels), prebuilt modules would conflict with them.
+
+    Arguments
+    ---------
+        rules: "Array of the GPU rules"
+        kernels: "Array of the installed kernels (e.q., linux-lts)"
+
+    Keyword Arguments
+    -----------------
+        `proprietary`: "Boolean to use proprietary drivers" (default: False)
+
+    Returns
+    -------
+        "Tuple of the driver and hardvideo packages (strings)"
+    """
+    drivers, hardvideo = [], []
+    for rule in rules:
+        source = rule
+        if (proprietary is True) and ('proprietary' in rule):
+            source = rule['proprietary']
+
+        driver = source['driver']
+        if isinstance(driver, dict):
+            if any(kernel not in driver for kernel in kernels):
+                driver = {'*': driver['*']}
+            driver = ' '.join(
+                driver.get(kernel, driver['*']).format(kernel=kernel)
+                for kernel in kernels)
+
+        for packages, selected in [(driver, drivers),
+                                   (source['hardvideo'], hardvideo)]:
+            for package in packages.split():
+                if package not in selected:
+                    selected.append(package)
+
+    return ' '.join(drivers), ' '.join(hardvideo)
+
+
+def cpu_microcode(index, cpu):
+    """Get the microcode package of the processor.
+
+    Arguments
+    ---------
+        index: "Dictionary containing the hardware index"
+        cpu: "Dictionary containing the name and the vendor id"
+
+    Submodules
+    ----------
+        `match_rule`: "Get the rule of a device"
+
+    Returns
+    -------
+        "String containing the microcode package (None if unknown)"
+    """
+    rule = match_rule(index, 'cpu', cpu)
+    if rule is None:
+        return None
+
+    return rule.get('microcode')
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from .model import json_default
+
+# Log files rotation (bytes, backups)
+LOG_ROTATION = (16 * 1024 ** 2, 4)
+
+# Command output lines echoed to the console per second
+LOG_ECHO_RATE = 25
+
+# Current installer step (added to every record) and its start time
+LOG_CONTEXT = {'step': None, 'started': None}
+
+# Structured fields of the records (JSON lines)
+LOG_FIELDS = ['step', 'command', 'duration', 'exit_code', 'progress',
+              'event', 'group', 'status', 'error', 'session']
+
+
+class StepFilter(logging.Filter):
+    """Add the current installer step to the records."""
+
+    def filter(self, record):
+        """Set the step of the record (main thread, before the queue)."""
+        if not hasattr(record, 'step'):
+            record.step = LOG_CONTEXT['step']
+
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format the records as JSON lines (machine-parsable logs).
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+    """
+
+    def format(self, record):
+        """Return the record as a JSON object."""
+        entry = {'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+                 'level': record.levelname,
+                 'module': record.module,
+                 'function': record.funcName,
+                 'line': record.lineno,
+                 'message': record.getMessage()}
+
+        for field in LOG_FIELDS:
+            if getattr(record, field, None) is not None:
+                entry[field] = getattr(record, field)
+
+        return json.dumps(entry, ensure_ascii=False, default=json_default)
+
+
+class EchoHandler(logging.StreamHandler):
+    """Echo the output lines of the commands (rate-limited).
+
+    Lines over LOG_ECHO_RATE per second are not displayed (the log
+    files still get them) and their number is displayed at the next
+    second or at the next command.
+
+    On a terminal, the progress of the command (phase, packages, rate
+    and ETA) is kept on the last line until the command exits.
+    """
+
+    def __init__(self, stream=None, rate=LOG_ECHO_RATE):
+        """Set the rate limit of the console."""
+        super().__init__(stream)
+        self.rate = rate
+        self.window = (None, 0)
+        self.count = 0
+        self.skipped = 0
+        self.status = None
+        self.live = getattr(self.stream, 'isatty', lambda: False)()
+        self.addFilter(lambda record: (
+            getattr(record, 'output', False) is True) or any(
+                getattr(record, field, None) is not None
+                for field in ('progress', 'exit_code')))
+
+    def write_status(self, status):
+        """Replace the progress line of the console.
+
+        Arguments
+        ---------
+            status: "String containing the progress (None to clear it)"
+        """
+        if self.status is not None:
+            self.stream.write('\r\033[K')
+
+        self.status = status
+        if status is not None:
+            self.stream.write(status)
+
+        self.flush()
+
+    def emit(self, record):
+        """Display the line if the rate limit is not reached."""
+        if getattr(record, 'progress', None) is not None:
+            if self.live:
+                self.write_status(record.getMessage())
+            return
+
+        if getattr(record, 'output', False) is not True:
+            if self.status is not None:
+                self.write_status(None)
+            return
+
+        status = self.status
+        if status is not None:
+            self.write_status(None)
+
+        window = (record.command, int(time.monotonic()))
+        if window != self.window:
+            if self.skipped > 0:
+                self.stream.write('[... {skipped} lines]{end}'.format(
+                    skipped=self.skipped, end=self.terminator))
+            self.window, self.count, self.skipped = window, 0, 0
+
+        self.count += 1
+        if self.count > self.rate:
+            self.skipped += 1
+        else:
+            super().emit(record)
+
+        if status is not None:
+            self.write_status(status)
+
+
+def setup_logging(logs):
+    """Start the logging pipeline (queue and background writer).
+
+    Records are put in a queue by the application threads and written
+    by a listener thread to:
+
+        {logs}/PyArchboot.log: "Text records (DEBUG)"
+        {logs}/PyArchboot.jsonl: "JSON lines records (DEBUG)"
+        console: "Colored records (INFO) and command output (rate-limited)"
+
+    Files are rotated by size and at each start (previous run kept).
+
+    Arguments
+    ---------
+        logs: "String containing the logs folder"
+
+    Modules
+    -------
+        coloredlogs: "Colored terminal output for logging"
+        logging.handlers: "Queue and rotating file handlers"
+        atexit: "Stop the listener (flush the queue) at exit"
+
+    Returns
+    -------
+        "QueueListener of the logging pipeline"
+    """
+    import coloredlogs
+
+    level = '%(asctime)s [%(levelname)s] %(pathname)s:%(lineno)d ' \
+            '[%(funcName)s]'
+    handlers = []
+
+    for file, formatter in [
+            ('PyArchboot.log', logging.Formatter(
+                '{level} %(message)s'.format(level=level))),
+            ('PyArchboot.jsonl', JsonFormatter())]:
+
+        handler = RotatingFileHandler(
+            os.path.join(logs, file), maxBytes=LOG_ROTATION[0],
+            backupCount=LOG_ROTATION[1], encoding='utf-8', delay=True)
+        if os.path.isfile(handler.baseFilename) and \
+                os.path.getsize(handler.baseFilename) > 0:
+            handler.doRollover()
+
+        handler.setLevel(logging.DEBUG)
+        handler.setFormatter(formatter)
+        handlers.append(handler)
+
+    # Create a logger for terminal output
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    console.setFormatter(coloredlogs.ColoredFormatter(
+        datefmt='%H:%M:%S',
+        fmt='[%(asctime)s] %(levelname)s > %(message)s',
+        level_styles={
+            'critical': {'bold': True, 'color': 'red'},
+            'debug': {'color': 'green'},
+            'error': {'color': 'red'},
+            'info': {'color': 'cyan'},
+            'warning': {'color': 'yellow', 'bold': True}},
+        field_styles={
+            'levelname': {'bold': True, 'color': 'green'},
+            'asctime': {'color': 'yellow'}}))
+    handlers.append(console)
+
+    # Output of the commands
+    echo = EchoHandler(sys.stdout)
+    echo.setLevel(logging.DEBUG)
+    handlers.append(echo)
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(StepFilter())
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from .size import ByteSize
+
+
+def build_record(record, fields):
+    """Build a record from its fields (pickle and copy).
+
+    Arguments
+    ---------
+        record: "Record class"
+        fields: "Dictionary containing the fields of the record"
+
+    Returns
+    -------
+        "Record of the fields"
+    """
+    return record(**fields)
+
+
+class Record:
+    """Immutable record of the session (fixed fields, JSON object).
+
+    Fields are read as attributes or as dictionary keys (e.q.,
+    drive.lvm or drive['lvm']), missing fields are None and a record
+    is changed by a copy (replace). Records are shared by the copies
+    of a session (no deep copy).
+
+    Keyword Arguments
+    -----------------
+        "Fields of the record" (default: None)
+
+    Raises
+    ------
+        TypeError: "Unknown field"
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        """Set the fields of the record."""
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.pop(name, None))
+
+        if fields:
+            raise TypeError('{record}: unknown fields {fields}'.format(
+                record=self.__class__.__name__,
+                fields=', '.join(sorted(fields))))
+
+    def __setattr__(self, name, value):
+        """Refuse to change a field (use replace)."""
+        raise AttributeError('{record} is immutable'.format(
+            record=self.__class__.__name__))
+
+    def __delattr__(self, name):
+        """Refuse to delete a field."""
+        raise AttributeError('{record} is immutable'.format(
+            record=self.__class__.__name__))
+
+    def __getitem__(self, name):
+        """Get a field (as the session dictionaries)."""
+        if name not in self.__slots__:
+            raise KeyError(name)
+
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        """Check a field name."""
+        return name in self.__slots__
+
+    def get(self, name, default=None):
+        """Get a field (default for unknown fields)."""
+        if name not in self.__slots__:
+            return default
+
+        return getattr(self, name)
+
+    def replace(self, **changes):
+        """Get a copy of the record with changed fields.
+
+        Keyword Arguments
+        -----------------
+            "Changed fields"
+
+        Returns
+        -------
+            "Record of the same class"
+        """
+        return self.__class__(**dict(self.as_dict(), **changes))
+
+    def as_dict(self):
+        """Get the fields of the record (JSON object).
+
+        Returns
+        -------
+            "Dictionary containing the fields"
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        """Compare the class and the fields."""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        return self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        """Hash of the fields."""
+        return hash((self.__class__, tuple(self.as_dict().values())))
+
+    def __copy__(self):
+        """Return the record (immutable)."""
+        return self
+
+    def __deepcopy__(self, memo):
+        """Return the record (immutable)."""
+        return self
+
+    def __reduce__(self):
+        """Return the record class and fields (pickle)."""
+        return build_record, (self.__class__, self.as_dict())
+
+    def __repr__(self):
+        """Return the representation of the record."""
+        return '{record}({fields})'.format(
+            record=self.__class__.__name__,
+            fields=', '.join('{name}={value!r}'.format(name=name, value=value)
+                             for name, value in self.as_dict().items()))
+
+
+class Drive(Record):
+    """Drive of the installation (name is None with custom partitions).
+
+    LVM installs have their own volume group and LUKS mapper names (not
+    shared with the host or with the other targets of a fleet).
+    """
+
+    __slots__ = ('name', 'size', 'model', 'boot', 'lvm', 'luks', 'table',
+                 'volume_group', 'mapper')
+
+
+class Partition(Record):
+    """Partition of the installation (in partitioning order)."""
+
+    __slots__ = ('name', 'size', 'filesystem', 'mountpoint', 'mountorder',
+                 'drive_id', 'partuuid')
+
+
+class Swap(Record):
+    """Swap of the installation (partition, swap file or zram).
+
+    The resume offset of a swap file is set by the installer.
+    """
+
+    __slots__ = ('type', 'size', 'zswap', 'packages', 'offset')
+
+
+class Gpu(Record):
+    """VGA controller and its driver packages."""
+
+    __slots__ = ('model', 'driver', 'hardvideo')
+
+
+class Desktop(Record):
+    """Desktop environment and its packages."""
+
+    __slots__ = ('name', 'requirements', 'packages', 'startcmd')
+
+
+class Display(Record):
+    """Display manager and its greeter session."""
+
+    __slots__ = ('name', 'packages', 'session')
+
+
+class Cpu(Record):
+    """Processor and its microcode package."""
+
+    __slots__ = ('name', 'microcode')
+
+
+class Firmware(Record):
+    """System firmware (bios or uefi) and its driver packages."""
+
+    __slots__ = ('type', 'version', 'driver')
+
+
+class UserSession(Record):
+    """Session of the installation (answers and probes, built once).
+
+    The partitioner and the installer store what they set (drive ids,
+    swap file offset) in a copy of the session (replace).
+    """
+
+    __slots__ = ('hostname', 'timezone', 'language', 'keymap', 'username',
+                 'passwords', 'kernel', 'drive', 'partitions', 'swap',
+                 'gpu', 'desktop_environment', 'display_manager', 'cpu',
+                 'firmware', 'ntfs', 'mirrorlist', 'boot', 'power',
+                 'aur_helper', 'aur_packages', 'ccache', 'confirm')
+
+
+# Records of the session entries
+SESSION_RECORDS = {'drive': Drive, 'swap': Swap, 'gpu': Gpu,
+                   'desktop_environment': Desktop,
+                   'display_manager': Display, 'cpu': Cpu,
+                   'firmware': Firmware}
+
+
+def find_partition(partitions, name):
+    """Get a partition of the session by name.
+
+    Arguments
+    ---------
+        partitions: "Array of the Partition records"
+        name: "String containing the partition name (boot, root...)"
+
+    Returns
+    -------
+        "Partition record (None if not in the session)"
+    """
+    for partition in partitions:
+        if partition.name == name:
+            return partition
+
+    return None
+
+
+def json_default(value):
+    """Get the JSON value of a record (json.dump default).
+
+    Arguments
+    ---------
+        value: "Object not serializable by json"
+
+    Raises
+    ------
+        TypeError: "Not a record"
+
+    Returns
+    -------
+        "Dictionary containing the fields of the record"
+    """
+    if isinstance(value, Record):
+        return value.as_dict()
+
+    raise TypeError('{type} is not JSON serializable'.format(
+        type=value.__class__.__name__))
+
+
+def session_model(session):
+    """Get the records of a stored session (journal or session file).
+
+    Sizes are ByteSize again, package arrays are tuples, and the
+    partitions of the previous format (one array per field) and its LVM
+    names (lvm, cryptlvm) are read as well. Unknown entries of the stored
+    session are ignored.
+
+    Arguments
+    ---------
+        session: "Dictionary containing the session (JSON)"
+
+    Submodules
+    ----------
+        `ByteSize`: "Immutable size in bytes"
+
+    Returns
+    -------
+        "UserSession record"
+    """
+    session = dict(session)
+    for key, record in SESSION_RECORDS.items():
+        if isinstance(session.get(key), dict):
+            session[key] = record(**{
+                name: value for name, value in session[key].items()
+                if name in record.__slots__})
+
+    if isinstance(session.get('drive'), Drive) and \
+            isinstance(session['drive'].size, int):
+        session['drive'] = session['drive'].replace(
+            size=ByteSize(session['drive'].size))
+
+    if isinstance(session.get('swap'), Swap) and \
+            isinstance(session['swap'].size, int):
+        session['swap'] = session['swap'].replace(
+            size=ByteSize(session['swap'].size))
+
+    # Volume names of the previous format
+    if isinstance(session.get('drive'), Drive) and \
+            (session['drive'].name is not None) and \
+            (session['drive'].lvm is not False) and \
+            (session['drive'].volume_group is None):
+        session['drive'] = session['drive'].replace(volume_group='lvm',
+                                                    mapper='cryptlvm')
+
+    partitions = session.get('partitions')
+    if isinstance(partitions, dict):
+        names = partitions.get('name', [])
+        partitions = [{name: values[index] for name, values
+                       in partitions.items() if index < len(values)}
+                      for index in range(len(names))]
+
+    if isinstance(partitions, list):
+        session['partitions'] = tuple(
+            Partition(**{name: value for name, value in partition.items()
+                         if name in Partition.__slots__})
+            if isinstance(partition, dict) else partition
+            for partition in partitions)
+
+        session['partitions'] = tuple(
+            partition.replace(size=ByteSize(partition.size))
+            if isinstance(partition.size, int) else partition
+            for partition in session['partitions'])
+
+    # Package arrays (tuples of the session)
+    for key in ['kernel', 'aur_packages']:
+        if isinstance(session.get(key), list):
+            session[key] = tuple(session[key])
+
+    return UserSession(**{name: value for name, value in session.items()
+                          if name in UserSession.__slots__})
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
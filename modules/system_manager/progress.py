@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import functools
+import json
+import logging
+import os
+import re
+import statistics
+import time
+
+from .logger import LOG_CONTEXT
+from .size import MIB, ByteSize
+
+# Timings of the previous installations (seconds per phase)
+PROGRESS_HISTORY = os.environ.get('PYARCHBOOT_TIMINGS', 'cache/timings.json')
+PROGRESS_RUNS = 5
+
+# Output lines of pacman/pacstrap, mkfs and LVM (stage, pattern)
+PROGRESS_PATTERNS = [
+    ('packages', re.compile(r'^Packages \((?P<total>\d+)\)')),
+    ('size', re.compile(
+        r'^Total Download Size:\s+(?P<size>[0-9.,]+\s*[KMGT]iB)')),
+    ('download', re.compile(r'^downloading (?P<item>\S+?)\.\.\.$')),
+    ('download', re.compile(r'^\s*(?P<item>\S+) downloading\.\.\.$')),
+    ('install', re.compile(
+        r'^\(\s*(?P<done>\d+)/(?P<total>\d+)\) '
+        r'(?:installing|upgrading|reinstalling) (?P<item>\S+?)\.*$')),
+    ('format', re.compile(
+        r'^(?P<item>Allocating group tables|Writing inode tables|'
+        r'Creating journal|Writing superblocks)[^:]*:\s*done')),
+    ('lvm', re.compile(
+        r'^\s*(?P<item>(?:Physical volume|Volume group|Logical volume) '
+        r'"[^"]+") (?:successfully )?created'))]
+
+
+@functools.lru_cache(maxsize=None)
+def phase_timings():
+    """Load the timings of the previous installations (once).
+
+    Modules
+    -------
+        functools: "Higher-order functions (cached loading)"
+        json: "JavaScript syntax data interchange format"
+
+    Returns
+    -------
+        "Dictionary containing the seconds of the last runs per phase"
+    """
+    try:
+        with open(PROGRESS_HISTORY, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    except (OSError, ValueError):
+        return {}
+
+
+def phase_estimate(phase):
+    """Get the expected duration of a phase (median of the last runs).
+
+    Arguments
+    ---------
+        phase: "String containing the phase (installer step) name"
+
+    Modules
+    -------
+        statistics: "Mathematical statistics functions"
+
+    Returns
+    -------
+        "Float of the expected seconds (None without history)"
+    """
+    runs = phase_timings().get(phase)
+    if not runs:
+        return None
+
+    return statistics.median(runs)
+
+
+def record_phase(phase, seconds):
+    """Store the duration of a phase (atomic replace, last runs only).
+
+    Arguments
+    ---------
+        phase: "String containing the phase (installer step) name"
+        seconds: "Float of the duration of the phase"
+
+    Modules
+    -------
+        json: "JavaScript syntax data interchange format"
+        logging: "Event logging system for applications and libraries"
+    """
+    timings = phase_timings()
+    timings[phase] = (timings.get(phase, []) + [seconds])[-PROGRESS_RUNS:]
+
+    try:
+        folder = os.path.dirname(PROGRESS_HISTORY)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        temporary = '{file}.{pid}.tmp'.format(file=PROGRESS_HISTORY,
+                                              pid=os.getpid())
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(timings, file, ensure_ascii=False, indent=4)
+
+        os.replace(temporary, PROGRESS_HISTORY)
+
+    except OSError as history_error:
+        logging.debug('can not store timings {file}: {error}'
+                      .format(file=PROGRESS_HISTORY, error=history_error))
+
+
+def format_progress(event):
+    """Format a progress event (live view of the console).
+
+    Arguments
+    ---------
+        event: "Dictionary containing the progress event"
+
+    Returns
+    -------
+        "String containing the progress (e.q., install 12/345 ETA 01:32)"
+    """
+    status = ['[{phase}]'.format(phase=event['phase'] or '-'),
+              event['stage']]
+
+    if event['total'] is not None:
+        status.append('{done}/{total}'.format(**event))
+    elif event['done'] is not None:
+        status.append(str(event['done']))
+
+    if event['item'] is not None:
+        status.append(event['item'])
+
+    if event['rate'] is not None:
+        status.append('{rate:.1f} MB/s'.format(rate=event['rate']))
+
+    if event['eta'] is not None:
+        status.append('ETA {minutes:02d}:{seconds:02d}'.format(
+            minutes=event['eta'] // 60, seconds=event['eta'] % 60))
+
+    return ' '.join(status)
+
+
+class Progress:
+    """Progress of a command (parsed from its output lines).
+
+    Packages done/total are read from pacman, the download rate is
+    estimated from the total download size and the downloaded packages,
+    and the ETA is computed from the progress of the stage or, when
+    unknown, from the timings of the previous installations.
+
+    Arguments
+    ---------
+        command: "String containing the shell command"
+
+    Submodules
+    ----------
+        `phase_estimate`: "Expected duration of a phase"
+        `ByteSize`: "Immutable size in bytes"
+    """
+
+    def __init__(self, command):
+        """Start the progress of the command (current phase)."""
+        self.command = command
+        self.phase = LOG_CONTEXT['step']
+        self.started = time.monotonic()
+        self.packages = None
+        self.size = None
+        self.downloaded = 0
+        self.stages = {}
+
+    def eta(self, stage, done, total):
+        """Get the remaining seconds of the stage (or of the phase).
+
+        Arguments
+        ---------
+            stage: "String containing the stage (download, install...)"
+            done: "Integer of the completed items (or None)"
+            total: "Integer of the items of the stage (or None)"
+
+        Returns
+        -------
+            "Integer of the remaining seconds (None if unknown)"
+        """
+        if done and total:
+            elapsed = time.monotonic() - self.stages[stage]
+            return int(elapsed / done * max(total - done, 0))
+
+        estimate = phase_estimate(self.phase)
+        if (estimate is None) or (LOG_CONTEXT.get('started') is None):
+            return None
+
+        return int(max(estimate - (time.monotonic() -
+                                   LOG_CONTEXT['started']), 0))
+
+    def update(self, line):
+        """Parse an output line of the command.
+
+        Arguments
+        ---------
+            line: "String containing the output line"
+
+        Returns
+        -------
+            "Dictionary containing the progress event (or None)"
+        """
+        for stage, pattern in PROGRESS_PATTERNS:
+            match = pattern.match(line)
+            if match is not None:
+                break
+        else:
+            return None
+
+        fields = match.groupdict()
+        if stage == 'packages':
+            self.packages = int(fields['total'])
+            return None
+
+        if stage == 'size':
+            self.size = ByteSize.parse(fields['size'])
+            return None
+
+        # First stage starts with the command, next ones at their first line
+        self.stages.setdefault(
+            stage, time.monotonic() if self.stages else self.started)
+
+        event = {'phase': self.phase, 'stage': stage,
+                 'item': fields.get('item'), 'done': None, 'total': None,
+                 'rate': None, 'eta': None}
+
+        # pacman prints the package it starts (done is the previous one)
+        if stage == 'download':
+            self.downloaded += 1
+            event['done'] = self.downloaded - 1
+            event['total'] = self.packages
+            if self.size and self.packages:
+                elapsed = max(time.monotonic() - self.stages[stage], 0.001)
+                downloaded = self.size * min(
+                    event['done'] / self.packages, 1)
+                event['rate'] = round(downloaded / MIB / elapsed, 1)
+
+        elif stage == 'install':
+            event['done'] = int(fields['done']) - 1
+            event['total'] = int(fields['total'])
+
+        event['eta'] = self.eta(stage, event['done'], event['total'])
+        return event
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
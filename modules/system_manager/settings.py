@@ -15,16 +15,26 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import logging
 import os
 import re
+import sys
 from shlex import quote
 
+from .cache import cached_lookup, network_key
+from .hardware import cpuinfo_vendor, lspci_devices
 from .unix_command import api_json_ouput, command_output
 
+# Fields of the ipinfo.io response used by the installer
+IPINFO_FIELDS = ['country', 'timezone']
+
 
 def get_drives(self):
     """Get user's available drives.
 
+    In fleet mode, only the target drive of the install is available
+    (it can be a loop device attached to an image file).
+
     Submodules
     ----------
         `command_output`: "Subprocess `check_output` with return codes"
@@ -34,11 +44,18 @@ def get_drives(self):
         "Array containing the available drives"
     """
     cmd = 'lsblk -I 8 -d -p -o NAME,SIZE,MODEL | grep -v NAME'
+    if os.environ.get('PYARCHBOOT_DRIVE'):
+        cmd = 'lsblk -d -p -o NAME,SIZE,MODEL {drive} | grep -v NAME'.format(
+            drive=quote(os.environ['PYARCHBOOT_DRIVE']))
+
     output = command_output(cmd,
                             exit_on_error=True,
                             error=self.trad('No drive detected !'))
 
-    output = list(filter(None, output.split('\n')))
+    # Loop devices and some virtual disks have no model
+    output = [drive if len(drive.split()) > 2 else
+              '{drive} {model}'.format(drive=drive.strip(), model='unknown')
+              for drive in filter(None, output.split('\n'))]
     output.insert(0, (self.trad('Use already formatted partitions'), None))
 
     return output
@@ -87,26 +104,29 @@ def get_partition_id(self):
     return output
 
 
-def get_partuuid(self):
+def get_partuuid(drive_ids):
     """Get partitions PARTUUID.
 
+    Arguments
+    ---------
+        drive_ids: "Array containing the partitions drive id"
+
     Submodules
     ----------
         `command_output`: "Subprocess `check_output` with return codes"
 
     Returns
     -------
-        "Array containing partition partuuid"
+        "Array containing partition partuuid (same order, None if empty)"
     """
     partuuid = []
-    for drive_id in self.user['partitions']['drive_id']:
+    for drive_id in drive_ids:
         output = command_output('blkid -o value -s PARTUUID {id}'
                                 .format(id=quote(drive_id)),
                                 exit_on_error=True)
-        partuuid.append(output.replace('\n', ''))
+        partuuid.append(output.replace('\n', '') or None)
 
-    output = list(filter(None, partuuid))
-    return output
+    return partuuid
 
 
 def get_mountpoints():
@@ -196,6 +216,23 @@ def get_processor():
     return output
 
 
+def get_memory():
+    """Get user's total memory.
+
+    Returns
+    -------
+        "Integer of the total memory in bytes (0 if unknown)"
+    """
+    memory = 0
+    with open('/proc/meminfo', 'r') as meminfo:
+        for line in meminfo:
+            if line.startswith('MemTotal:'):
+                memory = int(line.split()[1]) * 1024
+                break
+
+    return memory
+
+
 def get_vga_controller():
     """Get user's available VGA controllers.
 
@@ -217,6 +254,26 @@ def get_vga_controller():
     return output
 
 
+def get_hardware():
+    """Get the vendor and device ids of the processor and the GPUs.
+
+    Submodules
+    ----------
+        `cpuinfo_vendor`: "Get the vendor id of the processor"
+        `lspci_devices`: "Get the display controllers"
+        `command_output`: "Subprocess `check_output` with return codes"
+
+    Returns
+    -------
+        "Dictionary containing the CPU vendor id and the GPU devices"
+    """
+    with open('/proc/cpuinfo', 'r') as cpuinfo:
+        vendor = cpuinfo_vendor(cpuinfo.read())
+
+    return {'cpu': vendor,
+            'gpu': lspci_devices(command_output('lspci -mm -nn') or '')}
+
+
 def get_filesystem(self, arg):
     """Check if a filesystem is used by a volume or a partition.
 
@@ -268,8 +325,11 @@ def get_firmware():
     return efi, firmware
 
 
-def get_ipinfo():
-    """Get user's IP address data.
+def ipinfo_lookup():
+    """Get user's IP address data from ipinfo.io.
+
+    Responses without the country or the timezone (e.q., rate limit
+    errors) are failures, so they are never cached.
 
     Submodules
     ----------
@@ -277,18 +337,54 @@ def get_ipinfo():
 
     Returns
     -------
-        "Dictionary containing IP address data"
+        "Dictionary containing IP address data (None on failure)"
     """
     output = api_json_ouput('https://ipinfo.io?token=26d03faada92e8',
-                            exit_on_error=True,
-                            error='no internet connection !',
                             timeout=2)
+    if not isinstance(output, dict) or \
+            any(field not in output for field in IPINFO_FIELDS):
+        return None
+
+    return output
+
+
+def get_ipinfo():
+    """Get user's IP address data (cached by network interfaces).
+
+    Modules
+    -------
+        logging: "Event logging system for applications and libraries"
+        sys: "Access to some objects used or maintained by the interpreter"
+
+    Submodules
+    ----------
+        `ipinfo_lookup`: "Get user's IP address data from ipinfo.io"
+        `cached_lookup`: "Get a network lookup from the cache"
+        `network_key`: "Get the MAC addresses of the network interfaces"
+
+    Returns
+    -------
+        "Dictionary containing IP address data"
+    """
+    output = cached_lookup('ipinfo', network_key(), ipinfo_lookup)
+
+    # Invalid response cached by a previous version
+    if (output is not None) and \
+            any(field not in output for field in IPINFO_FIELDS):
+        output = ipinfo_lookup()
+
+    if output is None:
+        logging.error('no internet connection !')
+        sys.exit(1)
+
     return output
 
 
 def get_mirrorlist(self):
     """Get user's fastest mirrors (corresponding to user's country).
 
+    The list is cached by public IP address and country.
+
     Modules
     -------
         shlex.quote: "Return a shell-escaped version of the string"
@@ -296,6 +392,7 @@ def get_mirrorlist(self):
     Submodules
     ----------
         `command_output`: "Subprocess `check_output` with return codes"
+        `cached_lookup`: "Get a network lookup from the cache"
 
     Returns
     -------
@@ -306,14 +403,18 @@ def get_mirrorlist(self):
         code=self.system['ipinfo']['country'].upper())
 
     url = '{base}{args}'.format(base=url_base, args=url_args)
-    output = command_output('curl -s {url}'.format(url=quote(url)))
 
-    if 'DOCTYPE' in output:
-        output = False
-    if output is not False:
-        output = output.replace('#Server =', 'Server =')
+    def mirrorlist():
+        output = command_output('curl -s {url}'.format(url=quote(url)))
 
-    return output
+        if (output is False) or ('DOCTYPE' in output):
+            return False
+
+        return output.replace('#Server =', 'Server =')
+
+    return cached_lookup('mirrorlist', '{ip} {country}'.format(
+        ip=self.system['ipinfo'].get('ip'),
+        country=self.system['ipinfo']['country']), mirrorlist)
 
 
 # PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
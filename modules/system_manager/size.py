@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re
+from decimal import Decimal
+
+# Binary units (as lsblk, sfdisk and lvcreate)
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+SECTOR = 512
+MIB = UNITS['M']
+
+# Format spec of a number (sign, #, zero padding, grouping or number type)
+NUMBER_SPEC = re.compile(r'^(?:.?[<>^])?(?:.?=|[+\- ]|z?#|0\d|\d*[,_])|'
+                         r'[bcdeEfFgGnoxX%]$')
+
+
+class ByteSize(int):
+    """Immutable size in bytes (exact integer arithmetic).
+
+    Sizes are parsed once from the answers (e.q., 25,5G) and stored
+    as bytes in the session (JSON integer). Sums, differences, multiples
+    and remainders of sizes are sizes.
+
+    Arguments
+    ---------
+        value: "Integer of bytes (or ByteSize)"
+
+    Modules
+    -------
+        re: "Regular expression matching operations"
+        decimal: "Decimal fixed point and floating point arithmetic"
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, size):
+        """Parse a human readable size (e.q., 512M, 25,5G, 931.5G).
+
+        Arguments
+        ---------
+            size: "String containing the size (binary units K, M, G, T)"
+
+        Raises
+        ------
+            ValueError: "Invalid size"
+
+        Returns
+        -------
+            "ByteSize of the size"
+        """
+        if isinstance(size, int):
+            return cls(size)
+
+        match = re.match(r'^\s*([0-9]+(?:[,.][0-9]+)?)\s*([KMGT])i?B?\s*$',
+                         str(size), re.IGNORECASE)
+        if match is None:
+            raise ValueError('invalid size: {size}'.format(size=size))
+
+        number = Decimal(match.group(1).replace(',', '.'))
+        return cls(int(number * UNITS[match.group(2).upper()]))
+
+    def align(self, boundary=MIB):
+        """Round down to a boundary (MiB by default, or SECTOR).
+
+        Keyword Arguments
+        -----------------
+            `boundary`: "Integer of the alignment in bytes" (default: MIB)
+
+        Returns
+        -------
+            "ByteSize aligned to the boundary"
+        """
+        return ByteSize(self - self % boundary)
+
+    @property
+    def mib(self):
+        """Integer of the size in whole MiB."""
+        return int(self) // MIB
+
+    @property
+    def sectors(self):
+        """Integer of the size in whole 512 bytes sectors."""
+        return int(self) // SECTOR
+
+    def __add__(self, other):
+        """Return the sum of the sizes."""
+        return size_result(int.__add__(self, other))
+
+    def __radd__(self, other):
+        """Return the sum of the sizes (e.q., sum)."""
+        return size_result(int.__radd__(self, other))
+
+    def __sub__(self, other):
+        """Return the difference of the sizes."""
+        return size_result(int.__sub__(self, other))
+
+    def __rsub__(self, other):
+        """Return the difference of the sizes."""
+        return size_result(int.__rsub__(self, other))
+
+    def __mul__(self, other):
+        """Return a multiple of the size."""
+        if isinstance(other, ByteSize):
+            return int.__mul__(self, other)
+
+        return size_result(int.__mul__(self, other))
+
+    def __rmul__(self, other):
+        """Return a multiple of the size."""
+        return self.__mul__(other)
+
+    def __floordiv__(self, other):
+        """Return a part of the size (count of sizes for a size)."""
+        if isinstance(other, ByteSize):
+            return int.__floordiv__(self, other)
+
+        return size_result(int.__floordiv__(self, other))
+
+    def __mod__(self, other):
+        """Return the remainder of the size."""
+        return size_result(int.__mod__(self, other))
+
+    def __neg__(self):
+        """Return the negative size (e.q., a shrink)."""
+        return ByteSize(-int(self))
+
+    def __str__(self):
+        """Return the human readable size (e.q., 25.5G)."""
+        for unit in ['T', 'G', 'M', 'K']:
+            if self >= UNITS[unit]:
+                number = Decimal(int(self)) / UNITS[unit]
+                number = number.quantize(Decimal('0.01')).normalize()
+                return '{number:f}{unit}'.format(number=number, unit=unit)
+
+        return '{bytes}B'.format(bytes=int(self))
+
+    def __repr__(self):
+        """Return the representation of the size."""
+        return '{name}({size})'.format(name=self.__class__.__name__,
+                                       size=int(self))
+
+    def __format__(self, spec):
+        """Format as human readable size (integer with a number spec).
+
+        String specs (e.q., >8, <10s) are applied to the human readable
+        size, number specs (e.q., d, ,, 08, x) to the integer of bytes.
+        """
+        if NUMBER_SPEC.search(spec) is not None:
+            return format(int(self), spec)
+
+        return format(str(self), spec)
+
+
+def size_result(result):
+    """Get the size of an arithmetic result (other types are kept).
+
+    Arguments
+    ---------
+        result: "Result of the integer operation"
+
+    Returns
+    -------
+        "ByteSize of an integer result (else the result)"
+    """
+    if isinstance(result, int) and not isinstance(result, bool):
+        return ByteSize(result)
+
+    return result
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def pacstrap_slot():
+    """Wait for a free pacstrap slot shared by the installs of a fleet.
+
+    Slots are lock files (flock) so that the limit also applies between
+    the processes of the fleet. Outside of fleet mode this does nothing.
+
+    Modules
+    -------
+        fcntl: "File control and I/O control on file descriptors"
+        os: "Export all functions from posix"
+        time: "Various functions to manipulate time values"
+
+    Yields
+    ------
+        "Integer of the acquired slot (None outside of fleet mode)"
+    """
+    slots = os.environ.get('PYARCHBOOT_PACSTRAP_SLOTS')
+    if slots is None:
+        yield None
+        return
+
+    folder = os.environ['PYARCHBOOT_LOCKS']
+    while True:
+        for slot in range(int(slots)):
+            lock = open(os.path.join(
+                folder, 'pacstrap.{slot}.lock'.format(slot=slot)), 'w')
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                continue
+
+            try:
+                yield slot
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                lock.close()
+            return
+
+        time.sleep(1)
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
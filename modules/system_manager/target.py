@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+
+
+class TargetRoot:
+    """Root folder of the installed system (default: /mnt).
+
+    Formatted as its path in commands ('arch-chroot {root}') and usable
+    wherever a path is expected (os.PathLike).
+
+    Arguments
+    ---------
+        path: "String containing the target root folder"
+
+    Modules
+    -------
+        os: "Export all functions from posix"
+    """
+
+    def __init__(self, path='/mnt'):
+        """Normalize the target root folder."""
+        self.path = os.path.abspath(path)
+
+    def __str__(self):
+        """Return the target root folder."""
+        return self.path
+
+    def __repr__(self):
+        """Return the representation of the target root."""
+        return '{name}({path!r})'.format(name=self.__class__.__name__,
+                                         path=self.path)
+
+    def __format__(self, spec):
+        """Format the target root folder."""
+        return format(self.path, spec)
+
+    def __fspath__(self):
+        """Return the target root folder (os.PathLike)."""
+        return self.path
+
+    def join(self, *parts):
+        """Get a path of the installed system.
+
+        Arguments
+        ---------
+            parts: "Strings of the path inside the system (e.q., etc/fstab)"
+
+        Returns
+        -------
+            "String containing the path from the live system"
+        """
+        return os.path.join(self.path,
+                            *[part.lstrip('/') for part in parts])
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
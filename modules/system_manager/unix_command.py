@@ -17,16 +17,42 @@ limitations under the License.
 
 import json
 import logging
+import os
 import shlex
-import sys
+import time
 from subprocess import (PIPE, CalledProcessError, Popen, SubprocessError,
                         TimeoutExpired, check_output)
 
-from requests import ConnectionError as ConnectError
-from requests import ConnectTimeout, ReadTimeout, get
+from .logger import LOG_CONTEXT
+from .model import json_default
+from .progress import Progress, format_progress
 
+# Logs folder (one per target in fleet mode)
+LOGS = os.environ.get('PYARCHBOOT_LOGS', 'logs')
 
-def run_command(cmd, args=None, error=None, exit_on_error=False):
+
+class PyArchbootError(Exception):
+    """Error of an installation (raised instead of exiting the process)."""
+
+
+class CommandError(PyArchbootError):
+    """Error of a shell command or of a network request.
+
+    Arguments
+    ---------
+        cmd: "String containing the shell command (or the url)"
+        error: "Exception or custom error message"
+    """
+
+    def __init__(self, cmd, error):
+        """Store the command and its error."""
+        super().__init__('{cmd}: {error}'.format(cmd=cmd, error=error))
+        self.cmd = cmd
+        self.error = error
+
+
+def run_command(cmd, args=None, error=None, exit_on_error=False,
+                check=True):
     """
     Subprocess Popen with console output.
 
@@ -37,19 +63,40 @@ def run_command(cmd, args=None, error=None, exit_on_error=False):
     Keyword Arguments
     -----------------
         `args`: "Array of the arguments to pipe" (default: None)
-        `exit_on_error`: "Exit on exception boolean" (default: False)
+        `exit_on_error`: "Raise CommandError on error" (default: False)
+        `check`: "Raise CommandError on a non-zero exit code in a step
+                  of the journal or with exit_on_error" (default: True)
 
     Modules
     -------
         subprocess: "Connect to input/output/error pipes and obtain return"
         shlex: "Analyzer class for simple shell-like syntaxes"
         logging: "Event logging system for applications and libraries"
-        sys: "Access to some objects used or maintained by the interpreter"
+        time: "Various functions to manipulate time values"
+
+    Submodules
+    ----------
+        `Progress`: "Progress of a command (parsed from its output lines)"
+
+    Output lines are logged as command output (echoed to the console
+    by the logging pipeline) with the progress events parsed from them
+    (live view), and the command is logged with its exit code and
+    duration. In a step of the journal, a non-zero exit code fails the
+    step (not stored as completed), commands allowed to fail (e.q.,
+    cleanup of the existing partitions) are run with check=False.
+
+    Raises
+    ------
+        CommandError: "Error of the command (exit_on_error or step)"
 
     Returns
     -------
-        "String containing the ouptut of the shell command"
+        "Integer of the exit code of the shell command (None on error)"
     """
+    started = time.monotonic()
+    output = None
+    strict = (exit_on_error is True) or \
+        (check is True and LOG_CONTEXT['step'] is not None)
     try:
         if args is not None:
             pipe = Popen(args, stdout=PIPE)
@@ -58,33 +105,49 @@ def run_command(cmd, args=None, error=None, exit_on_error=False):
                             stdout=PIPE,
                             encoding='utf-8',
                             shell=False)
-            command = command.communicate()[0]
-            output = None
+            lines = command.communicate()[0].splitlines()
         else:
             command = Popen(shlex.split(cmd),
                             stdin=PIPE,
                             stdout=PIPE,
                             encoding='utf-8',
                             shell=False)
-            while True:
-                output = command.stdout.readline()
-                if output:
-                    logging.debug(output.strip())
-                    print(output.strip())
-                else:
-                    break
+            lines = command.stdout
+
+        progress = Progress(cmd)
+        for line in lines:
+            line = line.rstrip('\n')
+            logging.debug(line, extra={'command': cmd, 'output': True})
+
+            event = progress.update(line)
+            if event is not None:
+                logging.debug(format_progress(event),
+                              extra={'command': cmd, 'progress': event})
 
-            output = command.poll()
+        output = command.wait()
+        logging.debug('{cmd} [exit {code}]'.format(cmd=cmd, code=output),
+                      extra={'command': cmd, 'exit_code': output,
+                             'duration': round(time.monotonic() - started,
+                                               3)})
 
     except (SubprocessError, OSError, ValueError) as cmd_error:
         if error is not None:
             cmd_error = error
 
-        if exit_on_error is True:
+        if strict is True:
             logging.error(cmd_error)
-            sys.exit(1)
-        else:
-            logging.debug(cmd_error)
+            raise CommandError(cmd, cmd_error)
+
+        logging.debug(cmd_error)
+
+    # Failed command (exit code)
+    if (output not in [None, 0]) and (check is True) and (strict is True):
+        cmd_error = 'exit code {code}'.format(code=output)
+        if error is not None:
+            cmd_error = error
+
+        logging.error('{cmd}: {error}'.format(cmd=cmd, error=cmd_error))
+        raise CommandError(cmd, cmd_error)
 
     return output
 
@@ -99,7 +162,7 @@ def command_output(cmd, exit_on_error=False, error=None, timeout=None):
 
     Keyword Arguments
     -----------------
-        `exit_on_error`: "Exit on exception boolean" (default: False)
+        `exit_on_error`: "Raise CommandError on error" (default: False)
         `error`: "String to set custom error message" (default: None)
         `timeout`: "Integer to set timeout expired exception" (default: None)
 
@@ -107,7 +170,10 @@ def command_output(cmd, exit_on_error=False, error=None, timeout=None):
     -------
         subprocess: "Connect to input/output/error pipes and obtain return"
         logging: "Event logging system for applications and libraries"
-        sys: "Access to some objects used or maintained by the interpreter"
+
+    Raises
+    ------
+        CommandError: "Error of the command (exit_on_error)"
 
     Returns
     -------
@@ -127,9 +193,9 @@ def command_output(cmd, exit_on_error=False, error=None, timeout=None):
 
         if exit_on_error is True:
             logging.error(cmd_error)
-            sys.exit(1)
-        else:
-            logging.debug(cmd_error)
+            raise CommandError(cmd, cmd_error)
+
+        logging.debug(cmd_error)
 
     return output
 
@@ -144,14 +210,26 @@ def api_json_ouput(url, exit_on_error=False, error=None, timeout=None):
 
     Keyword Arguments
     -----------------
-        `exit_on_error`: "Exit on exception boolean" (default: False)
+        `exit_on_error`: "Raise CommandError on error" (default: False)
         `error`: "String to set custom error message" (default: None)
         `timeout`: "Integer to set timeout expired exception" (default: None)
 
+    Modules
+    -------
+        requests: "HTTP library (imported on first use, slow to load)"
+
+    Raises
+    ------
+        CommandError: "Error of the command (exit_on_error)"
+
     Returns
     -------
         "Dictionary containing the json output"
     """
+    from requests import ConnectionError as ConnectError
+    from requests import ConnectTimeout, ReadTimeout, get
+
+    output = None
     try:
         output = get(url, timeout=timeout).json()
 
@@ -161,7 +239,7 @@ def api_json_ouput(url, exit_on_error=False, error=None, timeout=None):
         logging.error(url_error)
 
         if exit_on_error is True:
-            sys.exit(1)
+            raise CommandError(url, url_error)
 
     return output
 
@@ -205,8 +283,9 @@ def dump_json_file(dictionary, file):
     -------
         "Store the desired dictionary to the desired JSON file"
     """
-    with open('logs/{file}'.format(file=file), 'w', encoding='utf-8') as log:
-        json.dump(dictionary, log, ensure_ascii=False, indent=4)
+    with open(os.path.join(LOGS, file), 'w', encoding='utf-8') as log:
+        json.dump(dictionary, log, ensure_ascii=False, indent=4,
+                  default=json_default)
 
 
 # PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+
+Check the hardware rules (json/hardware.json) against stored probes
+(tests/fixtures/hardware.json): /proc/cpuinfo and `lspci -mm -nn` of
+known machines with the expected driver, hardvideo and microcode
+packages. Runs without root nor hardware.
+"""
+
+import json
+import os
+
+import pytest
+
+from modules.system_manager.hardware import (cpu_microcode, cpuinfo_vendor,
+                                             gpu_devices, gpu_packages,
+                                             gpu_rules, hardware_index,
+                                             lspci_devices)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(os.path.join(ROOT, 'tests', 'fixtures', 'hardware.json'), 'r',
+          encoding='utf-8') as FIXTURES:
+    PROBES = json.load(FIXTURES)
+
+
+@pytest.fixture(scope='module')
+def index():
+    """Hardware index of the rules (json/hardware.json)."""
+    with open(os.path.join(ROOT, 'json', 'hardware.json'), 'r',
+              encoding='utf-8') as file:
+        return hardware_index(json.load(file))
+
+
+def fixture_packages(index, fixture):
+    """Get the packages of a stored probe.
+
+    Arguments
+    ---------
+        index: "Dictionary containing the hardware index"
+        fixture: "Dictionary containing the probe and the session"
+
+    Returns
+    -------
+        "Dictionary containing the driver, hardvideo and microcode"
+    """
+    rules = gpu_rules(index, gpu_devices(fixture['controller'],
+                                         lspci_devices(fixture['lspci'])))
+    driver, hardvideo = gpu_packages(rules, fixture['kernels'],
+                                     proprietary=fixture['proprietary'])
+
+    name = ''
+    for line in fixture['cpuinfo'].split('\n'):
+        if line.startswith('model name'):
+            name = line.split(':')[-1].strip()
+
+    microcode = cpu_microcode(index, {
+        'name': name, 'vendor': cpuinfo_vendor(fixture['cpuinfo'])})
+
+    return {'driver': driver, 'hardvideo': hardvideo,
+            'microcode': microcode}
+
+
+@pytest.mark.parametrize('fixture', PROBES,
+                         ids=[probe['name'] for probe in PROBES])
+def test_hardware_rules(index, fixture):
+    """Packages of a stored probe are the expected ones."""
+    assert fixture_packages(index, fixture) == fixture['expected']
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+
+Check the image mode (root and loop devices, no drive): an image file
+is attached, the answers file is validated against it and the loop
+device must be released whatever the result. A complete image is
+built (network, pacstrap) from tests/fixtures/image_answers.json on
+Arch Linux hosts and its layout is checked.
+
+Skipped without root, losetup, internet or the requirements of
+PyArchboot.
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWERS = os.path.join(ROOT, 'tests', 'fixtures', 'image_answers.json')
+
+
+def attached_loops(image):
+    """Get the loop devices attached to an image file.
+
+    Arguments
+    ---------
+        image: "String containing the path of the image file"
+
+    Returns
+    -------
+        "Array containing the loop devices"
+    """
+    output = subprocess.run(['losetup', '-j', image], capture_output=True,
+                            encoding='utf-8', check=False).stdout
+    return [line.split(':')[0] for line in output.split('\n') if line]
+
+
+def build_image(folder, answers):
+    """Run PyArchboot in image mode (unattended, 4G sparse image).
+
+    Arguments
+    ---------
+        folder: "String containing the temporary folder of the test"
+        answers: "Dictionary containing the answers file"
+
+    Returns
+    -------
+        image, code: "String of the image file, integer of the exit code"
+    """
+    image = os.path.join(folder, 'test.raw')
+    config = os.path.join(folder, 'answers.json')
+    with open(config, 'w', encoding='utf-8') as file:
+        json.dump(answers, file)
+
+    cmd = [sys.executable, 'PyArchboot.py', '--lang', 'en',
+           '--config', config, '--root', os.path.join(folder, 'root'),
+           '--image', image, '--image-size', '4G']
+    env = dict(os.environ, PYARCHBOOT_LOGS=os.path.join(folder, 'logs'))
+    process = subprocess.run(cmd, cwd=ROOT, env=env, stdin=subprocess.DEVNULL,
+                             check=False)
+
+    return image, process.returncode
+
+
+def image_partitions(image):
+    """Get the partitions of an image file (sfdisk).
+
+    Arguments
+    ---------
+        image: "String containing the path of the image file"
+
+    Returns
+    -------
+        "Array containing the partitions of the partition table"
+    """
+    table = json.loads(subprocess.run(
+        ['sfdisk', '-J', image], capture_output=True, encoding='utf-8',
+        check=False).stdout or '{}')
+    return table.get('partitiontable', {}).get('partitions', [])
+
+
+@pytest.fixture
+def answers():
+    """Answers file of the image (tests/fixtures/image_answers.json)."""
+    with open(ANSWERS, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    """Temporary folder of an image (loop devices released after)."""
+    if os.geteuid() != 0 or shutil.which('losetup') is None:
+        pytest.skip('root and losetup required')
+    for requirement in ['inquirer', 'termcolor', 'coloredlogs', 'passlib',
+                        'requests']:
+        pytest.importorskip(requirement)
+    try:
+        socket.create_connection(('ipinfo.io', 443), timeout=2).close()
+    except OSError:
+        pytest.skip('internet connection required (ipinfo, mirrorlist)')
+
+    yield str(tmp_path)
+
+    for loop in attached_loops(str(tmp_path / 'test.raw')):
+        subprocess.run(['losetup', '-d', loop], check=False)
+
+
+def test_loop_released_after_invalid_answers(folder, answers):
+    """Invalid answers are refused and the image is released."""
+    image, code = build_image(folder, dict(answers, hostname='-invalid-',
+                                           kernel=[]))
+
+    assert os.path.exists(image), 'image not created (failed before)'
+    assert code != 0
+    assert attached_loops(image) == []
+    assert not os.path.ismount(os.path.join(folder, 'root'))
+
+
+def test_image_built_and_released(folder, answers):
+    """Image is built, released and its layout matches the image."""
+    if shutil.which('pacstrap') is None:
+        pytest.skip('pacstrap required (Arch Linux host)')
+
+    image, code = build_image(folder, answers)
+
+    assert code == 0
+    assert attached_loops(image) == []
+    assert not os.path.ismount(os.path.join(folder, 'root'))
+
+    with open('{image}.json'.format(image=image), 'r',
+              encoding='utf-8') as file:
+        layout = json.load(file)
+
+    names = [partition['name'] for partition in layout['partitions']
+             if (layout['lvm'] is False) or
+             (partition['name'] in ['boot', 'lvm'])]
+    assert len(image_partitions(image)) == len(names)
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
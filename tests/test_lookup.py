@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+
+Check the completion and the suggestions of the timezone and locale
+libraries (libraries/timezone, libraries/locale).
+"""
+
+from modules.questioner.lookup import (library_autocomplete,
+                                       library_complete, library_suggest)
+
+
+def test_library_complete():
+    """Entries starting with the prefix, in order."""
+    entries = library_complete('timezone', 'Europe/P')
+
+    assert entries == sorted(entries)
+    assert 'Europe/Paris' in entries
+    assert all(entry.startswith('Europe/P') for entry in entries)
+
+
+def test_library_autocomplete():
+    """TAB presses cycle through the matching entries."""
+    entries = library_complete('timezone', 'Europe/', limit=None)
+
+    assert [library_autocomplete('timezone', 'Europe/', state)
+            for state in range(len(entries) + 1)] == entries + entries[:1]
+    assert library_autocomplete('locale', 'fr_F', 0) == 'fr_FR'
+    assert library_autocomplete('timezone', 'Nowhere/', 0) is None
+
+
+def test_library_suggest():
+    """Closest entries of a wrong value (did you mean)."""
+    assert library_suggest('timezone', 'europe/paris')[0] == 'Europe/Paris'
+    assert library_suggest('timezone', '') == []
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+
+Check that a reconfigure run reaches reconfigure_manager with the
+stored session (no journal nor install), and the settings it compares.
+"""
+
+import pytest
+
+from modules.reconfigure import session_changes
+
+
+def test_reconfigure_reaches_manager(monkeypatch):
+    """Reconfigure mode reapplies the session instead of installing."""
+    pytest.importorskip('termcolor')
+    pytest.importorskip('inquirer')
+    import PyArchboot
+    from modules import journal, reconfigure
+    from modules.questioner import answers
+
+    application = PyArchboot.PyArchboot.__new__(PyArchboot.PyArchboot)
+    application.journal = None
+    application.image = None
+    application.dry_run = False
+    application.answers = {'hostname': 'node1'}
+    application.reconfigure = {'username': 'admin', 'hostname': 'node0'}
+
+    calls = []
+    monkeypatch.setattr(answers, 'answers_manager',
+                        lambda self, answers: {'confirm': True})
+    monkeypatch.setattr(PyArchboot, 'session_parameters',
+                        lambda self: calls.append('session'))
+    monkeypatch.setattr(reconfigure, 'reconfigure_manager',
+                        lambda self, previous: calls.append(previous))
+    monkeypatch.setattr(journal, 'new_journal',
+                        lambda self: calls.append('journal'))
+    monkeypatch.setattr(PyArchboot, 'install_system',
+                        lambda self: calls.append('install'))
+
+    with pytest.raises(SystemExit) as exit_info:
+        application.install()
+
+    assert exit_info.value.code == 0
+    assert calls == ['session', application.reconfigure]
+
+
+def test_session_changes():
+    """Storage and accounts are kept, other settings are compared."""
+    previous = {'hostname': 'node0', 'timezone': 'UTC', 'username': 'admin',
+                'drive': {'name': '/dev/sda'}}
+    current = {'hostname': 'node1', 'timezone': 'UTC', 'username': 'root',
+               'drive': {'name': '/dev/sdb'}}
+
+    assert session_changes(previous, current) == {'hostname'}
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
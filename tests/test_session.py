@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+
+Check that a stored session is read back as the immutable record of
+the session built from the answers (journal, resume and reconfigure).
+"""
+
+import json
+
+import pytest
+
+from modules.system_manager.model import (Partition, Swap, UserSession,
+                                          json_default, session_model)
+from modules.system_manager.size import ByteSize
+
+
+def test_stored_session_is_a_record():
+    """A stored session is loaded as the same (immutable) record."""
+    session = UserSession(
+        hostname='node0', kernel=('linux', 'linux-lts'),
+        aur_packages=('yay',), swap=Swap(type='swapfile', zswap=True,
+                                         size=ByteSize.parse('2G')),
+        partitions=(Partition(name='root', size='freespace',
+                              filesystem='ext4', mountpoint='/mnt',
+                              mountorder=0),))
+
+    stored = json.loads(json.dumps(session, default=json_default))
+    assert session_model(dict(stored, unknown=True)) == session
+
+    with pytest.raises(TypeError):
+        session['hostname'] = 'node1'
+    with pytest.raises(AttributeError):
+        session.hostname = 'node1'
+    assert session.replace(hostname='node1')['hostname'] == 'node1'
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""Copyright 2020 Jeremy Pardo @grm34 https://github.com/grm34.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+
+Check the startup time budget: heavy modules (HTTP, prompts, colored
+console) are only imported when they are first used, not by the
+imports of the application (see --startup-profile).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported on first use only
+HEAVY_MODULES = ['requests', 'inquirer', 'coloredlogs']
+
+
+def imported_modules(code):
+    """Get the heavy modules imported by a code in a new interpreter.
+
+    Arguments
+    ---------
+        code: "String containing the Python code to run"
+
+    Returns
+    -------
+        "Array containing the imported heavy modules"
+    """
+    script = '{code}\nimport json, sys\nprint(json.dumps(sorted(' \
+             'name for name in {heavy} if name in sys.modules)))'.format(
+                 code=code, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                            capture_output=True, encoding='utf-8',
+                            check=True).stdout
+    return json.loads(output.strip().split('\n')[-1])
+
+
+def test_no_heavy_import_at_startup():
+    """Application imports do not load the heavy modules."""
+    pytest.importorskip('termcolor')
+
+    assert imported_modules('import PyArchboot') == []
+    assert imported_modules('import modules.app') == []
+    assert imported_modules('import modules.api') == []
+
+
+def test_heavy_import_on_first_use(tmp_path):
+    """The colored console is imported by the logging pipeline."""
+    pytest.importorskip('coloredlogs')
+
+    code = 'from modules.system_manager.logger import setup_logging\n' \
+           'setup_logging({logs!r})'.format(logs=str(tmp_path))
+    assert imported_modules(code) == ['coloredlogs']
+
+
+# PyArchboot - Python Arch Linux Installer by grm34 under Apache License 2.0
+##############################################################################